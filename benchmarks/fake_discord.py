@@ -0,0 +1,448 @@
+import asyncio
+import contextvars
+import datetime
+import itertools
+import random
+import time
+from collections import Counter
+from typing import Any
+
+import hikari
+from hikari.internal import routes
+
+# Set by the harness around each synthetic interaction, tasks spawned while
+# handling it inherit the value so REST calls can be attributed back to it.
+current_interaction: contextvars.ContextVar[int | None] = (
+    contextvars.ContextVar("current_interaction", default=None)
+)
+
+APPLICATION_ID = 1_000_000_000_000_000_001
+BOT_USER_ID = 1_000_000_000_000_000_002
+
+
+class SnowflakeFactory:
+    def __init__(self) -> None:
+        self._increment = itertools.count()
+
+    def __call__(self) -> int:
+        now = datetime.datetime.now(datetime.timezone.utc)
+        return int(hikari.Snowflake.from_datetime(now)) | (
+            next(self._increment) & 0x3FFFFF
+        )
+
+
+def user_payload(user_id: int, username: str | None = None) -> dict[str, Any]:
+    return {
+        "id": str(user_id),
+        "username": username or f"user{user_id % 100_000}",
+        "discriminator": "0001",
+        "avatar": None,
+        "bot": user_id == BOT_USER_ID,
+    }
+
+
+def _iso(moment: datetime.datetime) -> str:
+    return moment.isoformat()
+
+
+class FakeBucket:
+    __slots__ = ("limit", "period", "remaining", "reset_at", "known")
+
+    def __init__(self, limit: int, period: float) -> None:
+        self.limit: int = limit
+        self.period: float = period
+        self.remaining: int = limit
+        self.reset_at: float = 0.0
+        # hikari learns a bucket from the headers of its first 429 and waits
+        # locally from then on, so only the first overflow is a real 429.
+        self.known: bool = False
+
+    def acquire(self) -> float:
+        # Fixed window like Discord's: 0 when the request may go through,
+        # otherwise how long until the window resets.
+        now = time.monotonic()
+        if now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = now + self.period
+
+        if self.remaining > 0:
+            self.remaining -= 1
+            return 0.0
+        return self.reset_at - now
+
+
+class FakeGateway:
+    # Feeds raw dispatch payloads through the bot's real event manager, so
+    # deserialization, miru and lightbulb all run exactly as in production.
+    def __init__(self, bot: hikari.GatewayBot, *, latency: float = 0.0):
+        self.bot: hikari.GatewayBot = bot
+        self.latency: float = latency
+        self.shard: Any = _FakeShard()
+        self.events: Counter[str] = Counter()
+
+    def emit(self, name: str, payload: dict[str, Any]) -> None:
+        self.events[name] += 1
+        if self.latency:
+            asyncio.get_running_loop().call_later(
+                self.latency,
+                self.bot.event_manager.consume_raw_event,
+                name,
+                self.shard,
+                payload,
+            )
+        else:
+            self.bot.event_manager.consume_raw_event(name, self.shard, payload)
+
+
+class _FakeShard:
+    id: int = 0
+    shard_count: int = 1
+    heartbeat_latency: float = 0.0
+    is_alive: bool = True
+
+
+class FakeRest:
+    # The subset of hikari's RESTClient the bot uses. Every call sleeps for
+    # a jittered latency and goes through Discord-style per-route buckets,
+    # waiting out full buckets the way hikari does.
+    def __init__(
+        self,
+        bot: hikari.GatewayBot,
+        gateway: FakeGateway,
+        *,
+        latency: float = 0.05,
+        jitter: float = 0.5,
+        buckets: dict[str, tuple[int, float]] | None = None,
+        default_bucket: tuple[int, float] = (50, 1.0),
+        max_rate_limit: float = 300.0,
+        category_limit: int = 50,
+        seed: int = 0,
+    ) -> None:
+        self.bot: hikari.GatewayBot = bot
+        self.gateway: FakeGateway = gateway
+        self.latency: float = latency
+        self.jitter: float = jitter
+        self.bucket_limits: dict[str, tuple[int, float]] = buckets or {}
+        self.default_bucket: tuple[int, float] = default_bucket
+        self.max_rate_limit: float = max_rate_limit
+        self.category_limit: int = category_limit
+        self.snowflake: SnowflakeFactory = SnowflakeFactory()
+        self.calls: Counter[str] = Counter()
+        self.rate_limited: Counter[str] = Counter()
+        self.last_call: dict[int, float] = {}
+        self.channels: dict[int, dict[str, Any]] = {}
+        self.messages: dict[int, list[dict[str, Any]]] = {}
+        self._buckets: dict[tuple[str, int], FakeBucket] = {}
+        self._random: random.Random = random.Random(seed)
+
+    @property
+    def entity_factory(self) -> hikari.api.EntityFactory:
+        return self.bot.entity_factory
+
+    def reset_counters(self) -> None:
+        self.calls.clear()
+        self.rate_limited.clear()
+        self.last_call.clear()
+
+    async def _request(self, route: str, major: int = 0) -> None:
+        self.calls[route] += 1
+        key = (route, major)
+        if (bucket := self._buckets.get(key)) is None:
+            bucket = self._buckets[key] = FakeBucket(
+                *self.bucket_limits.get(route, self.default_bucket)
+            )
+
+        while (retry_after := bucket.acquire()) > 0:
+            if not bucket.known:
+                bucket.known = True
+                self.rate_limited[route] += 1
+                await asyncio.sleep(self._delay())
+            if retry_after > self.max_rate_limit:
+                raise hikari.RateLimitTooLongError(
+                    route=routes.Route("POST", f"/{route}").compile(),
+                    retry_after=retry_after,
+                    max_retry_after=self.max_rate_limit,
+                    reset_at=time.time() + retry_after,
+                    limit=bucket.limit,
+                    period=bucket.period,
+                )
+            await asyncio.sleep(retry_after)
+
+        await asyncio.sleep(self._delay())
+        if (interaction_id := current_interaction.get()) is not None:
+            self.last_call[interaction_id] = time.perf_counter()
+
+    def _delay(self) -> float:
+        return self.latency * self._random.uniform(
+            1 - self.jitter, 1 + self.jitter
+        )
+
+    # Channels
+
+    def _channel_payload(
+        self,
+        channel_id: int,
+        guild_id: int,
+        name: str,
+        parent_id: int | None,
+        permission_overwrites: Any,
+    ) -> dict[str, Any]:
+        return {
+            "id": str(channel_id),
+            "type": 0,
+            "guild_id": str(guild_id),
+            "name": name,
+            "position": 0,
+            "parent_id": parent_id and str(parent_id),
+            "nsfw": False,
+            "topic": None,
+            "last_message_id": None,
+            "rate_limit_per_user": 0,
+            "permission_overwrites": [
+                {
+                    "id": str(overwrite.id),
+                    "type": int(overwrite.type),
+                    "allow": str(int(overwrite.allow)),
+                    "deny": str(int(overwrite.deny)),
+                }
+                for overwrite in permission_overwrites
+            ],
+        }
+
+    def add_category(self, category_id: int, guild_id: int, name: str) -> None:
+        payload = self._channel_payload(category_id, guild_id, name, None, ())
+        del payload["topic"], payload["last_message_id"]
+        del payload["rate_limit_per_user"]
+        self.channels[category_id] = {**payload, "type": 4}
+
+    async def fetch_guild_channels(self, guild: Any) -> list[Any]:
+        await self._request("fetch_guild_channels", int(guild))
+        return [
+            self.entity_factory.deserialize_channel(payload)
+            for payload in self.channels.values()
+            if payload["guild_id"] == str(int(guild))
+        ]
+
+    async def create_guild_category(
+        self,
+        guild: Any,
+        name: str,
+        *,
+        permission_overwrites: Any = (),
+        **_: Any,
+    ) -> hikari.GuildCategory:
+        await self._request("create_guild_category", int(guild))
+        category_id = self.snowflake()
+        self.add_category(category_id, int(guild), name)
+        payload = self.channels[category_id]
+        payload["permission_overwrites"] = self._channel_payload(
+            0, 0, "", None, permission_overwrites
+        )["permission_overwrites"]
+        self.gateway.emit("CHANNEL_CREATE", payload)
+        return self.entity_factory.deserialize_guild_category(payload)
+
+    async def create_guild_text_channel(
+        self,
+        guild: Any,
+        name: str,
+        *,
+        category: Any = None,
+        permission_overwrites: Any = (),
+        **_: Any,
+    ) -> hikari.GuildTextChannel:
+        await self._request("create_guild_text_channel", int(guild))
+        if category is not None and self.category_limit <= sum(
+            payload["parent_id"] == str(int(category))
+            for payload in self.channels.values()
+        ):
+            raise hikari.BadRequestError(
+                "create_guild_text_channel",
+                hikari.Headers(),
+                b"",
+                "Maximum number of channels in category reached "
+                f"({self.category_limit})",
+                50035,
+            )
+
+        payload = self._channel_payload(
+            self.snowflake(),
+            int(guild),
+            name,
+            category and int(category),
+            permission_overwrites,
+        )
+        self.channels[int(payload["id"])] = payload
+        self.gateway.emit("CHANNEL_CREATE", payload)
+        return self.entity_factory.deserialize_guild_text_channel(payload)
+
+    async def edit_channel(
+        self,
+        channel: Any,
+        *,
+        name: Any = hikari.UNDEFINED,
+        permission_overwrites: Any = hikari.UNDEFINED,
+        **_: Any,
+    ) -> hikari.GuildTextChannel:
+        await self._request("edit_channel", int(channel))
+        if (payload := self.channels.get(int(channel))) is None:
+            raise hikari.NotFoundError("", hikari.Headers(), b"")
+
+        if name is not hikari.UNDEFINED:
+            payload["name"] = name
+        if permission_overwrites is not hikari.UNDEFINED:
+            payload.update(
+                permission_overwrites=self._channel_payload(
+                    0, 0, "", None, permission_overwrites
+                )["permission_overwrites"]
+            )
+        self.gateway.emit("CHANNEL_UPDATE", payload)
+        return self.entity_factory.deserialize_guild_text_channel(payload)
+
+    async def delete_channel(self, channel: Any) -> Any:
+        await self._request("delete_channel", int(channel))
+        if (payload := self.channels.pop(int(channel), None)) is None:
+            raise hikari.NotFoundError("", hikari.Headers(), b"")
+
+        self.messages.pop(int(channel), None)
+        self.gateway.emit("CHANNEL_DELETE", payload)
+        return self.entity_factory.deserialize_channel(payload)
+
+    # Messages
+
+    def _message_payload(
+        self,
+        channel_id: int,
+        content: Any = hikari.UNDEFINED,
+        embed: Any = hikari.UNDEFINED,
+        embeds: Any = hikari.UNDEFINED,
+        message_id: int | None = None,
+    ) -> dict[str, Any]:
+        if embed is not hikari.UNDEFINED and embed is not None:
+            embeds = [embed]
+        return {
+            "id": str(message_id or self.snowflake()),
+            "channel_id": str(channel_id),
+            "author": user_payload(BOT_USER_ID, "ticket-bot"),
+            "content": "" if content is hikari.UNDEFINED else str(content),
+            "timestamp": _iso(datetime.datetime.now(datetime.timezone.utc)),
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": [
+                self.entity_factory.serialize_embed(item)[0]
+                for item in (embeds or ())
+            ],
+            "pinned": False,
+            "type": 0,
+            "flags": 0,
+        }
+
+    def _message(self, payload: dict[str, Any]) -> hikari.Message:
+        return self.entity_factory.deserialize_message(payload)
+
+    async def create_message(
+        self,
+        channel: Any,
+        content: Any = hikari.UNDEFINED,
+        *,
+        embed: Any = hikari.UNDEFINED,
+        embeds: Any = hikari.UNDEFINED,
+        **_: Any,
+    ) -> hikari.Message:
+        await self._request("create_message", int(channel))
+        payload = self._message_payload(int(channel), content, embed, embeds)
+        self.messages.setdefault(int(channel), []).append(payload)
+        return self._message(payload)
+
+    async def edit_message(
+        self,
+        channel: Any,
+        message: Any,
+        content: Any = hikari.UNDEFINED,
+        *,
+        embed: Any = hikari.UNDEFINED,
+        embeds: Any = hikari.UNDEFINED,
+        **_: Any,
+    ) -> hikari.Message:
+        await self._request("edit_message", int(channel))
+        return self._message(
+            self._message_payload(
+                int(channel), content, embed, embeds, int(message)
+            )
+        )
+
+    async def delete_message(
+        self, channel: Any, message: Any, **_: Any
+    ) -> None:
+        await self._request("delete_message", int(channel))
+
+    async def add_reaction(
+        self, channel: Any, message: Any, emoji: Any, *_: Any
+    ) -> None:
+        await self._request("add_reaction", int(channel))
+
+    def fetch_messages(
+        self, channel: Any, **_: Any
+    ) -> hikari.LazyIterator[hikari.Message]:
+        async def history() -> Any:
+            await self._request("fetch_messages", int(channel))
+            for payload in tuple(self.messages.get(int(channel), ())):
+                yield self._message(payload)
+
+        return _AsyncLazyIterator(history())
+
+    async def fetch_member(self, guild: Any, user: Any) -> Any:
+        await self._request("fetch_member", int(guild))
+        return None
+
+    # Interactions
+
+    async def create_interaction_response(
+        self, interaction: Any, token: str, response_type: Any, *_, **__
+    ) -> None:
+        await self._request("create_interaction_response", hash(token))
+
+    async def create_modal_response(
+        self, interaction: Any, token: str, *_, **__
+    ) -> None:
+        await self._request("create_modal_response", hash(token))
+
+    async def edit_interaction_response(
+        self,
+        application: Any,
+        token: str,
+        content: Any = hikari.UNDEFINED,
+        *,
+        embed: Any = hikari.UNDEFINED,
+        embeds: Any = hikari.UNDEFINED,
+        **_: Any,
+    ) -> hikari.Message:
+        await self._request("edit_interaction_response", hash(token))
+        return self._message(self._message_payload(0, content, embed, embeds))
+
+    async def execute_webhook(
+        self,
+        webhook: Any,
+        token: str,
+        content: Any = hikari.UNDEFINED,
+        *,
+        embed: Any = hikari.UNDEFINED,
+        embeds: Any = hikari.UNDEFINED,
+        **_: Any,
+    ) -> hikari.Message:
+        await self._request("execute_webhook", hash(token))
+        return self._message(self._message_payload(0, content, embed, embeds))
+
+    def __getattr__(self, name: str) -> Any:
+        raise NotImplementedError(f"FakeRest does not implement {name}().")
+
+
+class _AsyncLazyIterator(hikari.LazyIterator[Any]):
+    def __init__(self, source: Any) -> None:
+        self._source = source
+
+    async def __anext__(self) -> Any:
+        return await self._source.__anext__()
@@ -0,0 +1,451 @@
+# Offline load test, run from the repository root:
+#   python -O -m benchmarks.ticket_load --tickets 2000 --suggestions 1000
+
+import argparse
+import asyncio
+import contextvars
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any
+
+import hikari
+
+from benchmarks.fake_discord import (
+    APPLICATION_ID,
+    FakeGateway,
+    FakeRest,
+    current_interaction,
+    user_payload,
+)
+
+ROOT = Path(__file__).resolve().parent.parent
+
+GUILD_ID = 2_000_000_000_000_000_001
+TICKET_CATEGORY_ID = 2_000_000_000_000_000_002
+SUPPORT_ROLE_ID = 2_000_000_000_000_000_003
+PANEL_CHANNEL_ID = 2_000_000_000_000_000_004
+PREMIUM_ROLE_ID = 1003908285465899059
+
+logger = logging.getLogger("benchmarks")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Drive the Ticket plugin against an in-process fake "
+        "Discord and report throughput, latency and REST usage."
+    )
+    parser.add_argument("--tickets", type=int, default=2000)
+    parser.add_argument("--suggestions", type=int, default=1000)
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=500.0,
+        help="Interactions injected per second, 0 for all at once.",
+    )
+    parser.add_argument(
+        "--duplicate-ratio",
+        type=float,
+        default=0.1,
+        help="Share of users that click the panel twice at once.",
+    )
+    parser.add_argument("--priority-ratio", type=float, default=0.1)
+    parser.add_argument("--rest-latency", type=float, default=0.05)
+    parser.add_argument("--gateway-latency", type=float, default=0.0)
+    parser.add_argument(
+        "--create-limit",
+        type=int,
+        default=50,
+        help="Fake channel-create bucket size per guild.",
+    )
+    parser.add_argument("--create-period", type=float, default=1.0)
+    parser.add_argument("--route-limit", type=int, default=50)
+    parser.add_argument("--route-period", type=float, default=1.0)
+    parser.add_argument("--warm-pool", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=600.0)
+    parser.add_argument(
+        "--tracemalloc",
+        action="store_true",
+        help="Also report the Python heap peak (slows the run down).",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def configure_environment(args: argparse.Namespace, directory: str) -> None:
+    # Config and the plugins read these at import time.
+    os.environ.update(
+        DISCORD_BOT_TOKEN="benchmark",
+        GUILD_ID=str(GUILD_ID),
+        BOT_OWNER_ID="1",
+        TICKET_CATEGORY_ID=str(TICKET_CATEGORY_ID),
+        SUPPORT_ROLE_ID=str(SUPPORT_ROLE_ID),
+        DATABASE_PATH=os.path.join(directory, "tickets.sqlite3"),
+        TRANSCRIPTS_PATH=os.path.join(directory, "transcripts"),
+        SNAPSHOT_PATH=os.path.join(directory, "snapshot.json"),
+        TICKET_CREATE_BURST=str(args.create_limit),
+        TICKET_CREATE_PERIOD=str(args.create_period),
+        TICKET_WARM_POOL_MIN=str(min(args.warm_pool, 1)),
+        TICKET_WARM_POOL_MAX=str(args.warm_pool),
+        # Every simulated click should reach the pipeline being measured.
+        SHED_USER_BURST="0",
+        SHED_GUILD_BURST="0",
+        SHED_GLOBAL_BURST="0",
+    )
+    os.environ.pop("TRANSCRIPT_CHANNEL_ID", None)
+    os.environ.pop("METRICS_PORT", None)
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class PhaseResult:
+    __slots__ = ("name", "interactions", "seconds", "latencies", "calls")
+
+    def __init__(
+        self,
+        name: str,
+        interactions: int,
+        seconds: float,
+        latencies: list[float],
+        calls: dict[str, tuple[int, int]],
+    ) -> None:
+        self.name: str = name
+        self.interactions: int = interactions
+        self.seconds: float = seconds
+        self.latencies: list[float] = latencies
+        self.calls: dict[str, tuple[int, int]] = calls
+
+    @property
+    def rest_calls(self) -> int:
+        return sum(count for count, _ in self.calls.values())
+
+    @property
+    def rate_limited(self) -> int:
+        return sum(limited for _, limited in self.calls.values())
+
+
+class LoadHarness:
+    def __init__(self, args: argparse.Namespace) -> None:
+        # Imported late, see configure_environment.
+        from models.bot import CACHE_SETTINGS, INTENTS, Bot
+
+        self.args: argparse.Namespace = args
+        self.random: random.Random = random.Random(args.seed)
+        self.bot: Bot = Bot(
+            token="benchmark",
+            prefix="!",
+            intents=INTENTS,
+            cache_settings=CACHE_SETTINGS,
+            banner=None,
+        )
+        self.gateway: FakeGateway = FakeGateway(
+            self.bot, latency=args.gateway_latency
+        )
+        self.rest: FakeRest = FakeRest(
+            self.bot,
+            self.gateway,
+            latency=args.rest_latency,
+            buckets={
+                "create_guild_text_channel": (
+                    args.create_limit,
+                    args.create_period,
+                )
+            },
+            default_bucket=(args.route_limit, args.route_period),
+            seed=args.seed,
+        )
+        # hikari keeps the REST client here, everything that reaches for
+        # ``app.rest`` (entities, interactions, plugins) ends up in the fake.
+        self.bot._rest = self.rest  # type: ignore
+        self._injected: dict[int, float] = {}
+
+    async def start(self) -> None:
+        from plugins import tickets
+
+        self.rest.add_category(TICKET_CATEGORY_ID, GUILD_ID, "Tickets")
+        await self.bot.store.open()
+        await self.bot.guild_configs.load()
+        await tickets.on_started(hikari.StartedEvent(app=self.bot))
+
+    async def close(self) -> None:
+        from plugins import tickets
+
+        await tickets.on_stopping(hikari.StoppingEvent(app=self.bot))
+        await self.bot.store.close()
+
+    # Payloads
+
+    def member_payload(self, user_id: int) -> dict[str, Any]:
+        roles = (
+            [str(PREMIUM_ROLE_ID)]
+            if self.random.random() < self.args.priority_ratio
+            else []
+        )
+        return {
+            "user": user_payload(user_id),
+            "roles": roles,
+            "joined_at": "2022-01-01T00:00:00+00:00",
+            "permissions": "0",
+            "deaf": False,
+            "mute": False,
+        }
+
+    def interaction_payload(
+        self,
+        kind: int,
+        user_id: int,
+        channel_id: int,
+        data: dict[str, Any],
+        message: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        interaction_id = self.rest.snowflake()
+        payload = {
+            "id": str(interaction_id),
+            "application_id": str(APPLICATION_ID),
+            "type": kind,
+            "token": f"token-{interaction_id}",
+            "version": 1,
+            "guild_id": str(GUILD_ID),
+            "channel_id": str(channel_id),
+            "member": self.member_payload(user_id),
+            "data": data,
+            "locale": "en-US",
+            "guild_locale": "en-US",
+            "app_permissions": "0",
+        }
+        if message is not None:
+            payload["message"] = message
+        return payload
+
+    def component_payload(
+        self,
+        user_id: int,
+        channel_id: int,
+        custom_id: str,
+        values: list[str] | None = None,
+    ) -> dict[str, Any]:
+        message = self.rest._message_payload(
+            channel_id, embed=hikari.Embed(description="benchmark")
+        )
+        data: dict[str, Any] = {
+            "custom_id": custom_id,
+            "component_type": 3 if values else 2,
+        }
+        if values:
+            data["values"] = values
+        return self.interaction_payload(3, user_id, channel_id, data, message)
+
+    # Driving
+
+    def inject(self, payload: dict[str, Any]) -> None:
+        interaction_id = int(payload["id"])
+
+        def deliver() -> None:
+            current_interaction.set(interaction_id)
+            self._injected[interaction_id] = time.perf_counter()
+            self.gateway.emit("INTERACTION_CREATE", payload)
+
+        contextvars.copy_context().run(deliver)
+
+    async def run_phase(
+        self, name: str, payloads: list[dict[str, Any]]
+    ) -> PhaseResult:
+        self.rest.reset_counters()
+        self._injected.clear()
+        baseline = asyncio.all_tasks()
+        interval = 1 / self.args.rate if self.args.rate > 0 else 0.0
+
+        start = time.perf_counter()
+        for index, payload in enumerate(payloads):
+            self.inject(payload)
+            if interval:
+                delay = start + (index + 1) * interval - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+        await self.wait_idle(baseline)
+        seconds = time.perf_counter() - start
+
+        latencies = [
+            self.rest.last_call[interaction_id] - injected_at
+            for interaction_id, injected_at in self._injected.items()
+            if interaction_id in self.rest.last_call
+        ]
+        calls = {
+            route: (count, self.rest.rate_limited[route])
+            for route, count in sorted(self.rest.calls.items())
+        }
+        return PhaseResult(name, len(payloads), seconds, latencies, calls)
+
+    async def wait_idle(self, baseline: set[asyncio.Task[Any]]) -> None:
+        deadline = time.monotonic() + self.args.timeout
+        current = asyncio.current_task()
+        while pending := [
+            task
+            for task in asyncio.all_tasks() - baseline
+            if task is not current and not task.done()
+        ]:
+            if time.monotonic() > deadline:
+                raise TimeoutError(
+                    f"{len(pending)} tasks still running after "
+                    f"{self.args.timeout:.0f}s."
+                )
+            await asyncio.sleep(0.01)
+
+    async def open_tickets(self) -> PhaseResult:
+        payloads = []
+        for user_id in range(10_000, 10_000 + self.args.tickets):
+            category = self.random.choice(("refund", "bug_report", "refund"))
+            clicks = (
+                2 if self.random.random() < self.args.duplicate_ratio else 1
+            )
+            payloads.extend(
+                self.component_payload(
+                    user_id, PANEL_CHANNEL_ID, "ticket_panel", [category]
+                )
+                for _ in range(clicks)
+            )
+        return await self.run_phase("open", payloads)
+
+    async def close_tickets(self) -> PhaseResult:
+        payloads = []
+        for ticket in self.bot.tickets:
+            payloads.append(
+                self.component_payload(
+                    ticket.owner_id,
+                    ticket.channel_id,
+                    f"TICKET:CLOSE:{ticket.channel_id}",
+                )
+            )
+            payloads.append(
+                self.component_payload(
+                    ticket.owner_id, ticket.channel_id, "TICKET:CONFIRM:CLOSE"
+                )
+            )
+        return await self.run_phase("close", payloads)
+
+    async def submit_suggestions(self) -> PhaseResult:
+        from models.views import SuggestionModal
+
+        modals = []
+        payloads = []
+        for user_id in range(50_000, 50_000 + self.args.suggestions):
+            modal = SuggestionModal(title="Suggestion", timeout=None)
+            await modal.start()
+            modals.append(modal)
+            payloads.append(
+                self.interaction_payload(
+                    5,
+                    user_id,
+                    PANEL_CHANNEL_ID,
+                    {
+                        "custom_id": modal.custom_id,
+                        "components": [
+                            {
+                                "type": 1,
+                                "components": [
+                                    {
+                                        "type": 4,
+                                        "custom_id": modal.suggestion.custom_id,
+                                        "value": f"Suggestion #{user_id}",
+                                    }
+                                ],
+                            }
+                        ],
+                    },
+                )
+            )
+
+        try:
+            return await self.run_phase("suggest", payloads)
+        finally:
+            for modal in modals:
+                modal.stop()
+
+
+def format_report(
+    results: list[PhaseResult],
+    tickets_opened: int,
+    max_rss: float | None,
+    heap_peak: int | None,
+) -> str:
+    lines = [
+        f"{'phase':<8} {'count':>7} {'wall s':>8} {'per s':>8} "
+        f"{'p50 ms':>8} {'p99 ms':>8} {'rest':>7} {'429s':>6}"
+    ]
+    for result in results:
+        lines.append(
+            f"{result.name:<8} {result.interactions:>7} "
+            f"{result.seconds:>8.2f} "
+            f"{result.interactions / result.seconds:>8.1f} "
+            f"{percentile(result.latencies, 0.50) * 1000:>8.1f} "
+            f"{percentile(result.latencies, 0.99) * 1000:>8.1f} "
+            f"{result.rest_calls:>7} {result.rate_limited:>6}"
+        )
+
+    opened = next(result for result in results if result.name == "open")
+    lines.append("")
+    lines.append(
+        f"Tickets opened: {tickets_opened}, REST calls per ticket: "
+        f"{opened.rest_calls / max(tickets_opened, 1):.2f}"
+    )
+    for result in results:
+        lines.append(f"\n{result.name} REST calls (429s):")
+        for route, (count, limited) in result.calls.items():
+            lines.append(f"  {route:<30} {count:>7} ({limited})")
+
+    lines.append("")
+    lines.append(
+        "Peak RSS: " + (f"{max_rss:.1f} MiB" if max_rss is not None else "n/a")
+    )
+    if heap_peak is not None:
+        lines.append(f"Peak Python heap: {heap_peak / 1024 / 1024:.1f} MiB")
+    return "\n".join(lines)
+
+
+async def run(args: argparse.Namespace) -> str:
+    from utils import max_rss_mib
+
+    harness = LoadHarness(args)
+    await harness.start()
+    try:
+        results = [await harness.open_tickets()]
+        tickets_opened = len(harness.bot.tickets)
+        results.append(await harness.close_tickets())
+        results.append(await harness.submit_suggestions())
+    finally:
+        await harness.close()
+
+    heap_peak = (
+        tracemalloc.get_traced_memory()[1] if args.tracemalloc else None
+    )
+    return format_report(results, tickets_opened, max_rss_mib(), heap_peak)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory(prefix="ticket-bench-") as directory:
+        configure_environment(args, directory)
+        # Bot loads its plugins relative to the working directory.
+        os.chdir(ROOT)
+        if str(ROOT) not in sys.path:
+            sys.path.insert(0, str(ROOT))
+        if args.tracemalloc:
+            tracemalloc.start()
+
+        print(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,170 @@
+import time
+
+LAUNCHED_AT = time.perf_counter()
+
+import argparse
 import asyncio
+import cProfile
 import logging
+import multiprocessing
 import os
+import signal
 from pathlib import Path
+from typing import Any, Sequence
 
-import nest_asyncio
+logger = logging.getLogger(Path(__file__).stem)
 
-from models.bot import run
+# Seconds to wait before restarting a worker that exited on its own.
+WORKER_RESTART_DELAY: float = 5.0
 
-logger = logging.getLogger(Path(__file__).stem)
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Profile from launch until the Bot is ready and log a report.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Run a cluster of this many processes, each on its own shards.",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=None,
+        help="Total gateway shard count, defaults to one per worker.",
+    )
+    return parser.parse_args()
 
-def launch() -> None:
-    loop = asyncio.get_event_loop()
+
+def install_event_loop_policy() -> None:
     if os.name != "nt":
         import uvloop
 
-        uvloop.install()
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
+def shard_ranges(workers: int, shard_count: int) -> list[range]:
+    # Contiguous ranges, the first ``shard_count % workers`` get one extra.
+    size, extra = divmod(shard_count, workers)
+    ranges, start = [], 0
+    for worker in range(workers):
+        stop = start + size + (worker < extra)
+        ranges.append(range(start, stop))
+        start = stop
+    return ranges
+
+
+def run_worker(
+    worker: int, shard_ids: Sequence[int], shard_count: int
+) -> None:
+    # The launcher turns Ctrl+C into a single SIGTERM, which shuts the worker
+    # down the way Ctrl+C would.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    from models.bot import run
+
+    install_event_loop_policy()
+    asyncio.run(
+        run(
+            launched_at=time.perf_counter(),
+            shard_ids=shard_ids,
+            shard_count=shard_count,
+            worker=worker,
+        )
+    )
+
+
+def launch_cluster(workers: int, shard_count: int) -> None:
+    if not 0 < workers <= shard_count:
+        raise SystemExit("--workers must be between 1 and --shards.")
+
+    from config import CONFIG
+    from utils import setup_logging
+
+    listener = setup_logging(
+        CONFIG.LOG_LEVEL,
+        json_output=CONFIG.LOG_FORMAT == "json",
+        sample_rates=CONFIG.LOG_SAMPLE_RATES,
+    )
+    context = multiprocessing.get_context("spawn")
+    ranges = shard_ranges(workers, shard_count)
+    processes: dict[int, Any] = {}
+    stopping = False
+
+    def start(worker: int) -> None:
+        process = processes[worker] = context.Process(
+            target=run_worker,
+            args=(worker, tuple(ranges[worker]), shard_count),
+            name=f"worker-{worker}",
+        )
+        process.start()
+        logger.info(
+            "Started worker %d (pid %s) on shards %d-%d of %d.",
+            worker,
+            process.pid,
+            ranges[worker].start,
+            ranges[worker].stop - 1,
+            shard_count,
+        )
+
+    def stop(*_: Any) -> None:
+        nonlocal stopping
+        stopping = True
+        for process in processes.values():
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for worker in range(workers):
+        start(worker)
+
+    while processes:
+        time.sleep(1)
+        for worker, process in tuple(processes.items()):
+            if process.is_alive():
+                continue
+
+            process.join()
+            if stopping:
+                del processes[worker]
+                continue
+
+            logger.warning(
+                "Worker %d exited with code %s, restarting it in %.0fs.",
+                worker,
+                process.exitcode,
+                WORKER_RESTART_DELAY,
+            )
+            time.sleep(WORKER_RESTART_DELAY)
+            if not stopping:
+                start(worker)
+
+    listener.stop()
+
+
+def launch() -> None:
+    args = parse_args()
+    if args.workers > 1 or args.shards is not None:
+        launch_cluster(args.workers, args.shards or args.workers)
+        return
+
+    profiler = cProfile.Profile() if args.profile_startup else None
+    if profiler is not None:
+        profiler.enable()
+
+    # Imported here so --profile-startup also covers hikari's import time.
+    from models.bot import run
 
-    loop.run_until_complete(run())
+    install_event_loop_policy()
+    asyncio.run(run(launched_at=LAUNCHED_AT, startup_profiler=profiler))
 
 
 if __name__ == "__main__":
-    nest_asyncio.apply()
     launch()
@@ -1,5 +1,27 @@
 from .bot import *
+from .category_pool import *
+from .close_requests import *
 from .colour import *
 from .config import *
+from .coordination import *
 from .emojis import *
 from .errors import *
+from .guild_config import *
+from .inflight import *
+from .loop_watchdog import *
+from .members import *
+from .metrics import *
+from .pipeline import *
+from .ratelimit import *
+from .router import *
+from .scheduler import *
+from .snapshot import *
+from .ticket_index import *
+from .transcripts import *
+from .store import *
+from .suggestion_index import *
+from .suggestion_votes import *
+from .tasks import *
+from .ticket_categories import *
+from .timers import *
+from .warm_pool import *
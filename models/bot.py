@@ -1,89 +1,379 @@
 import asyncio
+import cProfile
 import datetime
 import logging
 import os
+import time
 from asyncio import AbstractEventLoop
 from pathlib import Path
-from typing import Any
+from typing import Any, Sequence
 
 import hikari
 import lightbulb
 import miru
-from humanize import precisedelta
 
 from config import CONFIG
-from utils import utcnow
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="[%(asctime)s]: [ %(levelname)8s ] [ %(name)20s ] -> %(message)s",
+from models.close_requests import CloseRequestRegistry
+from models.coordination import Coordinator
+from models.guild_config import GuildConfigCache
+from models.loop_watchdog import LoopWatchdog, tag_task
+from models.members import MemberLRU
+from models.metrics import BotMetrics, MetricsServer
+from models.pipeline import AckTimings
+from models.ratelimit import LoadShedder
+from models.router import ComponentRouter
+from models.snapshot import SnapshotManager
+from models.store import TicketStore
+from models.suggestion_index import SuggestionIndex
+from models.suggestion_votes import SuggestionVotes
+from models.ticket_index import TicketIndex
+from models.timers import TimerService
+from utils import (
+    format_profile,
+    log_context,
+    max_rss_mib,
+    setup_logging,
+    utcnow,
 )
+
 logger = logging.getLogger("bot")
 
 INTENTS = (
     hikari.Intents.GUILDS
     | hikari.Intents.GUILD_MEMBERS
     | hikari.Intents.DM_MESSAGES
+    | hikari.Intents.GUILD_MESSAGE_REACTIONS
 )
 
+CACHE_COMPONENTS = (
+    hikari.api.CacheComponents.ROLES
+    | hikari.api.CacheComponents.MEMBERS
+    | hikari.api.CacheComponents.GUILDS
+    | hikari.api.CacheComponents.GUILD_CHANNELS
+    | hikari.api.CacheComponents.ME
+)
+if CONFIG.LEAN_CACHE:
+    CACHE_COMPONENTS &= ~hikari.api.CacheComponents.MEMBERS
+
 CACHE_SETTINGS = hikari.impl.CacheSettings(
-    components=(
-        hikari.api.CacheComponents.ROLES
-        | hikari.api.CacheComponents.MEMBERS
-        | hikari.api.CacheComponents.GUILDS
-        | hikari.api.CacheComponents.GUILD_CHANNELS
-        | hikari.api.CacheComponents.ME
-    ),
+    components=CACHE_COMPONENTS,
     max_messages=0,
     max_dm_channel_ids=0,
 )
 
 
+def shed_limit(burst: int, period: float) -> tuple[float, float] | None:
+    return (burst, period) if burst > 0 else None
+
+
 class Bot(lightbulb.BotApp):
-    def __init__(self, *args: Any, **kwargs: Any) -> None:
+    def __init__(
+        self,
+        *args: Any,
+        launched_at: float | None = None,
+        startup_profiler: cProfile.Profile | None = None,
+        coordinator: Coordinator | None = None,
+        metrics_port: int | None = CONFIG.METRICS_PORT,
+        snapshot_path: str | Path = CONFIG.SNAPSHOT_PATH,
+        suggestion_index_path: str | Path = CONFIG.SUGGESTION_INDEX_PATH,
+        **kwargs: Any,
+    ) -> None:
         super().__init__(*args, **kwargs)
-        self.loop: AbstractEventLoop = asyncio.get_event_loop()
+        self.loop: AbstractEventLoop = asyncio.get_running_loop()
         self._uptime: datetime.datetime = utcnow()
+        self._started_at: float = launched_at or time.perf_counter()
+        self._startup_profiler: cProfile.Profile | None = startup_profiler
         self.CWD: Path = Path(__file__).resolve().parent
         self.display_avatar_url: hikari.URL | None = None
         self.footer_text: str = "https://killfeed.xyz | DayZ++"
+        self.metrics: BotMetrics = BotMetrics()
+        self.metrics.open_tickets.callback = lambda: (((), len(self.tickets)),)
+        self.metrics.heartbeat_latency.callback = lambda: (
+            ((str(shard_id),), latency)
+            for shard_id, latency in self.heartbeat_latencies.items()
+        )
+        self.metrics_server: MetricsServer | None = (
+            MetricsServer(self.metrics, CONFIG.METRICS_HOST, metrics_port)
+            if metrics_port is not None
+            else None
+        )
+        self._command_starts: dict[int, float] = {}
+        self.ack_timings: AckTimings = AckTimings(
+            histogram=self.metrics.ack_seconds
+        )
+        self.watchdog: LoopWatchdog | None = (
+            LoopWatchdog(CONFIG.LOOP_STALL_THRESHOLD, metrics=self.metrics)
+            if CONFIG.LOOP_STALL_THRESHOLD > 0
+            else None
+        )
+        self.shedder: LoadShedder = LoadShedder(
+            user=shed_limit(CONFIG.SHED_USER_BURST, CONFIG.SHED_USER_PERIOD),
+            guild=shed_limit(
+                CONFIG.SHED_GUILD_BURST, CONFIG.SHED_GUILD_PERIOD
+            ),
+            global_=shed_limit(
+                CONFIG.SHED_GLOBAL_BURST, CONFIG.SHED_GLOBAL_PERIOD
+            ),
+        )
+        self.router: ComponentRouter = ComponentRouter(
+            self.ack_timings, self.metrics, self.shedder
+        )
+        self.tickets: TicketIndex = TicketIndex()
+        self.close_requests: CloseRequestRegistry = CloseRequestRegistry()
+        self.snapshots: SnapshotManager = SnapshotManager(
+            snapshot_path, interval=CONFIG.SNAPSHOT_INTERVAL
+        )
+        self.snapshots.register(
+            "tickets", self.tickets.snapshot, self.tickets.restore
+        )
+        self.snapshots.register(
+            "close_requests",
+            self.close_requests.snapshot,
+            self.close_requests.restore,
+        )
+        self.store: TicketStore = TicketStore(CONFIG.DATABASE_PATH)
+        self.guild_configs: GuildConfigCache = GuildConfigCache(self.store)
+        self.members: MemberLRU = MemberLRU()
+        self.suggestions: SuggestionIndex = SuggestionIndex(
+            suggestion_index_path
+        )
+        self.suggestion_votes: SuggestionVotes = SuggestionVotes(self.store)
+        self.timers: TimerService = TimerService(self.store, self.owns_guild)
+        # Only set when running as one worker of a cluster.
+        self.coordinator: Coordinator | None = coordinator
 
         miru.load(self)
 
+        self.subscribe(hikari.StartingEvent, self.on_starting)
         self.subscribe(hikari.StartedEvent, self.on_started)
         self.subscribe(hikari.StoppingEvent, self.on_stopping)
+        self.subscribe(hikari.InteractionCreateEvent, self.on_interaction)
+        self.subscribe(hikari.MemberDeleteEvent, self.on_member_delete)
+        self.subscribe(
+            lightbulb.CommandInvocationEvent, self.on_command_invocation
+        )
+        self.subscribe(
+            lightbulb.CommandCompletionEvent, self.on_command_completion
+        )
+        self.subscribe(lightbulb.CommandErrorEvent, self.on_command_error)
+        self.subscribe(
+            miru.ComponentInteractionCreateEvent, self.router.dispatch
+        )
 
         self.load_extensions_from("plugins", recursive=True)
 
     @property
     def uptime(self) -> str:
+        from humanize import precisedelta
+
         return precisedelta(
             int((self._uptime - utcnow()).total_seconds()),
             format="%0.0f",
         )
 
+    async def on_starting(self, _: hikari.StartingEvent) -> None:
+        if self.watchdog is not None:
+            self.watchdog.start()
+        await self.store.open()
+        await self.guild_configs.load()
+        await self.suggestion_votes.load()
+        # Before plugins schedule any, which would be replaced otherwise.
+        await self.timers.load()
+        # Before the shards connect, so the first interactions find tickets.
+        await self.snapshots.restore()
+        await self.suggestions.open()
+        # hikari has no request hook, so time the session it just opened.
+        self.metrics.instrument_session(self.rest._client_session)  # type: ignore
+        if self.metrics_server is not None:
+            await self.metrics_server.start()
+
     async def on_started(self, _event: hikari.StartedEvent) -> None:
         self.display_avatar_url = self.get_me().display_avatar_url
-        logger.info("Bot started successfully.")
+        self.snapshots.start()
+        self.timers.start()
+        logger.info(
+            "Bot started successfully in %.2fs "
+            "(max RSS: %s MiB, member cache: %s).",
+            time.perf_counter() - self._started_at,
+            f"{rss:.1f}" if (rss := max_rss_mib()) is not None else "n/a",
+            "lean" if CONFIG.LEAN_CACHE else "full",
+        )
+        if self._startup_profiler is not None:
+            self._startup_profiler.disable()
+            logger.info(
+                "Startup profile:\n%s", format_profile(self._startup_profiler)
+            )
+            self._startup_profiler = None
+
+    async def on_interaction(
+        self, event: hikari.InteractionCreateEvent
+    ) -> None:
+        member = getattr(event.interaction, "member", None)
+        if member is not None:
+            self.members.add(member.guild_id, member.id)
+        self.metrics.gateway_lag_seconds.observe(
+            (utcnow() - event.interaction.created_at).total_seconds()
+        )
+
+    async def invoke_application_command(
+        self, context: lightbulb.ApplicationContext
+    ) -> None:
+        with log_context(
+            interaction_id=context.interaction.id,
+            guild_id=context.guild_id,
+            handler=context.command.qualname,
+        ):
+            tag_task(f"command {context.command.qualname}")
+            await super().invoke_application_command(context)
+
+    async def on_command_invocation(
+        self, event: lightbulb.CommandInvocationEvent
+    ) -> None:
+        self._command_starts[id(event.context)] = time.perf_counter()
+
+    def _observe_command(self, context: lightbulb.Context) -> None:
+        if (start := self._command_starts.pop(id(context), None)) is None:
+            return
+        self.metrics.handler_seconds.observe(
+            time.perf_counter() - start, "command", context.command.name
+        )
+
+    async def on_command_completion(
+        self, event: lightbulb.CommandCompletionEvent
+    ) -> None:
+        self._observe_command(event.context)
+
+    async def on_command_error(
+        self, event: lightbulb.CommandErrorEvent
+    ) -> None:
+        if event.context.command is not None:
+            self.metrics.handler_errors.inc(
+                "command", event.context.command.name
+            )
+        self._observe_command(event.context)
+        # Listening here marks the error as handled, so surface it like before.
+        raise event.exception
+
+    async def on_member_delete(self, event: hikari.MemberDeleteEvent) -> None:
+        self.members.discard(event.guild_id, event.user_id)
+
+    def owns_guild(self, guild_id: int) -> bool:
+        # Whether this process runs the shard the guild's events arrive on.
+        return (
+            not self.shards
+            or hikari.snowflakes.calculate_shard_id(self, guild_id)
+            in self.shards
+        )
+
+    async def is_member(self, guild_id: int, user_id: int) -> bool:
+        if (
+            not CONFIG.LEAN_CACHE
+            and self.cache.get_member(guild_id, user_id) is not None
+        ):
+            return True
+        # Members may not be chunked yet right after a restart, so a cache
+        # miss is confirmed over REST.
+        return await self.members.contains(self.rest, guild_id, user_id)
 
     async def on_stopping(self, _: hikari.StoppedEvent) -> None:
         logger.info("Shutting the Bot down and closing DB connections.")
+        await self.snapshots.close()
+        await self.timers.close()
+        await self.suggestions.close()
+        await self.store.close()
+        if self.watchdog is not None:
+            await self.watchdog.close()
+        if self.metrics_server is not None:
+            await self.metrics_server.close()
+        for handler, (
+            count,
+            median,
+            peak,
+        ) in self.ack_timings.summary().items():
+            logger.info(
+                "Acknowledged %s %d times (median: %.3fs, max: %.3fs).",
+                handler,
+                count,
+                median,
+                peak,
+            )
         logger.info(
             "Shut the Bot down and closed all DB connections successfully."
         )
 
 
-async def run() -> None:
+def worker_path(path: str | Path, worker: int | None) -> Path:
+    # data/snapshot.json becomes data/snapshot.2.json for worker 2.
+    path = Path(path)
+    return (
+        path if worker is None else path.with_suffix(f".{worker}{path.suffix}")
+    )
+
+
+async def run(
+    *,
+    launched_at: float | None = None,
+    startup_profiler: cProfile.Profile | None = None,
+    shard_ids: Sequence[int] | None = None,
+    shard_count: int | None = None,
+    worker: int | None = None,
+) -> None:
+    listener = setup_logging(
+        CONFIG.LOG_LEVEL,
+        json_output=CONFIG.LOG_FORMAT == "json",
+        sample_rates=CONFIG.LOG_SAMPLE_RATES,
+        fields={"worker": worker} if worker is not None else None,
+    )
+    coordinator = (
+        Coordinator(CONFIG.CLUSTER_DATABASE_PATH)
+        if worker is not None
+        else None
+    )
     bot = Bot(
         prefix=CONFIG.BOT_PREFIX,
         token=CONFIG.DISCORD_BOT_TOKEN,
         help_slash_command=False,
         intents=INTENTS,
         cache_settings=CACHE_SETTINGS,
-        default_enabled_guilds=(int(os.environ["GUILD_ID"]),),
+        auto_chunk_members=not CONFIG.LEAN_CACHE,
+        default_enabled_guilds=(
+            (int(os.environ["GUILD_ID"]),)
+            if os.environ.get("GUILD_ID")
+            else ()
+        ),
         owner_ids=(int(os.environ["BOT_OWNER_ID"]),),
         delete_unbound_commands=False,
+        launched_at=launched_at,
+        startup_profiler=startup_profiler,
+        coordinator=coordinator,
+        metrics_port=(
+            CONFIG.METRICS_PORT + (worker or 0)
+            if CONFIG.METRICS_PORT is not None
+            else None
+        ),
+        snapshot_path=worker_path(CONFIG.SNAPSHOT_PATH, worker),
+        # Each worker only indexes the guilds on its own shards and is the
+        # only writer of its file.
+        suggestion_index_path=worker_path(
+            CONFIG.SUGGESTION_INDEX_PATH, worker
+        ),
     )
 
-    await bot.start()
-    bot.loop.run_forever()
+    try:
+        if coordinator is None:
+            await bot.start(shard_ids=shard_ids, shard_count=shard_count)
+        else:
+            await coordinator.open()
+            # Workers identify one after another so that together they stay
+            # within the session start concurrency of the token.
+            async with coordinator.lock(
+                "gateway:identify", ttl=60 + 10 * len(shard_ids or (0,))
+            ):
+                await bot.start(shard_ids=shard_ids, shard_count=shard_count)
+        await bot.join()
+    finally:
+        if bot.is_alive:
+            await bot.close()
+        if coordinator is not None:
+            await coordinator.close()
+        listener.stop()
@@ -0,0 +1,185 @@
+import asyncio
+import contextlib
+import datetime
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Iterator
+
+import hikari
+
+logger = logging.getLogger("category_pool")
+
+# Discord refuses to put more channels than this into one category.
+CATEGORY_CHANNEL_LIMIT = 50
+
+CategoryFactory = Callable[[], Awaitable[int]]
+
+
+class CategoryPool:
+    # The categories a guild's ticket channels live in: its configured
+    # ticket category plus overflow categories opened once that one is full.
+    # Channels are counted in memory from the index and channel events,
+    # ``allocate`` reserves a slot in the least-full category until the
+    # caller's channel exists.
+    def __init__(
+        self, primary_id: int, *, limit: int = CATEGORY_CHANNEL_LIMIT
+    ) -> None:
+        self.primary_id: int = primary_id
+        self.limit: int = limit
+        self._channels: dict[int, set[int]] = {primary_id: set()}
+        self._parents: dict[int, int] = {}
+        self._reserved: dict[int, int] = {}
+        self._opening: asyncio.Future[int] | None = None
+
+    def __contains__(self, category_id: int | None) -> bool:
+        return category_id in self._channels
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(tuple(self._channels))
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+    @property
+    def overflow_ids(self) -> tuple[int, ...]:
+        return tuple(
+            category_id
+            for category_id in self._channels
+            if category_id != self.primary_id
+        )
+
+    def load(self, category_id: int) -> int:
+        return len(self._channels.get(category_id, ())) + self._reserved.get(
+            category_id, 0
+        )
+
+    def add_category(self, category_id: int) -> None:
+        self._channels.setdefault(category_id, set())
+
+    def remove_category(self, category_id: int) -> None:
+        if category_id == self.primary_id:
+            return
+
+        for channel_id in self._channels.pop(category_id, ()):
+            self._parents.pop(channel_id, None)
+        self._reserved.pop(category_id, None)
+
+    def add(self, category_id: int | None, channel_id: int) -> None:
+        if category_id not in self._channels:
+            self.discard(channel_id)
+            return
+
+        if (previous := self._parents.get(channel_id)) != category_id:
+            if previous is not None:
+                self._channels[previous].discard(channel_id)
+            self._channels[category_id].add(channel_id)  # type: ignore
+            self._parents[channel_id] = category_id  # type: ignore
+
+    def discard(self, channel_id: int) -> int | None:
+        if (category_id := self._parents.pop(channel_id, None)) is not None:
+            self._channels[category_id].discard(channel_id)
+        return category_id
+
+    def is_idle(self, category_id: int) -> bool:
+        # An overflow category nothing lives in or is about to be put in.
+        return category_id != self.primary_id and not self.load(category_id)
+
+    def idle_overflow_ids(self) -> list[int]:
+        return [
+            category_id
+            for category_id in self.overflow_ids
+            if self.is_idle(category_id)
+        ]
+
+    def reset(
+        self,
+        category_ids: Iterable[int],
+        channels: Iterable[tuple[int, int]],
+        *,
+        since: datetime.datetime,
+    ) -> None:
+        # Swaps in a fresh listing of (category_id, channel_id) pairs, ids
+        # created while that listing was being fetched are kept.
+        def recent(id_: int) -> bool:
+            return hikari.Snowflake(id_).created_at >= since
+
+        kept = [
+            (category_id, channel_id)
+            for channel_id, category_id in self._parents.items()
+            if recent(channel_id)
+        ]
+        kept_categories = [
+            category_id
+            for category_id in self._channels
+            if recent(category_id)
+        ]
+
+        self._channels = {self.primary_id: set()}
+        self._parents = {}
+        for category_id in (*category_ids, *kept_categories):
+            self.add_category(category_id)
+        for category_id, channel_id in (*channels, *kept):
+            self.add(category_id, channel_id)
+
+    def snapshot(self) -> list[Any]:
+        return [
+            self.primary_id,
+            [
+                [category_id, list(channel_ids)]
+                for category_id, channel_ids in self._channels.items()
+            ],
+        ]
+
+    @classmethod
+    def from_snapshot(cls, row: list[Any]) -> "CategoryPool":
+        primary_id, categories = row
+        pool = cls(primary_id)
+        for category_id, channel_ids in categories:
+            pool.add_category(category_id)
+            for channel_id in channel_ids:
+                pool.add(category_id, channel_id)
+        return pool
+
+    def _least_full(self) -> int | None:
+        # The primary category wins ties so overflows drain and get removed.
+        return min(
+            (
+                category_id
+                for category_id in self._channels
+                if self.load(category_id) < self.limit
+            ),
+            key=lambda category_id: (
+                self.load(category_id),
+                category_id != self.primary_id,
+            ),
+            default=None,
+        )
+
+    @contextlib.asynccontextmanager
+    async def allocate(
+        self, open_category: CategoryFactory
+    ) -> AsyncIterator[int]:
+        while (category_id := self._least_full()) is None:
+            # Concurrent callers wait for the same new category.
+            if self._opening is None:
+                self._opening = asyncio.ensure_future(open_category())
+                self._opening.add_done_callback(self._opened)
+            await asyncio.shield(self._opening)
+
+        self._reserved[category_id] = self._reserved.get(category_id, 0) + 1
+        try:
+            yield category_id
+        finally:
+            if (reserved := self._reserved.get(category_id, 0)) > 1:
+                self._reserved[category_id] = reserved - 1
+            else:
+                self._reserved.pop(category_id, None)
+
+    def _opened(self, future: asyncio.Future[int]) -> None:
+        self._opening = None
+        if not future.cancelled() and future.exception() is None:
+            self.add_category(future.result())
+            logger.info(
+                "Opened overflow category %s, now using %d categories.",
+                future.result(),
+                len(self),
+            )
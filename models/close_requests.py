@@ -0,0 +1,88 @@
+import datetime
+from typing import Any, Callable, Iterator
+
+
+class CloseRequest:
+    __slots__ = (
+        "channel_id",
+        "guild_id",
+        "message_id",
+        "owner_id",
+        "requested_by",
+        "requested_at",
+    )
+
+    def __init__(
+        self,
+        channel_id: int,
+        guild_id: int,
+        message_id: int,
+        owner_id: int,
+        requested_by: int,
+        requested_at: datetime.datetime,
+    ) -> None:
+        self.channel_id: int = channel_id
+        self.guild_id: int = guild_id
+        self.message_id: int = message_id
+        self.owner_id: int = owner_id
+        self.requested_by: int = requested_by
+        self.requested_at: datetime.datetime = requested_at
+
+    def to_row(self) -> list[Any]:
+        return [
+            self.channel_id,
+            self.guild_id,
+            self.message_id,
+            self.owner_id,
+            self.requested_by,
+            self.requested_at.timestamp(),
+        ]
+
+    @classmethod
+    def from_row(cls, row: list[Any]) -> "CloseRequest":
+        *ids, requested_at = row
+        return cls(
+            *ids,
+            datetime.datetime.fromtimestamp(
+                requested_at, datetime.timezone.utc
+            ),
+        )
+
+
+class CloseRequestRegistry:
+    # Close-request prompts still waiting for the ticket owner, one per
+    # ticket channel.
+    def __init__(self) -> None:
+        self._requests: dict[int, CloseRequest] = {}
+
+    def __len__(self) -> int:
+        return len(self._requests)
+
+    def __contains__(self, channel_id: int) -> bool:
+        return channel_id in self._requests
+
+    def __iter__(self) -> Iterator[CloseRequest]:
+        return iter(tuple(self._requests.values()))
+
+    def get(self, channel_id: int) -> CloseRequest | None:
+        return self._requests.get(channel_id)
+
+    def add(self, request: CloseRequest) -> None:
+        self._requests[request.channel_id] = request
+
+    def remove(self, channel_id: int) -> CloseRequest | None:
+        return self._requests.pop(channel_id, None)
+
+    def retain(self, keep: Callable[[CloseRequest], bool]) -> None:
+        for request in self:
+            if not keep(request):
+                del self._requests[request.channel_id]
+
+    def snapshot(self) -> list[list[Any]]:
+        return [request.to_row() for request in self._requests.values()]
+
+    def restore(self, rows: list[list[Any]]) -> None:
+        self._requests = {
+            request.channel_id: request
+            for request in map(CloseRequest.from_row, rows)
+        }
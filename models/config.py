@@ -12,3 +12,85 @@ class Config:
         else os.environ["DISCORD_BOT_TOKEN"]
     )
     BOT_PREFIX: str = "!" if DEVELOPMENT_MODE else "!"
+    LEAN_CACHE: bool = os.environ.get("LEAN_CACHE", "").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+    LOG_LEVEL: str = os.environ.get("LOG_LEVEL", "INFO").upper()
+    # "json" for one object per line, "text" for the human readable format.
+    LOG_FORMAT: str = os.environ.get("LOG_FORMAT", "json").lower()
+    # Keep one in N records below WARNING per logger, e.g. "hikari.gateway=10".
+    LOG_SAMPLE_RATES: dict[str, int] = {
+        name.strip(): int(rate)
+        for name, _, rate in (
+            entry.partition("=")
+            for entry in os.environ.get(
+                "LOG_SAMPLE_RATES", "hikari.gateway=10,hikari.ratelimits=20"
+            ).split(",")
+            if entry.strip()
+        )
+    }
+    # Seconds the event loop may be blocked before its stack is captured,
+    # 0 turns the watchdog off.
+    LOOP_STALL_THRESHOLD: float = float(
+        os.environ.get("LOOP_STALL_THRESHOLD", "0.5")
+    )
+    DATABASE_PATH: str = os.environ.get(
+        "DATABASE_PATH", "data/tickets.sqlite3"
+    )
+    CLUSTER_DATABASE_PATH: str = os.environ.get(
+        "CLUSTER_DATABASE_PATH", "data/cluster.sqlite3"
+    )
+    SNAPSHOT_PATH: str = os.environ.get("SNAPSHOT_PATH", "data/snapshot.json")
+    SNAPSHOT_INTERVAL: float = float(os.environ.get("SNAPSHOT_INTERVAL", "60"))
+    SUGGESTION_INDEX_PATH: str = os.environ.get(
+        "SUGGESTION_INDEX_PATH", "data/suggestions.idx"
+    )
+    TICKET_CREATE_BURST: int = int(os.environ.get("TICKET_CREATE_BURST", "5"))
+    TICKET_CREATE_PERIOD: float = float(
+        os.environ.get("TICKET_CREATE_PERIOD", "10")
+    )
+    # Clicks that start a ticket or a suggestion, as a burst per period in
+    # seconds, per user, per guild and overall. Past them the Bot answers
+    # with an ephemeral "slow down", a burst of 0 lifts the limit.
+    SHED_USER_BURST: int = int(os.environ.get("SHED_USER_BURST", "3"))
+    SHED_USER_PERIOD: float = float(os.environ.get("SHED_USER_PERIOD", "10"))
+    SHED_GUILD_BURST: int = int(os.environ.get("SHED_GUILD_BURST", "30"))
+    SHED_GUILD_PERIOD: float = float(os.environ.get("SHED_GUILD_PERIOD", "10"))
+    SHED_GLOBAL_BURST: int = int(os.environ.get("SHED_GLOBAL_BURST", "200"))
+    SHED_GLOBAL_PERIOD: float = float(
+        os.environ.get("SHED_GLOBAL_PERIOD", "10")
+    )
+    # Hours a close-request waits for the Ticket owner before it expires.
+    CLOSE_REQUEST_EXPIRY_HOURS: float = float(
+        os.environ.get("CLOSE_REQUEST_EXPIRY_HOURS", "24")
+    )
+    # Hours without a message after which a Ticket is closed, 0 keeps
+    # Tickets open. The owner is pinged the reminder hours before that.
+    TICKET_INACTIVITY_HOURS: float = float(
+        os.environ.get("TICKET_INACTIVITY_HOURS", "0")
+    )
+    TICKET_REMINDER_HOURS: float = float(
+        os.environ.get("TICKET_REMINDER_HOURS", "12")
+    )
+    TICKET_WARM_POOL_MIN: int = int(
+        os.environ.get("TICKET_WARM_POOL_MIN", "0")
+    )
+    TICKET_WARM_POOL_MAX: int = int(
+        os.environ.get("TICKET_WARM_POOL_MAX", "0")
+    )
+    TRANSCRIPTS_PATH: str = os.environ.get(
+        "TRANSCRIPTS_PATH", "data/transcripts"
+    )
+    TRANSCRIPT_CHANNEL_ID: int | None = (
+        int(os.environ["TRANSCRIPT_CHANNEL_ID"])
+        if os.environ.get("TRANSCRIPT_CHANNEL_ID")
+        else None
+    )
+    METRICS_HOST: str = os.environ.get("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT: int | None = (
+        int(os.environ["METRICS_PORT"])
+        if os.environ.get("METRICS_PORT")
+        else None
+    )
@@ -0,0 +1,318 @@
+import asyncio
+import contextlib
+import datetime
+import logging
+import os
+import socket
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+logger = logging.getLogger("coordination")
+
+COORDINATION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS locks (
+    name       TEXT PRIMARY KEY,
+    owner      TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS buckets (
+    name    TEXT PRIMARY KEY,
+    tokens  REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS open_tickets (
+    guild_id   INTEGER NOT NULL,
+    owner_id   INTEGER NOT NULL,
+    channel_id INTEGER,
+    claimed_by TEXT    NOT NULL,
+    claimed_at REAL    NOT NULL,
+    PRIMARY KEY (guild_id, owner_id)
+);
+"""
+
+# How long an unfinished ticket claim blocks other processes if its owner
+# dies before binding a channel to it.
+CLAIM_TTL: float = 120.0
+
+
+class Coordinator:
+    # Cross-process state for cluster mode, kept in one SQLite file that
+    # every worker opens. Each call is a single short IMMEDIATE transaction,
+    # so the database lock is what serializes the workers.
+    def __init__(self, path: str | Path) -> None:
+        self.path: Path = Path(path)
+        self.owner: str = f"{socket.gethostname()}:{os.getpid()}"
+        self._connection: sqlite3.Connection | None = None
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="coordination"
+        )
+
+    async def _run(self, function: Any, *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, function, *args
+        )
+
+    def _connect(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            isolation_level=None,
+            timeout=30,
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(COORDINATION_SCHEMA)
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Any:
+        assert self._connection is not None
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._connection
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        else:
+            self._connection.execute("COMMIT")
+
+    async def open(self) -> None:
+        await self._run(self._connect)
+        logger.info("Joined the cluster at %s as %s.", self.path, self.owner)
+
+    async def close(self) -> None:
+        if self._connection is None:
+            return
+
+        await self._run(self._release_all)
+        await self._run(self._connection.close)
+        self._connection = None
+        self._executor.shutdown(wait=True)
+
+    def _release_all(self) -> None:
+        with self._transaction() as connection:
+            connection.execute(
+                "DELETE FROM locks WHERE owner = ?", (self.owner,)
+            )
+            connection.execute(
+                "DELETE FROM open_tickets "
+                "WHERE claimed_by = ? AND channel_id IS NULL",
+                (self.owner,),
+            )
+
+    # Leases
+
+    def _try_lock(self, name: str, ttl: float) -> bool:
+        now = time.time()
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "INSERT INTO locks (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE "
+                "SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE locks.expires_at < ? OR locks.owner = excluded.owner",
+                (name, self.owner, now + ttl, now),
+            )
+            return cursor.rowcount > 0
+
+    def _unlock(self, name: str) -> None:
+        with self._transaction() as connection:
+            connection.execute(
+                "DELETE FROM locks WHERE name = ? AND owner = ?",
+                (name, self.owner),
+            )
+
+    async def try_lock(self, name: str, ttl: float) -> bool:
+        return await self._run(self._try_lock, name, ttl)
+
+    async def unlock(self, name: str) -> None:
+        await self._run(self._unlock, name)
+
+    @contextlib.asynccontextmanager
+    async def lock(
+        self, name: str, ttl: float, *, poll: float = 0.5
+    ) -> AsyncIterator[None]:
+        while not await self.try_lock(name, ttl):
+            await asyncio.sleep(poll)
+        try:
+            yield
+        finally:
+            await self.unlock(name)
+
+    # Token buckets
+
+    def _take(
+        self, name: str, capacity: float, period: float, tokens: float
+    ) -> float:
+        now = time.time()
+        rate = capacity / period
+        with self._transaction() as connection:
+            row = connection.execute(
+                "SELECT tokens, updated FROM buckets WHERE name = ?", (name,)
+            ).fetchone()
+            available, updated = row if row is not None else (capacity, now)
+            if now > updated:
+                available = min(capacity, available + (now - updated) * rate)
+                updated = now
+
+            if updated > now or available < tokens:
+                delay = max(updated - now, 0.0) + (tokens - available) / rate
+            else:
+                available -= tokens
+                delay = 0.0
+
+            connection.execute(
+                "INSERT OR REPLACE INTO buckets (name, tokens, updated) "
+                "VALUES (?, ?, ?)",
+                (name, available, updated),
+            )
+            return delay
+
+    def _pause(self, name: str, seconds: float) -> None:
+        with self._transaction() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO buckets (name, tokens, updated) "
+                "VALUES (?, 0, ?)",
+                (name, time.time() + seconds),
+            )
+
+    async def take(
+        self, name: str, capacity: float, period: float, tokens: float = 1.0
+    ) -> float:
+        # 0 once the tokens are taken, otherwise how long to wait first.
+        return await self._run(self._take, name, capacity, period, tokens)
+
+    async def pause(self, name: str, seconds: float) -> None:
+        await self._run(self._pause, name, seconds)
+
+    # Open tickets
+
+    def _claim_ticket(
+        self, guild_id: int, owner_id: int
+    ) -> tuple[bool, int | None]:
+        now = time.time()
+        with self._transaction() as connection:
+            row = connection.execute(
+                "SELECT channel_id, claimed_by, claimed_at FROM open_tickets "
+                "WHERE guild_id = ? AND owner_id = ?",
+                (guild_id, owner_id),
+            ).fetchone()
+            if row is not None:
+                channel_id, claimed_by, claimed_at = row
+                if channel_id is not None:
+                    return False, channel_id
+                if claimed_by != self.owner and claimed_at > now - CLAIM_TTL:
+                    return False, None
+
+            connection.execute(
+                "INSERT OR REPLACE INTO open_tickets "
+                "(guild_id, owner_id, channel_id, claimed_by, claimed_at) "
+                "VALUES (?, ?, NULL, ?, ?)",
+                (guild_id, owner_id, self.owner, now),
+            )
+            return True, None
+
+    def _bind_tickets(
+        self,
+        tickets: list[tuple[int, int, int]],
+        replace: tuple[int, float] | None,
+    ) -> None:
+        now = time.time()
+        with self._transaction() as connection:
+            if replace is not None:
+                # Tickets bound after the listing was fetched are kept.
+                connection.execute(
+                    "DELETE FROM open_tickets WHERE guild_id = ? "
+                    "AND channel_id IS NOT NULL AND claimed_at < ?",
+                    replace,
+                )
+            connection.executemany(
+                "INSERT OR REPLACE INTO open_tickets "
+                "(guild_id, owner_id, channel_id, claimed_by, claimed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (guild_id, owner_id, channel_id, self.owner, now)
+                    for guild_id, owner_id, channel_id in tickets
+                ],
+            )
+
+    def _release_ticket(
+        self, guild_id: int, owner_id: int, channel_id: int | None
+    ) -> None:
+        with self._transaction() as connection:
+            connection.execute(
+                "DELETE FROM open_tickets WHERE guild_id = ? AND owner_id = ? "
+                "AND channel_id IS ?",
+                (guild_id, owner_id, channel_id),
+            )
+
+    async def claim_ticket(
+        self, guild_id: int, owner_id: int
+    ) -> tuple[bool, int | None]:
+        # (True, None) when this process may create the ticket, otherwise
+        # (False, channel_id) with the channel that is open or None while
+        # another process is still creating it.
+        return await self._run(self._claim_ticket, guild_id, owner_id)
+
+    async def bind_ticket(
+        self, guild_id: int, owner_id: int, channel_id: int
+    ) -> None:
+        await self._run(
+            self._bind_tickets, [(guild_id, owner_id, channel_id)], None
+        )
+
+    async def sync_guild(
+        self,
+        guild_id: int,
+        tickets: list[tuple[int, int]],
+        *,
+        since: datetime.datetime,
+    ) -> None:
+        # Replaces the guild's open tickets with (owner_id, channel_id) pairs
+        # read from Discord at ``since``, claims that are still pending and
+        # tickets bound after it are kept.
+        await self._run(
+            self._bind_tickets,
+            [
+                (guild_id, owner_id, channel_id)
+                for owner_id, channel_id in tickets
+            ],
+            (guild_id, since.timestamp()),
+        )
+
+    async def release_ticket(
+        self, guild_id: int, owner_id: int, channel_id: int | None = None
+    ) -> None:
+        await self._run(self._release_ticket, guild_id, owner_id, channel_id)
+
+
+class SharedBucket:
+    # A token bucket every worker in the cluster draws from.
+    def __init__(
+        self,
+        coordinator: Coordinator,
+        name: str,
+        capacity: float,
+        period: float,
+    ) -> None:
+        self.coordinator: Coordinator = coordinator
+        self.name: str = name
+        self.capacity: float = capacity
+        self.period: float = period
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        while (
+            delay := await self.coordinator.take(
+                self.name, self.capacity, self.period, tokens
+            )
+        ) > 0:
+            await asyncio.sleep(delay)
+
+    def resize(self, capacity: float, period: float) -> None:
+        self.capacity = capacity
+        self.period = period
+
+    async def pause(self, seconds: float) -> None:
+        await self.coordinator.pause(self.name, seconds)
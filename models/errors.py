@@ -0,0 +1,19 @@
+class StepSkippedError(Exception):
+    def __init__(self, step: str, dependency: str) -> None:
+        super().__init__(
+            f"Step {step!r} was skipped because {dependency!r} failed."
+        )
+        self.step: str = step
+        self.dependency: str = dependency
+
+
+class TicketClaimedError(Exception):
+    # Another process of the cluster owns this user's ticket, ``channel_id``
+    # is None while it is still being created.
+    def __init__(self, channel_id: int | None) -> None:
+        super().__init__(
+            f"The ticket is already open in {channel_id}."
+            if channel_id is not None
+            else "The ticket is being opened by another process."
+        )
+        self.channel_id: int | None = channel_id
@@ -0,0 +1,155 @@
+import logging
+import os
+from typing import Any
+
+from models.store import TicketStore
+
+logger = logging.getLogger("guild_config")
+
+# Seed values for the guild configured through the environment, which used
+# to be hard-coded for the DayZ++ server.
+LEGACY_STAFF_PING = "<@609077285584240715>"
+LEGACY_VERIFIED_ADMIN_ROLE_ID = 904037799316058112
+LEGACY_PREMIUM_ROLE_ID = 1003908285465899059
+LEGACY_SHOP_ROLE_ID = 945356446076395520
+LEGACY_SUGGESTIONS_CHANNEL_ID = 983726366283411497
+
+COLUMNS = (
+    "guild_id",
+    "ticket_category_id",
+    "support_role_id",
+    "staff_ping",
+    "verified_admin_role_id",
+    "premium_role_id",
+    "shop_role_id",
+    "suggestions_channel_id",
+)
+
+
+class GuildConfig:
+    __slots__ = COLUMNS
+
+    def __init__(
+        self,
+        guild_id: int,
+        ticket_category_id: int,
+        support_role_id: int,
+        *,
+        staff_ping: str | None = None,
+        verified_admin_role_id: int | None = None,
+        premium_role_id: int | None = None,
+        shop_role_id: int | None = None,
+        suggestions_channel_id: int | None = None,
+    ) -> None:
+        self.guild_id: int = guild_id
+        self.ticket_category_id: int = ticket_category_id
+        self.support_role_id: int = support_role_id
+        self.staff_ping: str | None = staff_ping
+        self.verified_admin_role_id: int | None = verified_admin_role_id
+        self.premium_role_id: int | None = premium_role_id
+        self.shop_role_id: int | None = shop_role_id
+        self.suggestions_channel_id: int | None = suggestions_channel_id
+
+    @classmethod
+    def from_row(cls, row: Any) -> "GuildConfig":
+        guild_id, ticket_category_id, support_role_id, *rest = (
+            row[column] for column in COLUMNS
+        )
+        return cls(
+            guild_id,
+            ticket_category_id,
+            support_role_id,
+            **dict(zip(COLUMNS[3:], rest)),
+        )
+
+    @classmethod
+    def from_environment(cls) -> "GuildConfig | None":
+        if not (
+            os.environ.get("GUILD_ID")
+            and os.environ.get("TICKET_CATEGORY_ID")
+            and os.environ.get("SUPPORT_ROLE_ID")
+        ):
+            return None
+
+        return cls(
+            int(os.environ["GUILD_ID"]),
+            int(os.environ["TICKET_CATEGORY_ID"]),
+            int(os.environ["SUPPORT_ROLE_ID"]),
+            staff_ping=LEGACY_STAFF_PING,
+            verified_admin_role_id=LEGACY_VERIFIED_ADMIN_ROLE_ID,
+            premium_role_id=LEGACY_PREMIUM_ROLE_ID,
+            shop_role_id=LEGACY_SHOP_ROLE_ID,
+            suggestions_channel_id=LEGACY_SUGGESTIONS_CHANNEL_ID,
+        )
+
+    def to_row(self) -> tuple[Any, ...]:
+        return tuple(getattr(self, column) for column in COLUMNS)
+
+    def is_priority(self, role_ids: Any) -> bool:
+        return any(
+            role_id is not None and role_id in role_ids
+            for role_id in (self.verified_admin_role_id, self.premium_role_id)
+        )
+
+
+class GuildConfigCache:
+    # Every configured guild is held in memory, interactions look theirs up
+    # with a single dict access. Writes are queued on the store and replace
+    # the cached entry, ``reload`` re-reads an entry and swaps it in.
+    def __init__(self, store: TicketStore) -> None:
+        self.store: TicketStore = store
+        self._configs: dict[int, GuildConfig] = {}
+
+    def __len__(self) -> int:
+        return len(self._configs)
+
+    def __contains__(self, guild_id: int) -> bool:
+        return guild_id in self._configs
+
+    def __iter__(self) -> Any:
+        return iter(tuple(self._configs.values()))
+
+    def get(self, guild_id: int | None) -> GuildConfig | None:
+        return self._configs.get(guild_id)  # type: ignore
+
+    async def load(self) -> None:
+        rows = await self.store.fetch(
+            f"SELECT {', '.join(COLUMNS)} FROM guild_configs"
+        )
+        self._configs = {
+            config.guild_id: config
+            for config in map(GuildConfig.from_row, rows)
+        }
+
+        if (seed := GuildConfig.from_environment()) is not None:
+            if seed.guild_id not in self._configs:
+                self.set(seed)
+
+        logger.info("Loaded the configuration of %d guilds.", len(self))
+
+    async def reload(self, guild_id: int) -> GuildConfig | None:
+        # The cached entry keeps serving interactions until the read is
+        # back, it is only dropped if its row is gone.
+        await self.store.flush()
+        rows = await self.store.fetch(
+            f"SELECT {', '.join(COLUMNS)} FROM guild_configs "
+            "WHERE guild_id = ?",
+            (guild_id,),
+        )
+        if not rows:
+            self.invalidate(guild_id)
+            return None
+
+        config = self._configs[guild_id] = GuildConfig.from_row(rows[0])
+        return config
+
+    def set(self, config: GuildConfig) -> None:
+        self.store.execute(
+            f"INSERT OR REPLACE INTO guild_configs ({', '.join(COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(COLUMNS))})",
+            config.to_row(),
+        )
+        self._configs[config.guild_id] = config
+
+    def invalidate(self, guild_id: int) -> None:
+        self._configs.pop(guild_id, None)
@@ -0,0 +1,45 @@
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class RecentIds:
+    def __init__(self, capacity: int = 4096) -> None:
+        self.capacity: int = capacity
+        self._ids: OrderedDict[int, None] = OrderedDict()
+
+    def __contains__(self, id_: int) -> bool:
+        return id_ in self._ids
+
+    def add(self, id_: int) -> bool:
+        if id_ in self._ids:
+            return False
+
+        self._ids[id_] = None
+        if len(self._ids) > self.capacity:
+            self._ids.popitem(last=False)
+        return True
+
+
+class InFlightRegistry:
+    # Coalesces concurrent runs of the same key into the first one, later
+    # callers wait on its result instead of starting another REST chain.
+    def __init__(self) -> None:
+        self._pending: dict[Hashable, asyncio.Future[Any]] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._pending
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def run(
+        self, key: Hashable, factory: Callable[[], Awaitable[Any]]
+    ) -> tuple[Any, bool]:
+        if (pending := self._pending.get(key)) is not None:
+            return await asyncio.shield(pending), False
+
+        task = asyncio.ensure_future(factory())
+        self._pending[key] = task
+        task.add_done_callback(lambda _: self._pending.pop(key, None))
+        return await asyncio.shield(task), True
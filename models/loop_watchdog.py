@@ -0,0 +1,154 @@
+import asyncio
+import collections
+import datetime
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from models.metrics import BotMetrics
+
+logger = logging.getLogger("loop_watchdog")
+
+# Stalls kept for the owner command, older ones are only in the log.
+STALL_HISTORY = 50
+
+
+def tag_task(name: str) -> None:
+    # Names the running task after the handler it runs, which is what a
+    # stall report shows for the task that blocked the loop.
+    if (task := asyncio.current_task()) is not None:
+        task.set_name(name)
+
+
+class LoopStall:
+    __slots__ = ("started_at", "task", "stack", "duration")
+
+    def __init__(
+        self, started_at: datetime.datetime, task: str | None, stack: str
+    ) -> None:
+        self.started_at: datetime.datetime = started_at
+        self.task: str | None = task
+        self.stack: str = stack
+        # Filled in once the loop runs again.
+        self.duration: float | None = None
+
+    def format(self) -> str:
+        duration = (
+            f"{self.duration:.3f}s"
+            if self.duration is not None
+            else "still blocked"
+        )
+        return (
+            f"{self.started_at.isoformat()} blocked by "
+            f"{self.task or 'a callback outside any task'} "
+            f"({duration})\n{self.stack}"
+        )
+
+
+class LoopWatchdog:
+    # A heartbeat task on the event loop stamps the time every ``interval``,
+    # a daemon thread checks the stamp. Once it is older than ``threshold``
+    # the thread captures the loop thread's stack and the name of its
+    # current task; the heartbeat measures how long the stall lasted when
+    # the loop comes back.
+    def __init__(
+        self,
+        threshold: float,
+        *,
+        interval: float | None = None,
+        capacity: int = STALL_HISTORY,
+        metrics: BotMetrics | None = None,
+    ) -> None:
+        self.threshold: float = threshold
+        self.interval: float = interval or threshold / 5
+        self.stalls: collections.deque[LoopStall] = collections.deque(
+            maxlen=capacity
+        )
+        self.metrics: BotMetrics | None = metrics
+        self._beat: float = time.monotonic()
+        self._pending: LoopStall | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._heartbeat: asyncio.Task[None] | None = None
+        self._stopped: threading.Event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopped.clear()
+        self._heartbeat = asyncio.create_task(
+            self._run_heartbeat(), name="loop-watchdog"
+        )
+        self._thread = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    async def close(self) -> None:
+        self._stopped.set()
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        if self._thread is not None:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._thread.join
+            )
+            self._thread = None
+
+    async def _run_heartbeat(self) -> None:
+        while True:
+            before = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._beat = now = time.monotonic()
+            lag = max(now - before - self.interval, 0.0)
+            if self.metrics is not None:
+                self.metrics.loop_lag_seconds.observe(lag)
+
+            if (stall := self._pending) is not None:
+                self._pending = None
+                stall.duration = lag
+                if self.metrics is not None:
+                    self.metrics.loop_stalls.inc()
+                logger.warning(
+                    "The event loop was blocked for %.3fs by %s.",
+                    lag,
+                    stall.task or "a callback outside any task",
+                )
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.interval):
+            beat = self._beat
+            if (
+                self._pending is None
+                and time.monotonic() - beat > self.threshold
+            ):
+                self._capture(beat)
+
+    def _capture(self, beat: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)  # type: ignore
+        task = asyncio.current_task(self._loop)
+        if frame is None:
+            return
+
+        stall = LoopStall(
+            datetime.datetime.now(datetime.timezone.utc),
+            task.get_name() if task is not None else None,
+            "".join(traceback.format_stack(frame)),
+        )
+        del frame
+        if self._beat != beat:
+            # The loop ran again meanwhile, so the stack is not the culprit.
+            return
+
+        self._pending = stall
+        self.stalls.append(stall)
+        logger.warning(
+            "The event loop has been blocked for over %.2fs by %s:\n%s",
+            self.threshold,
+            stall.task or "a callback outside any task",
+            stall.stack,
+        )
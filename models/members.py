@@ -0,0 +1,40 @@
+from collections import OrderedDict
+
+import hikari
+
+
+class MemberLRU:
+    # Membership answers for lean-cache mode, filled from interaction payloads
+    # instead of chunking every member of every guild.
+    def __init__(self, capacity: int = 10_000) -> None:
+        self.capacity: int = capacity
+        self._members: OrderedDict[tuple[int, int], None] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def add(self, guild_id: int, user_id: int) -> None:
+        key = (guild_id, user_id)
+        self._members[key] = None
+        self._members.move_to_end(key)
+        if len(self._members) > self.capacity:
+            self._members.popitem(last=False)
+
+    def discard(self, guild_id: int, user_id: int) -> None:
+        self._members.pop((guild_id, user_id), None)
+
+    async def contains(
+        self, rest: hikari.api.RESTClient, guild_id: int, user_id: int
+    ) -> bool:
+        key = (guild_id, user_id)
+        if key in self._members:
+            self._members.move_to_end(key)
+            return True
+
+        try:
+            await rest.fetch_member(guild_id, user_id)
+        except hikari.NotFoundError:
+            return False
+
+        self.add(guild_id, user_id)
+        return True
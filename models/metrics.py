@@ -0,0 +1,349 @@
+import asyncio
+import bisect
+import contextlib
+import logging
+import re
+import time
+import urllib.parse
+from typing import Any, Callable, Iterable, Iterator
+
+logger = logging.getLogger("metrics")
+
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+LabelValues = tuple[str, ...]
+Sample = tuple[str, str, float]
+
+_API_PREFIX = re.compile(r"^/api/v\d+")
+_SNOWFLAKE = re.compile(r"/\d{15,21}(?=/|$)")
+_TOKEN = re.compile(r"(/(?:webhooks|interactions)/\{id\})/[^/]+")
+_EMOJI = re.compile(r"(/reactions)/[^/]+")
+
+
+def rest_route(url: Any) -> str:
+    # Collapses ids, tokens and emojis so every route is a single series.
+    path = _API_PREFIX.sub("", urllib.parse.urlsplit(str(url)).path)
+    path = _SNOWFLAKE.sub("/{id}", path)
+    path = _TOKEN.sub(r"\1/{token}", path)
+    return _EMOJI.sub(r"\1/{emoji}", path)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(
+    names: tuple[str, ...],
+    values: LabelValues,
+    extra: tuple[tuple[str, str], ...] = (),
+) -> str:
+    pairs = (*zip(names, values), *extra)
+    if not pairs:
+        return ""
+    return (
+        "{"
+        + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+        + "}"
+    )
+
+
+class _Metric:
+    kind: str = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+    ) -> None:
+        self.name: str = name
+        self.documentation: str = documentation
+        self.labelnames: tuple[str, ...] = labelnames
+
+    def samples(self) -> Iterator[Sample]:
+        raise NotImplementedError
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for name, labels, value in self.samples():
+            yield f"{name}{labels} {value!r}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> Iterator[Sample]:
+        for labels, value in self._values.items():
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        *,
+        callback: (
+            Callable[[], Iterable[tuple[LabelValues, float]]] | None
+        ) = None,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.callback: (
+            Callable[[], Iterable[tuple[LabelValues, float]]] | None
+        ) = callback
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def samples(self) -> Iterator[Sample]:
+        if self.callback is not None:
+            self._values = dict(self.callback())
+        yield from super().samples()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        *,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets: tuple[float, ...] = buckets
+        # Per label set: non-cumulative bucket counts (+Inf last) and sum.
+        self._series: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        if (series := self._series.get(labels)) is None:
+            series = self._series[labels] = (
+                [0] * (len(self.buckets) + 1),
+                [0.0],
+            )
+        counts, total = series
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    @contextlib.contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def samples(self) -> Iterator[Sample]:
+        for labels, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                yield (
+                    f"{self.name}_bucket",
+                    _format_labels(
+                        self.labelnames, labels, (("le", str(bound)),)
+                    ),
+                    cumulative,
+                )
+            formatted = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum", formatted, total[0]
+            yield f"{self.name}_count", formatted, cumulative
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def add(self, metric: Any) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name!r} is already registered.")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception:
+                logger.exception("Failed to render metric %s.", metric.name)
+        return "\n".join(lines) + "\n"
+
+
+class BotMetrics(MetricsRegistry):
+    def __init__(self) -> None:
+        super().__init__()
+        self.handler_seconds: Histogram = self.add(
+            Histogram(
+                "ticketbot_handler_seconds",
+                "Time spent in component routes and slash commands.",
+                ("kind", "handler"),
+            )
+        )
+        self.handler_errors: Counter = self.add(
+            Counter(
+                "ticketbot_handler_errors_total",
+                "Component routes and slash commands that raised.",
+                ("kind", "handler"),
+            )
+        )
+        self.shed_interactions: Counter = self.add(
+            Counter(
+                "ticketbot_shed_interactions_total",
+                "Interactions turned away by the load shedder.",
+                ("handler",),
+            )
+        )
+        self.ack_seconds: Histogram = self.add(
+            Histogram(
+                "ticketbot_ack_seconds",
+                "Time from interaction creation to its first response.",
+                ("handler",),
+            )
+        )
+        self.rest_seconds: Histogram = self.add(
+            Histogram(
+                "ticketbot_rest_request_seconds",
+                "Discord REST latency per HTTP request, 429 retries included.",
+                ("method", "route"),
+            )
+        )
+        self.rest_rate_limited: Counter = self.add(
+            Counter(
+                "ticketbot_rest_rate_limited_total",
+                "Discord REST responses with status 429.",
+                ("method", "route"),
+            )
+        )
+        self.gateway_lag_seconds: Histogram = self.add(
+            Histogram(
+                "ticketbot_gateway_event_lag_seconds",
+                "Time from interaction creation until the gateway event "
+                "reached the bot.",
+            )
+        )
+        self.heartbeat_latency: Gauge = self.add(
+            Gauge(
+                "ticketbot_gateway_heartbeat_latency_seconds",
+                "Last heartbeat round trip per shard.",
+                ("shard",),
+            )
+        )
+        self.loop_lag_seconds: Histogram = self.add(
+            Histogram(
+                "ticketbot_event_loop_lag_seconds",
+                "How late the event loop heartbeat woke up.",
+            )
+        )
+        self.loop_stalls: Counter = self.add(
+            Counter(
+                "ticketbot_event_loop_stalls_total",
+                "Times the event loop was blocked past the stall threshold.",
+            )
+        )
+        self.open_tickets: Gauge = self.add(
+            Gauge("ticketbot_open_tickets", "Ticket channels currently open.")
+        )
+
+    def instrument_session(self, session: Any) -> None:
+        request = session.request
+
+        async def timed_request(method: str, url: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            response = await request(method, url, **kwargs)
+            route = rest_route(url)
+            self.rest_seconds.observe(
+                time.perf_counter() - start, method, route
+            )
+            if response.status == 429:
+                self.rest_rate_limited.inc(method, route)
+            return response
+
+        session.request = timed_request
+
+
+class MetricsServer:
+    # Just enough HTTP/1.0 to answer a Prometheus scrape of /metrics.
+    def __init__(
+        self, registry: MetricsRegistry, host: str, port: int
+    ) -> None:
+        self.registry: MetricsRegistry = registry
+        self.host: str = host
+        self.port: int = port
+        self._server: asyncio.base_events.Server | None = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port
+        )
+        logger.info(
+            "Serving metrics on http://%s:%d/metrics.", self.host, self.port
+        )
+
+    async def close(self) -> None:
+        if self._server is None:
+            return
+
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 5)
+            while (await asyncio.wait_for(reader.readline(), 5)).strip():
+                pass
+
+            method, path = (request_line.decode("latin-1").split() + ["", ""])[
+                :2
+            ]
+            if method == "GET" and path.split("?")[0] == "/metrics":
+                status = "200 OK"
+                body = self.registry.render().encode()
+            else:
+                status = "404 Not Found"
+                body = b"Not Found\n"
+
+            writer.write(
+                f"HTTP/1.0 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,55 @@
+import logging
+import statistics
+from collections import deque
+
+import hikari
+
+from models.metrics import Histogram
+from utils import utcnow
+
+logger = logging.getLogger("pipeline")
+
+ACK_DEADLINE: float = 3.0
+ACK_WARNING_THRESHOLD: float = 2.0
+
+
+class AckTimings:
+    def __init__(
+        self, max_samples: int = 512, histogram: Histogram | None = None
+    ) -> None:
+        self.max_samples: int = max_samples
+        self.histogram: Histogram | None = histogram
+        self._samples: dict[str, deque[float]] = {}
+
+    def record(self, handler: str, seconds: float) -> None:
+        if (samples := self._samples.get(handler)) is None:
+            samples = self._samples[handler] = deque(maxlen=self.max_samples)
+        samples.append(seconds)
+        if self.histogram is not None:
+            self.histogram.observe(seconds, handler)
+
+        if seconds >= ACK_WARNING_THRESHOLD:
+            logger.warning(
+                "Acknowledged %s after %.2fs (deadline: %.0fs).",
+                handler,
+                seconds,
+                ACK_DEADLINE,
+            )
+
+    def observe(
+        self, handler: str, interaction: hikari.PartialInteraction
+    ) -> None:
+        self.record(
+            handler, (utcnow() - interaction.created_at).total_seconds()
+        )
+
+    def summary(self) -> dict[str, tuple[int, float, float]]:
+        return {
+            handler: (
+                len(samples),
+                statistics.median(samples),
+                max(samples),
+            )
+            for handler, samples in self._samples.items()
+            if samples
+        }
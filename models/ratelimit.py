@@ -0,0 +1,139 @@
+import time
+from typing import Hashable
+
+
+class TokenBucket:
+    __slots__ = ("capacity", "period", "tokens", "updated")
+
+    def __init__(self, capacity: float, period: float) -> None:
+        self.capacity: float = capacity
+        self.period: float = period
+        self.tokens: float = capacity
+        self.updated: float = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+
+    def delay(self, tokens: float = 1.0) -> float:
+        now = time.monotonic()
+        self._refill(now)
+        if self.updated > now:
+            return (
+                self.updated - now + max(0.0, tokens - self.tokens) / self.rate
+            )
+        return max(0.0, tokens - self.tokens) / self.rate
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        if self.delay(tokens) > 0:
+            return False
+        self.tokens -= tokens
+        return True
+
+    def resize(self, capacity: float, period: float) -> None:
+        self.tokens = min(self.tokens, capacity)
+        self.capacity = capacity
+        self.period = period
+
+    def pause(self, seconds: float) -> None:
+        self.tokens = 0.0
+        self.updated = max(self.updated, time.monotonic() + seconds)
+
+
+class KeyedTokenBucket:
+    # One token bucket per key, each stored as a single float: the time its
+    # bucket is full again. A bucket is full at most ``period`` after its
+    # last use, so entries live in two generations that rotate every
+    # ``period`` and whatever went unused for a whole generation is
+    # dropped; memory stays bounded by the keys seen in the last two
+    # periods.
+    def __init__(self, capacity: float, period: float) -> None:
+        self.capacity: float = capacity
+        self.period: float = period
+        self.interval: float = period / capacity
+        self._current: dict[Hashable, float] = {}
+        self._previous: dict[Hashable, float] = {}
+        self._rotated: float = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._current) + len(self._previous)
+
+    def _full_at(self, key: Hashable, now: float) -> float:
+        full_at = self._current.get(key)
+        if full_at is None:
+            full_at = self._previous.get(key, now)
+        return max(full_at, now)
+
+    def delay(self, key: Hashable, now: float | None = None) -> float:
+        now = time.monotonic() if now is None else now
+        return max(
+            self._full_at(key, now) + self.interval - now - self.period, 0.0
+        )
+
+    def take(self, key: Hashable, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        if now - self._rotated >= self.period:
+            self._previous, self._current = self._current, {}
+            self._rotated = now
+        self._current[key] = self._full_at(key, now) + self.interval
+        self._previous.pop(key, None)
+
+
+class LoadShedder:
+    # Admits an interaction only while the user's, the guild's and the
+    # global bucket all have a token, and takes one from each. A limit of
+    # None leaves that scope unlimited.
+    def __init__(
+        self,
+        *,
+        user: tuple[float, float] | None = None,
+        guild: tuple[float, float] | None = None,
+        global_: tuple[float, float] | None = None,
+    ) -> None:
+        self.user: KeyedTokenBucket | None = (
+            KeyedTokenBucket(*user) if user is not None else None
+        )
+        self.guild: KeyedTokenBucket | None = (
+            KeyedTokenBucket(*guild) if guild is not None else None
+        )
+        self.global_: KeyedTokenBucket | None = (
+            KeyedTokenBucket(*global_) if global_ is not None else None
+        )
+
+    def __len__(self) -> int:
+        return sum(
+            len(bucket)
+            for bucket in (self.user, self.guild, self.global_)
+            if bucket is not None
+        )
+
+    def check(self, guild_id: int | None, user_id: int) -> float:
+        # 0 once admitted, otherwise how long until it would be.
+        now = time.monotonic()
+        scopes = tuple(
+            (bucket, key)
+            for bucket, key in (
+                (self.user, user_id),
+                (self.guild, guild_id),
+                (self.global_, None),
+            )
+            if bucket is not None
+        )
+        if (
+            delay := max(
+                (bucket.delay(key, now) for bucket, key in scopes),
+                default=0.0,
+            )
+        ) > 0:
+            return delay
+
+        for bucket, key in scopes:
+            bucket.take(key, now)
+        return 0.0
@@ -0,0 +1,247 @@
+import contextlib
+import math
+import re
+import time
+from typing import Any, Awaitable, Callable
+
+import hikari
+import miru
+
+from models.inflight import RecentIds
+from models.loop_watchdog import tag_task
+from models.metrics import BotMetrics
+from models.pipeline import AckTimings
+from models.ratelimit import LoadShedder
+from utils import log_context
+
+RouteCallback = Callable[..., Awaitable[None]]
+
+FAILURE_MESSAGE = "**Something went wrong, please try again later.**"
+SHED_MESSAGE = "**Slow down, please try again in {seconds}s.**"
+
+CONVERTERS: dict[str, Callable[[str], Any]] = {"str": str, "int": int}
+
+_SEGMENT_SEPARATOR = re.compile(r":(?![^{]*})")
+
+
+def _split_pattern(pattern: str) -> list[str]:
+    return _SEGMENT_SEPARATOR.split(pattern)
+
+
+class Route:
+    __slots__ = ("pattern", "callback", "params", "defer", "flags", "shed")
+
+    def __init__(
+        self,
+        pattern: str,
+        callback: RouteCallback,
+        *,
+        defer: hikari.ResponseType | None = None,
+        flags: hikari.UndefinedOr[hikari.MessageFlag] = hikari.UNDEFINED,
+        shed: bool = False,
+    ) -> None:
+        self.pattern: str = pattern
+        self.callback: RouteCallback = callback
+        self.defer: hikari.ResponseType | None = defer
+        self.flags: hikari.UndefinedOr[hikari.MessageFlag] = flags
+        # Whether the router's load shedder may turn the interaction away.
+        self.shed: bool = shed
+        self.params: tuple[str, ...] = tuple(
+            segment[1:-1].partition(":")[0]
+            for segment in _split_pattern(pattern)
+            if segment.startswith("{")
+        )
+
+
+class _Node:
+    __slots__ = ("children", "param", "converter", "route")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _Node] = {}
+        self.param: _Node | None = None
+        self.converter: Callable[[str], Any] = str
+        self.route: Route | None = None
+
+
+class ComponentRouter:
+    # Patterns are ":"-separated segments, e.g. "TICKET:CLOSE:{channel_id:int}".
+    # Static segments win over parameters, which are passed as kwargs.
+    # Routes with a ``defer`` response type are acknowledged before the
+    # callback runs, so slow REST work never misses the 3 second window.
+    # Routes marked ``shed`` are checked against the load shedder first and
+    # answered with an ephemeral "slow down" when it is out of tokens.
+    def __init__(
+        self,
+        ack_timings: AckTimings | None = None,
+        metrics: BotMetrics | None = None,
+        shedder: LoadShedder | None = None,
+    ) -> None:
+        self._root: _Node = _Node()
+        self._routes: dict[str, Route] = {}
+        self.ack_timings: AckTimings | None = ack_timings
+        self.metrics: BotMetrics | None = metrics
+        self.shedder: LoadShedder | None = shedder
+        self._seen: RecentIds = RecentIds()
+
+    @property
+    def routes(self) -> tuple[Route, ...]:
+        return tuple(self._routes.values())
+
+    def route(
+        self,
+        pattern: str,
+        *,
+        defer: hikari.ResponseType | None = None,
+        flags: hikari.UndefinedOr[hikari.MessageFlag] = hikari.UNDEFINED,
+        shed: bool = False,
+    ) -> Callable[[RouteCallback], RouteCallback]:
+        def decorator(callback: RouteCallback) -> RouteCallback:
+            self.add_route(
+                Route(pattern, callback, defer=defer, flags=flags, shed=shed)
+            )
+            return callback
+
+        return decorator
+
+    def add_route(self, route: Route) -> None:
+        if route.pattern in self._routes:
+            raise ValueError(f"Route {route.pattern!r} is already registered.")
+
+        node = self._root
+        for segment in _split_pattern(route.pattern):
+            if segment.startswith("{") and segment.endswith("}"):
+                _, _, converter = segment[1:-1].partition(":")
+                if node.param is None:
+                    node.param = _Node()
+                    node.param.converter = CONVERTERS[converter or "str"]
+                node = node.param
+            else:
+                node = node.children.setdefault(segment, _Node())
+
+        node.route = route
+        self._routes[route.pattern] = route
+
+    def remove_route(self, pattern: str) -> None:
+        route = self._routes.pop(pattern)
+
+        node = self._root
+        for segment in _split_pattern(route.pattern):
+            node = (
+                node.param  # type: ignore
+                if segment.startswith("{") and segment.endswith("}")
+                else node.children[segment]
+            )
+        node.route = None
+
+    def include(self, router: "ComponentRouter") -> None:
+        for route in router.routes:
+            self.add_route(route)
+
+    def exclude(self, router: "ComponentRouter") -> None:
+        for route in router.routes:
+            self.remove_route(route.pattern)
+
+    def resolve(self, custom_id: str) -> tuple[Route, list[Any]] | None:
+        node = self._root
+        values: list[Any] = []
+        for segment in custom_id.split(":"):
+            if (child := node.children.get(segment)) is not None:
+                node = child
+            elif node.param is not None:
+                try:
+                    values.append(node.param.converter(segment))
+                except ValueError:
+                    return None
+                node = node.param
+            else:
+                return None
+
+        if node.route is None:
+            return None
+        return node.route, values
+
+    async def dispatch(
+        self, event: miru.ComponentInteractionCreateEvent
+    ) -> None:
+        if (resolved := self.resolve(event.custom_id)) is None:
+            return
+
+        if not self._seen.add(event.interaction.id):
+            return
+
+        route, values = resolved
+        if (
+            route.shed
+            and self.shedder is not None
+            and (
+                retry_after := self.shedder.check(
+                    event.guild_id, event.user.id
+                )
+            )
+            > 0
+        ):
+            await self._shed(event.interaction, route, retry_after)
+            return
+
+        with log_context(
+            interaction_id=event.interaction.id,
+            guild_id=event.guild_id,
+            handler=route.pattern,
+        ):
+            tag_task(f"component {route.pattern}")
+            await self._invoke(event, route, values)
+
+    async def _invoke(
+        self,
+        event: miru.ComponentInteractionCreateEvent,
+        route: Route,
+        values: list[Any],
+    ) -> None:
+        start = time.perf_counter()
+        if route.defer is not None:
+            await event.interaction.create_initial_response(
+                route.defer, flags=route.flags
+            )
+            if self.ack_timings is not None:
+                self.ack_timings.observe(route.pattern, event.interaction)
+
+        try:
+            await route.callback(event, **dict(zip(route.params, values)))
+        except Exception:
+            if self.metrics is not None:
+                self.metrics.handler_errors.inc("component", route.pattern)
+            if route.defer is not None:
+                with contextlib.suppress(hikari.HikariError):
+                    await self._report_failure(event.interaction, route)
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.handler_seconds.observe(
+                    time.perf_counter() - start, "component", route.pattern
+                )
+
+    async def _shed(
+        self,
+        interaction: hikari.ComponentInteraction,
+        route: Route,
+        retry_after: float,
+    ) -> None:
+        if self.metrics is not None:
+            self.metrics.shed_interactions.inc(route.pattern)
+        with contextlib.suppress(hikari.HikariError):
+            await interaction.create_initial_response(
+                hikari.ResponseType.MESSAGE_CREATE,
+                SHED_MESSAGE.format(seconds=math.ceil(retry_after)),
+                flags=hikari.MessageFlag.EPHEMERAL,
+            )
+
+    @staticmethod
+    async def _report_failure(
+        interaction: hikari.ComponentInteraction, route: Route
+    ) -> None:
+        if route.defer is hikari.ResponseType.DEFERRED_MESSAGE_CREATE:
+            await interaction.edit_initial_response(FAILURE_MESSAGE)
+        else:
+            await interaction.execute(
+                FAILURE_MESSAGE, flags=hikari.MessageFlag.EPHEMERAL
+            )
@@ -0,0 +1,178 @@
+import asyncio
+import contextvars
+import enum
+import heapq
+import itertools
+import logging
+from typing import Any, Awaitable, Callable
+
+import hikari
+
+from models.coordination import SharedBucket
+from models.ratelimit import TokenBucket
+
+logger = logging.getLogger("scheduler")
+
+JobFactory = Callable[[], Awaitable[Any]]
+
+
+class Lane(enum.IntEnum):
+    PRIORITY = 0
+    NORMAL = 1
+    BACKGROUND = 2
+
+
+class _Job:
+    __slots__ = ("factory", "future", "attempts", "context")
+
+    def __init__(
+        self, factory: JobFactory, future: asyncio.Future[Any]
+    ) -> None:
+        self.factory: JobFactory = factory
+        self.future: asyncio.Future[Any] = future
+        self.attempts: int = 0
+        # The submitter's context, so the job logs with its fields.
+        self.context: contextvars.Context = contextvars.copy_context()
+
+
+class TicketScheduler:
+    # Paces a rate-limited REST route through a local token bucket so queued
+    # callers wait here, in lane order, instead of in hikari's 429 retries.
+    # In cluster mode ``shared`` additionally paces every worker together.
+    def __init__(
+        self,
+        bucket: TokenBucket,
+        *,
+        max_concurrency: int = 4,
+        max_attempts: int = 2,
+    ) -> None:
+        self.bucket: TokenBucket = bucket
+        self.shared: SharedBucket | None = None
+        self.max_attempts: int = max_attempts
+        self._queue: list[tuple[int, int, _Job]] = []
+        self._counter = itertools.count()
+        # Retries rank below every counter above, in the order they failed.
+        self._retries = itertools.count(-(1 << 62))
+        self._wakeup: asyncio.Event = asyncio.Event()
+        self._slots: asyncio.Semaphore = asyncio.Semaphore(max_concurrency)
+        self._running: set[asyncio.Task[None]] = set()
+        self._worker: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def submit(
+        self, factory: JobFactory, lane: Lane = Lane.NORMAL
+    ) -> tuple[asyncio.Future[Any], int]:
+        job = _Job(factory, asyncio.get_running_loop().create_future())
+        entry = (lane.value, next(self._counter), job)
+        # 0 if the job starts right away, its place in the line otherwise.
+        ahead = sum(1 for queued in self._queue if queued[:2] < entry[:2])
+        position = ahead + 1 if self.bucket.delay(ahead + 1) > 0 else 0
+
+        heapq.heappush(self._queue, entry)
+        self._wakeup.set()
+        self.start()
+
+        return job.future, position
+
+    def start(self) -> None:
+        if self._worker is None:
+            # A fresh context, the worker outlives the handler starting it.
+            self._worker = asyncio.create_task(
+                self._work(), context=contextvars.Context()
+            )
+
+    async def close(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+        for *_, job in self._queue:
+            job.future.cancel()
+        self._queue.clear()
+
+    async def _work(self) -> None:
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            await self._slots.acquire()
+            # Cancelled jobs are dropped before they can spend a token.
+            self._drop_done()
+            if not self._queue:
+                self._slots.release()
+                continue
+
+            while (delay := self.bucket.delay()) > 0:
+                await asyncio.sleep(delay)
+
+            self._drop_done()
+            if not self._queue or not self.bucket.try_acquire():
+                self._slots.release()
+                continue
+
+            # The job is held while the cluster-wide token is taken last, so
+            # that token is only spent on a job that is about to run.
+            entry = heapq.heappop(self._queue)
+            if self.shared is not None:
+                try:
+                    await self.shared.acquire()
+                except BaseException:
+                    heapq.heappush(self._queue, entry)
+                    raise
+
+            job = entry[2]
+            if job.future.done():
+                # Cancelled meanwhile, its tokens go to the next job.
+                self._drop_done()
+                if not self._queue:
+                    self._slots.release()
+                    continue
+                _, _, job = heapq.heappop(self._queue)
+
+            task = asyncio.create_task(self._execute(job), context=job.context)
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    def _drop_done(self) -> None:
+        while self._queue and self._queue[0][2].future.done():
+            heapq.heappop(self._queue)
+
+    async def _execute(self, job: _Job) -> None:
+        job.attempts += 1
+        try:
+            result = await job.factory()
+        except hikari.RateLimitTooLongError as error:
+            logger.warning(
+                "Hit the %s bucket (%d per %.0fs), pausing for %.1fs.",
+                error.route,
+                error.limit,
+                error.period,
+                error.retry_after,
+            )
+            self.bucket.resize(error.limit, error.period)
+            self.bucket.pause(error.retry_after)
+            if self.shared is not None:
+                self.shared.resize(error.limit, error.period)
+                await self.shared.pause(error.retry_after)
+            if job.attempts < self.max_attempts and not job.future.done():
+                # The retry goes ahead of every queued job, priority ones
+                # included, and behind retries that failed before it.
+                heapq.heappush(
+                    self._queue,
+                    (Lane.PRIORITY.value, next(self._retries), job),
+                )
+                self._wakeup.set()
+            elif not job.future.done():
+                job.future.set_exception(error)
+        except Exception as error:
+            if not job.future.done():
+                job.future.set_exception(error)
+        else:
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self._slots.release()
@@ -0,0 +1,130 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+logger = logging.getLogger("snapshot")
+
+SNAPSHOT_VERSION = 1
+
+Dump = Callable[[], Any]
+Restore = Callable[[Any], None]
+
+
+class SnapshotManager:
+    # Periodically writes the registered in-memory state to one JSON file so
+    # a restart can serve interactions before every guild is re-indexed.
+    # Sections are dumped on the event loop, encoding and the atomic
+    # replace of the file happen in a worker thread.
+    def __init__(self, path: str | Path, *, interval: float) -> None:
+        self.path: Path = Path(path)
+        self.interval: float = interval
+        self.restored: bool = False
+        self._sections: dict[str, tuple[Dump, Restore]] = {}
+        self._timer: asyncio.Task[None] | None = None
+
+    def register(self, name: str, dump: Dump, restore: Restore) -> None:
+        self._sections[name] = (dump, restore)
+
+    def _write_file(self, snapshot: dict[str, Any]) -> int:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = json.dumps(snapshot, separators=(",", ":")).encode()
+        temporary = self.path.with_name(f"{self.path.name}.tmp")
+        temporary.write_bytes(payload)
+        os.replace(temporary, self.path)
+        return len(payload)
+
+    def _read_file(self) -> dict[str, Any] | None:
+        try:
+            return json.loads(self.path.read_bytes())
+        except FileNotFoundError:
+            return None
+
+    async def write(self) -> None:
+        start = time.perf_counter()
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "written_at": time.time(),
+            "sections": {
+                name: dump() for name, (dump, _) in self._sections.items()
+            },
+        }
+        size = await asyncio.get_running_loop().run_in_executor(
+            None, self._write_file, snapshot
+        )
+        logger.debug(
+            "Wrote a %d byte snapshot in %.3fs.",
+            size,
+            time.perf_counter() - start,
+        )
+
+    async def restore(self) -> bool:
+        start = time.perf_counter()
+        try:
+            snapshot = await asyncio.get_running_loop().run_in_executor(
+                None, self._read_file
+            )
+        except (OSError, ValueError):
+            logger.exception("Failed to read the snapshot at %s.", self.path)
+            return False
+
+        if snapshot is None:
+            return False
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            logger.warning(
+                "Ignoring the snapshot at %s, it has version %s.",
+                self.path,
+                snapshot.get("version"),
+            )
+            return False
+
+        sections = snapshot["sections"]
+        applied: list[tuple[Restore, Any]] = []
+        for name, (dump, restore) in self._sections.items():
+            if name not in sections:
+                continue
+            applied.append((restore, dump()))
+            try:
+                restore(sections[name])
+            except Exception:
+                logger.exception("Failed to restore the %r snapshot.", name)
+                # Half a snapshot is worse than none, so every section,
+                # the failed one included, goes back to its prior state.
+                for undo, previous in reversed(applied):
+                    undo(previous)
+                return False
+
+        self.restored = True
+        logger.info(
+            "Restored a %.0fs old snapshot in %.3fs.",
+            time.time() - snapshot["written_at"],
+            time.perf_counter() - start,
+        )
+        return True
+
+    def start(self) -> None:
+        if self._timer is None and self.interval > 0:
+            self._timer = asyncio.create_task(self._write_periodically())
+
+    async def close(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        try:
+            await self.write()
+        except Exception:
+            logger.exception("Failed to write the snapshot at %s.", self.path)
+
+    async def _write_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.write()
+            except Exception:
+                logger.exception(
+                    "Failed to write the snapshot at %s.", self.path
+                )
@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Iterable
+
+from models.ticket_index import Ticket
+from utils import utcnow
+
+logger = logging.getLogger("store")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    channel_id  INTEGER PRIMARY KEY,
+    guild_id    INTEGER NOT NULL,
+    owner_id    INTEGER NOT NULL,
+    category_id INTEGER NOT NULL,
+    category    TEXT,
+    status      TEXT    NOT NULL DEFAULT 'open',
+    opened_at   REAL    NOT NULL,
+    closed_by   INTEGER,
+    closed_at   REAL
+);
+CREATE INDEX IF NOT EXISTS tickets_by_owner
+    ON tickets (guild_id, owner_id, status);
+CREATE TABLE IF NOT EXISTS guild_configs (
+    guild_id               INTEGER PRIMARY KEY,
+    ticket_category_id     INTEGER NOT NULL,
+    support_role_id        INTEGER NOT NULL,
+    staff_ping             TEXT,
+    verified_admin_role_id INTEGER,
+    premium_role_id        INTEGER,
+    shop_role_id           INTEGER,
+    suggestions_channel_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS overflow_categories (
+    category_id INTEGER PRIMARY KEY,
+    guild_id    INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS suggestion_votes (
+    message_id INTEGER PRIMARY KEY,
+    channel_id INTEGER NOT NULL,
+    guild_id   INTEGER NOT NULL,
+    upvotes    INTEGER NOT NULL DEFAULT 0,
+    downvotes  INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS timers (
+    kind     TEXT    NOT NULL,
+    key      INTEGER NOT NULL,
+    guild_id INTEGER NOT NULL,
+    due      REAL    NOT NULL,
+    payload  TEXT,
+    PRIMARY KEY (kind, key)
+);
+"""
+
+Statement = tuple[str, tuple[Any, ...]]
+
+
+class TicketStore:
+    def __init__(self, path: str | Path, *, batch_size: int = 256) -> None:
+        self.path: Path = Path(path)
+        self.batch_size: int = batch_size
+        self._connection: sqlite3.Connection | None = None
+        self._queue: asyncio.Queue[Statement] = asyncio.Queue()
+        self._writer: asyncio.Task[None] | None = None
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="ticket-store"
+        )
+
+    async def _run(self, function: Any, *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, function, *args
+        )
+
+    def _connect(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+
+    def _write_batch(self, batch: list[Statement]) -> None:
+        assert self._connection is not None
+        with self._connection:
+            self._connection.execute("BEGIN")
+            for sql, parameters in batch:
+                self._connection.execute(sql, parameters)
+
+    def _fetch(
+        self, sql: str, parameters: tuple[Any, ...]
+    ) -> list[sqlite3.Row]:
+        assert self._connection is not None
+        return self._connection.execute(sql, parameters).fetchall()
+
+    async def open(self) -> None:
+        await self._run(self._connect)
+        self._writer = asyncio.create_task(self._write_behind())
+        logger.info("Opened the Ticket Store at %s.", self.path)
+
+    async def close(self) -> None:
+        if self._writer is None:
+            return
+
+        await self._queue.join()
+        self._writer.cancel()
+        self._writer = None
+
+        await self._run(self._connection.close)  # type: ignore
+        self._executor.shutdown(wait=True)
+        logger.info("Closed the Ticket Store.")
+
+    async def flush(self) -> None:
+        await self._queue.join()
+
+    async def _write_behind(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                await self._run(self._write_batch, batch)
+            except Exception:
+                logger.exception(
+                    "Failed to write a batch of %d statements.", len(batch)
+                )
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def execute(self, sql: str, parameters: Iterable[Any] = ()) -> None:
+        self._queue.put_nowait((sql, tuple(parameters)))
+
+    async def fetch(
+        self, sql: str, parameters: Iterable[Any] = ()
+    ) -> list[sqlite3.Row]:
+        return await self._run(self._fetch, sql, tuple(parameters))
+
+    def record_open(self, ticket: Ticket, category: str | None = None) -> None:
+        self.execute(
+            "INSERT OR REPLACE INTO tickets "
+            "(channel_id, guild_id, owner_id, category_id, category, opened_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                ticket.channel_id,
+                ticket.guild_id,
+                ticket.owner_id,
+                ticket.category_id,
+                category,
+                ticket.opened_at.timestamp(),
+            ),
+        )
+
+    def record_close(
+        self, channel_id: int, user_id: int | None = None
+    ) -> None:
+        self.execute(
+            "UPDATE tickets SET status = 'closed', closed_by = ?, closed_at = ? "
+            "WHERE channel_id = ? AND status = 'open'",
+            (user_id, utcnow().timestamp(), channel_id),
+        )
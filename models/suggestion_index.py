@@ -0,0 +1,314 @@
+import asyncio
+import bisect
+import logging
+import random
+import re
+import struct
+import time
+import zlib
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable
+
+logger = logging.getLogger("suggestion_index")
+
+# MinHash permutations, split into bands of rows for LSH. Two suggestions
+# share a band bucket with high probability once their estimated Jaccard
+# similarity passes (1 / BANDS) ** (1 / ROWS), roughly 0.59.
+NUM_PERM = 32
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+DUPLICATE_THRESHOLD = 0.6
+# Batches larger than this re-sort the bands instead of inserting into them.
+BULK_INSERT_SIZE = 256
+
+_PRIME = (1 << 61) - 1
+_MASK = 0xFFFFFFFF
+# Fixed so signatures written by earlier runs stay comparable.
+_random = random.Random(0x5EED)
+_PERMUTATIONS: tuple[tuple[int, int], ...] = tuple(
+    (_random.randrange(1, _PRIME), _random.randrange(0, _PRIME))
+    for _ in range(NUM_PERM)
+)
+_WORD = re.compile(r"\w+")
+
+# channel_id, message_id, then the signature.
+_RECORD = struct.Struct(f"<QQ{NUM_PERM}I")
+
+
+def suggestion_shingles(text: str) -> set[int]:
+    words = _WORD.findall(text.lower())
+    if len(words) < 2:
+        grams = words
+    else:
+        grams = [
+            f"{first} {second}" for first, second in zip(words, words[1:])
+        ]
+    return {zlib.crc32(gram.encode()) for gram in grams}
+
+
+def suggestion_signature(text: str) -> array | None:
+    if not (hashes := suggestion_shingles(text)):
+        return None
+    return array(
+        "I",
+        [
+            min((a * value + b) % _PRIME for value in hashes) & _MASK
+            for a, b in _PERMUTATIONS
+        ],
+    )
+
+
+class SuggestionMatch:
+    __slots__ = ("channel_id", "message_id", "similarity")
+
+    def __init__(
+        self, channel_id: int, message_id: int, similarity: float
+    ) -> None:
+        self.channel_id: int = channel_id
+        self.message_id: int = message_id
+        self.similarity: float = similarity
+
+
+class SuggestionIndex:
+    # MinHash LSH over word shingles of every posted suggestion. Signatures
+    # and ids live in flat arrays and each band is a sorted array of bucket
+    # keys, so a few hundred thousand suggestions stay in the tens of MiB.
+    # New suggestions are appended to a file of fixed-size records that is
+    # read back, off the event loop, on start.
+    def __init__(
+        self, path: str | Path, *, threshold: float = DUPLICATE_THRESHOLD
+    ) -> None:
+        self.path: Path = Path(path)
+        self.threshold: float = threshold
+        self.ready: bool = False
+        self._channel_ids: array = array("Q")
+        self._message_ids: array = array("Q")
+        # Sorted copy of the message ids, to skip suggestions indexed twice.
+        self._sorted_ids: array = array("Q")
+        self._signatures: array = array("I")
+        self._band_keys: list[array] = [array("q") for _ in range(BANDS)]
+        self._band_positions: list[array] = [array("I") for _ in range(BANDS)]
+        self._backlog: list[tuple[int, int, array]] = []
+        self._loader: asyncio.Task[None] | None = None
+        # One thread, so appends queued while loading land after the read.
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="suggestion-index"
+        )
+
+    def __len__(self) -> int:
+        return len(self._message_ids)
+
+    def __contains__(self, message_id: int) -> bool:
+        index = bisect.bisect_left(self._sorted_ids, message_id)
+        return (
+            index < len(self._sorted_ids)
+            and self._sorted_ids[index] == message_id
+        )
+
+    def message_ids(self, channel_id: int) -> set[int]:
+        return {
+            message_id
+            for position, message_id in enumerate(self._message_ids)
+            if self._channel_ids[position] == channel_id
+        }
+
+    @staticmethod
+    def _band_key(
+        channel_id: int, signatures: array, band: int, offset: int = 0
+    ) -> int:
+        start = offset + band * ROWS
+        return hash((channel_id, band, *signatures[start : start + ROWS]))
+
+    def _append_record(
+        self, channel_id: int, message_id: int, values: Iterable[int]
+    ) -> None:
+        self._channel_ids.append(channel_id)
+        self._message_ids.append(message_id)
+        self._signatures.extend(values)
+        bisect.insort(self._sorted_ids, message_id)
+
+    def _insert(
+        self, channel_id: int, message_id: int, signature_: array
+    ) -> None:
+        position = len(self._message_ids)
+        self._append_record(channel_id, message_id, signature_)
+        for band in range(BANDS):
+            key = self._band_key(channel_id, signature_, band)
+            keys = self._band_keys[band]
+            index = bisect.bisect_right(keys, key)
+            keys.insert(index, key)
+            self._band_positions[band].insert(index, position)
+
+    def _rebuild_bands(self) -> None:
+        # One band at a time, so only a single band's sort order is held
+        # in Python objects while the arrays are rebuilt.
+        channel_ids, signatures = self._channel_ids, self._signatures
+        for band in range(BANDS):
+            keys = array(
+                "q",
+                (
+                    self._band_key(
+                        channel_id, signatures, band, position * NUM_PERM
+                    )
+                    for position, channel_id in enumerate(channel_ids)
+                ),
+            )
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            self._band_keys[band] = array("q", (keys[i] for i in order))
+            self._band_positions[band] = array("I", order)
+
+    def _build(self, payload: bytes) -> int:
+        # Returns how many records repeated an earlier message id.
+        usable = len(payload) - len(payload) % _RECORD.size
+        seen: set[int] = set()
+        for channel_id, message_id, *values in _RECORD.iter_unpack(
+            payload[:usable]
+        ):
+            if message_id in seen:
+                continue
+            seen.add(message_id)
+            self._channel_ids.append(channel_id)
+            self._message_ids.append(message_id)
+            self._signatures.extend(values)
+        self._sorted_ids = array("Q", sorted(seen))
+        self._rebuild_bands()
+        return usable // _RECORD.size - len(seen)
+
+    def _read(self) -> None:
+        try:
+            payload = self.path.read_bytes()
+        except FileNotFoundError:
+            return
+        if self._build(payload):
+            self._rewrite()
+
+    def _rewrite(self) -> None:
+        # Drops the repeated records from the file.
+        partial = self.path.with_suffix(".partial")
+        with partial.open("wb") as file:
+            for position, message_id in enumerate(self._message_ids):
+                start = position * NUM_PERM
+                file.write(
+                    _RECORD.pack(
+                        self._channel_ids[position],
+                        message_id,
+                        *self._signatures[start : start + NUM_PERM],
+                    )
+                )
+        partial.replace(self.path)
+
+    def _append(self, records: list[bytes]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("ab") as file:
+            file.write(b"".join(records))
+
+    async def open(self) -> None:
+        self._loader = asyncio.create_task(self._load())
+
+    async def _load(self) -> None:
+        start = time.perf_counter()
+        await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._read
+        )
+        for record in self._backlog:
+            if record[1] not in self:
+                self._insert(*record)
+        self._backlog.clear()
+        self.ready = True
+        logger.info(
+            "Loaded %d suggestions into the duplicate index in %.2fs.",
+            len(self),
+            time.perf_counter() - start,
+        )
+
+    async def wait_ready(self) -> None:
+        if self._loader is not None:
+            await asyncio.shield(self._loader)
+
+    async def close(self) -> None:
+        if self._loader is not None and not self._loader.done():
+            self._loader.cancel()
+        self._loader = None
+        self._executor.shutdown(wait=True)
+
+    def find(
+        self, channel_id: int, signature_: array
+    ) -> SuggestionMatch | None:
+        # None while the index is still loading, so nothing is blocked on it.
+        if not self.ready:
+            return None
+
+        candidates: set[int] = set()
+        for band in range(BANDS):
+            key = self._band_key(channel_id, signature_, band)
+            keys = self._band_keys[band]
+            positions = self._band_positions[band]
+            index = bisect.bisect_left(keys, key)
+            while index < len(keys) and keys[index] == key:
+                candidates.add(positions[index])
+                index += 1
+
+        best: SuggestionMatch | None = None
+        for position in candidates:
+            if self._channel_ids[position] != channel_id:
+                continue
+            start = position * NUM_PERM
+            similarity = (
+                sum(
+                    ours == theirs
+                    for ours, theirs in zip(
+                        signature_, self._signatures[start : start + NUM_PERM]
+                    )
+                )
+                / NUM_PERM
+            )
+            if similarity >= self.threshold and (
+                best is None or similarity > best.similarity
+            ):
+                best = SuggestionMatch(
+                    channel_id, self._message_ids[position], similarity
+                )
+        return best
+
+    async def add(
+        self, channel_id: int, message_id: int, signature_: array
+    ) -> None:
+        await self.extend(((channel_id, message_id, signature_),))
+
+    async def extend(
+        self, suggestions: Iterable[tuple[int, int, array]]
+    ) -> None:
+        # Suggestions already indexed are skipped, they are only known once
+        # the index has loaded.
+        batch: list[tuple[int, int, array]] = []
+        queued: set[int] = set()
+        for suggestion in suggestions:
+            if suggestion[1] in queued or (
+                self.ready and suggestion[1] in self
+            ):
+                continue
+            queued.add(suggestion[1])
+            batch.append(suggestion)
+        records = [
+            _RECORD.pack(channel_id, message_id, *signature_)
+            for channel_id, message_id, signature_ in batch
+        ]
+        if not self.ready:
+            self._backlog.extend(batch)
+        elif len(batch) > BULK_INSERT_SIZE:
+            for channel_id, message_id, signature_ in batch:
+                self._channel_ids.append(channel_id)
+                self._message_ids.append(message_id)
+                self._signatures.extend(signature_)
+            self._sorted_ids = array("Q", sorted(self._message_ids))
+            self._rebuild_bands()
+        else:
+            for suggestion in batch:
+                self._insert(*suggestion)
+
+        if records:
+            await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._append, records
+            )
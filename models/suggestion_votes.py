@@ -0,0 +1,165 @@
+import heapq
+import logging
+from typing import Any, Iterable
+
+from models.store import TicketStore
+
+logger = logging.getLogger("suggestion_votes")
+
+UPVOTE = "👍"
+DOWNVOTE = "👎"
+
+TALLY_COLUMNS = (
+    "message_id",
+    "channel_id",
+    "guild_id",
+    "upvotes",
+    "downvotes",
+)
+
+
+class SuggestionTally:
+    # Votes exclude the Bot's own reactions it seeds every suggestion with.
+    __slots__ = (*TALLY_COLUMNS, "reconciled")
+
+    def __init__(
+        self,
+        message_id: int,
+        channel_id: int,
+        guild_id: int,
+        upvotes: int = 0,
+        downvotes: int = 0,
+        *,
+        reconciled: bool = True,
+    ) -> None:
+        self.message_id: int = message_id
+        self.channel_id: int = channel_id
+        self.guild_id: int = guild_id
+        self.upvotes: int = upvotes
+        self.downvotes: int = downvotes
+        # False for counts read back from the store, which miss the votes
+        # cast while the Bot was offline.
+        self.reconciled: bool = reconciled
+
+    @property
+    def score(self) -> int:
+        return self.upvotes - self.downvotes
+
+    @classmethod
+    def from_row(cls, row: Any) -> "SuggestionTally":
+        return cls(*row, reconciled=False)
+
+    def to_row(self) -> tuple[int, ...]:
+        return tuple(getattr(self, column) for column in TALLY_COLUMNS)
+
+
+class SuggestionVotes:
+    # Running 👍/👎 counts of every posted suggestion, kept in memory per
+    # channel and updated from reaction events, so leaderboards are built
+    # without fetching reactions. Each change is queued on the store.
+    def __init__(self, store: TicketStore) -> None:
+        self.store: TicketStore = store
+        self._tallies: dict[int, SuggestionTally] = {}
+        self._channels: dict[int, dict[int, SuggestionTally]] = {}
+
+    def __len__(self) -> int:
+        return len(self._tallies)
+
+    def __contains__(self, message_id: int) -> bool:
+        return message_id in self._tallies
+
+    def get(self, message_id: int) -> SuggestionTally | None:
+        return self._tallies.get(message_id)
+
+    def channel(self, channel_id: int) -> tuple[SuggestionTally, ...]:
+        return tuple(self._channels.get(channel_id, {}).values())
+
+    async def load(self) -> None:
+        rows = await self.store.fetch(
+            f"SELECT {', '.join(TALLY_COLUMNS)} FROM suggestion_votes"
+        )
+        self._tallies, self._channels = {}, {}
+        for tally in map(SuggestionTally.from_row, rows):
+            self._add(tally)
+
+        logger.info("Loaded the votes of %d suggestions.", len(self))
+
+    def _add(self, tally: SuggestionTally) -> None:
+        self._tallies[tally.message_id] = tally
+        self._channels.setdefault(tally.channel_id, {})[
+            tally.message_id
+        ] = tally
+
+    def _save(self, tally: SuggestionTally) -> None:
+        self.store.execute(
+            f"INSERT OR REPLACE INTO suggestion_votes "
+            f"({', '.join(TALLY_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(TALLY_COLUMNS))})",
+            tally.to_row(),
+        )
+
+    def track(
+        self,
+        guild_id: int,
+        channel_id: int,
+        message_id: int,
+        upvotes: int = 0,
+        downvotes: int = 0,
+    ) -> SuggestionTally:
+        # Starts counting a suggestion or replaces its counts with ones read
+        # from Discord.
+        if (tally := self._tallies.get(message_id)) is None:
+            tally = SuggestionTally(message_id, channel_id, guild_id)
+            self._add(tally)
+        tally.upvotes, tally.downvotes = upvotes, downvotes
+        tally.reconciled = True
+        self._save(tally)
+        return tally
+
+    def vote(self, message_id: int, emoji: str | None, delta: int) -> bool:
+        if (tally := self._tallies.get(message_id)) is None:
+            return False
+
+        if emoji == UPVOTE:
+            tally.upvotes = max(tally.upvotes + delta, 0)
+        elif emoji == DOWNVOTE:
+            tally.downvotes = max(tally.downvotes + delta, 0)
+        else:
+            return False
+
+        self._save(tally)
+        return True
+
+    def clear(self, message_id: int, emoji: str | None = None) -> None:
+        # All reactions, or all of one emoji, were removed by a moderator.
+        if (tally := self._tallies.get(message_id)) is None:
+            return
+
+        if emoji in (None, UPVOTE):
+            tally.upvotes = 0
+        if emoji in (None, DOWNVOTE):
+            tally.downvotes = 0
+        self._save(tally)
+
+    def forget(self, message_ids: Iterable[int]) -> None:
+        for message_id in message_ids:
+            if (tally := self._tallies.pop(message_id, None)) is None:
+                continue
+
+            channel = self._channels[tally.channel_id]
+            del channel[message_id]
+            if not channel:
+                del self._channels[tally.channel_id]
+            self.store.execute(
+                "DELETE FROM suggestion_votes WHERE message_id = ?",
+                (message_id,),
+            )
+
+    def top(self, channel_id: int, limit: int = 10) -> list[SuggestionTally]:
+        # Highest score first, more upvotes and then newer suggestions win
+        # ties.
+        return heapq.nlargest(
+            limit,
+            self._channels.get(channel_id, {}).values(),
+            key=lambda tally: (tally.score, tally.upvotes, tally.message_id),
+        )
@@ -0,0 +1,66 @@
+import asyncio
+from typing import Any, Awaitable, Callable
+
+from models.errors import StepSkippedError
+
+StepFactory = Callable[..., Awaitable[Any]]
+
+
+class TaskGraphResult:
+    __slots__ = ("results", "errors")
+
+    def __init__(self) -> None:
+        self.results: dict[str, Any] = {}
+        self.errors: dict[str, BaseException] = {}
+
+
+class TaskGraph:
+    # Runs awaitable steps as soon as the steps they depend on succeeded.
+    # A step receives the results of its dependencies as positional
+    # arguments, in the order they were listed in ``after``.
+    def __init__(self) -> None:
+        self._steps: dict[str, tuple[StepFactory, tuple[str, ...]]] = {}
+
+    def add(
+        self, step: str, factory: StepFactory, *, after: tuple[str, ...] = ()
+    ) -> None:
+        if step in self._steps:
+            raise ValueError(f"Step {step!r} is already registered.")
+        for dependency in after:
+            if dependency not in self._steps:
+                raise ValueError(
+                    f"Step {step!r} depends on unknown step {dependency!r}."
+                )
+
+        self._steps[step] = (factory, after)
+
+    async def run(self) -> TaskGraphResult:
+        tasks: dict[str, asyncio.Task[Any]] = {}
+
+        async def run_step(
+            step: str, factory: StepFactory, after: tuple[str, ...]
+        ) -> Any:
+            for dependency in after:
+                task = tasks[dependency]
+                await asyncio.wait((task,))
+                if task.cancelled() or task.exception() is not None:
+                    raise StepSkippedError(step, dependency)
+
+            return await factory(
+                *(tasks[dependency].result() for dependency in after)
+            )
+
+        for step, (factory, after) in self._steps.items():
+            tasks[step] = asyncio.create_task(run_step(step, factory, after))
+
+        outcome = TaskGraphResult()
+        for step, result in zip(
+            tasks,
+            await asyncio.gather(*tasks.values(), return_exceptions=True),
+        ):
+            if isinstance(result, BaseException):
+                outcome.errors[step] = result
+            else:
+                outcome.results[step] = result
+
+        return outcome
@@ -0,0 +1,128 @@
+import copy
+import functools
+
+import hikari
+
+from models.colour import Colour
+from models.emojis import Emojis
+from utils import utcnow
+
+AUTHOR_NAME = "DayZ++"
+AUTHOR_URL = "https://discord.com/users/867376409965363200"
+
+
+class TicketCategory:
+    __slots__ = ("value", "label", "title", "emoji", "ping_staff", "prefix")
+
+    def __init__(
+        self,
+        value: str,
+        label: str,
+        emoji: str,
+        *,
+        title: str | None = None,
+        ping_staff: bool = False,
+        prefix: str = "ticket",
+    ) -> None:
+        self.value: str = value
+        self.label: str = label
+        self.title: str = title or label
+        self.emoji: str = emoji
+        self.ping_staff: bool = ping_staff
+        self.prefix: str = prefix
+
+    def channel_name(self, user: hikari.User) -> str:
+        return f"{self.prefix}-{user.username}-{user.id}"
+
+
+TICKET_CATEGORIES: dict[str, TicketCategory] = {
+    category.value: category
+    for category in (
+        TicketCategory(
+            "custom_bot",
+            "Custom Bot Request",
+            "⚙",
+            title="Custom Bot",
+            ping_staff=True,
+        ),
+        TicketCategory("general_question", "General Question", "❓"),
+        TicketCategory(
+            "configuration_question", "Configuration Question", "⚙"
+        ),
+        TicketCategory(
+            "support_apply",
+            "Apply for Support",
+            "📩",
+            title="Support Application",
+        ),
+        TicketCategory("refund", "Refund", "💵", ping_staff=True),
+        TicketCategory("bug_report", "Bug Report", "⛔", ping_staff=True),
+    )
+}
+
+
+def _check(flag: bool) -> str:
+    return Emojis.CHECK if flag else Emojis.CROSS
+
+
+@functools.lru_cache(maxsize=8)
+def _branded_template(footer_text: str, icon: str | None) -> hikari.Embed:
+    return (
+        hikari.Embed(colour=Colour.BLURPLE)
+        .set_footer(text=footer_text, icon=icon)
+        .set_author(name=AUTHOR_NAME, icon=icon, url=AUTHOR_URL)
+    )
+
+
+def branded_embed(
+    description: str, footer_text: str, icon: hikari.URL | None
+) -> hikari.Embed:
+    # Templates are shared, so only ever assign attributes on the copy.
+    embed = copy.copy(_branded_template(footer_text, icon and str(icon)))
+    embed.description = description
+    embed.timestamp = utcnow()
+    return embed
+
+
+@functools.lru_cache(maxsize=256)
+def _welcome_template(
+    category: str,
+    verified_admin: bool,
+    premium: bool,
+    shop: bool,
+    footer_text: str,
+    icon: str | None,
+) -> hikari.Embed:
+    embed = copy.copy(_branded_template(footer_text, icon))
+    embed.description = (
+        "> **User Information**\n"
+        f"> • Verified Owner | Admin: {_check(verified_admin)}\n"
+        f"> • Premium Feature Owner: {_check(premium)}\n"
+        f"> • Shop Feature Owner: {_check(shop)}\n"
+        "> **Ticket Information**\n"
+        f"> • Category: {TICKET_CATEGORIES[category].title}"
+    )
+    return embed
+
+
+def welcome_embed(
+    category: TicketCategory,
+    *,
+    verified_admin: bool,
+    premium: bool,
+    shop: bool,
+    footer_text: str,
+    icon: hikari.URL | None,
+) -> hikari.Embed:
+    embed = copy.copy(
+        _welcome_template(
+            category.value,
+            verified_admin,
+            premium,
+            shop,
+            footer_text,
+            icon and str(icon),
+        )
+    )
+    embed.timestamp = utcnow()
+    return embed
@@ -0,0 +1,155 @@
+import datetime
+from typing import Any, Iterable, Iterator
+
+import hikari
+
+
+class Ticket:
+    __slots__ = (
+        "channel_id",
+        "guild_id",
+        "owner_id",
+        "category_id",
+        "opened_at",
+    )
+
+    def __init__(
+        self,
+        channel_id: int,
+        guild_id: int,
+        owner_id: int,
+        category_id: int,
+        opened_at: datetime.datetime,
+    ) -> None:
+        self.channel_id: int = channel_id
+        self.guild_id: int = guild_id
+        self.owner_id: int = owner_id
+        self.category_id: int = category_id
+        self.opened_at: datetime.datetime = opened_at
+
+    @classmethod
+    def from_channel(cls, channel: hikari.GuildChannel) -> "Ticket | None":
+        if channel.parent_id is None:
+            return None
+
+        # Ticket channels are named after their owner's id. Staff may add
+        # other members, so a member overwrite only decides the owner when
+        # the name carries no id, and overwrites come in no fixed order.
+        _, _, suffix = (channel.name or "").rpartition("-")
+        members = [
+            overwrite.id
+            for overwrite in channel.permission_overwrites.values()
+            if overwrite.type is hikari.PermissionOverwriteType.MEMBER
+        ]
+        if suffix.isdigit() and (not members or int(suffix) in members):
+            owner_id = int(suffix)
+        elif members:
+            owner_id = members[0]
+        else:
+            return None
+
+        return cls(
+            channel_id=channel.id,
+            guild_id=channel.guild_id,
+            owner_id=owner_id,
+            category_id=channel.parent_id,
+            opened_at=channel.created_at,
+        )
+
+    def to_row(self) -> list[Any]:
+        return [
+            self.channel_id,
+            self.guild_id,
+            self.owner_id,
+            self.category_id,
+            self.opened_at.timestamp(),
+        ]
+
+    @classmethod
+    def from_row(cls, row: list[Any]) -> "Ticket":
+        *ids, opened_at = row
+        return cls(
+            *ids,
+            opened_at=datetime.datetime.fromtimestamp(
+                opened_at, datetime.timezone.utc
+            ),
+        )
+
+
+class TicketIndex:
+    def __init__(self) -> None:
+        self._by_channel: dict[int, Ticket] = {}
+        self._by_owner: dict[tuple[int, int], int] = {}
+        self._category_counts: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_channel)
+
+    def __contains__(self, channel_id: int) -> bool:
+        return channel_id in self._by_channel
+
+    def __iter__(self) -> Iterator[Ticket]:
+        return iter(tuple(self._by_channel.values()))
+
+    def get(self, channel_id: int) -> Ticket | None:
+        return self._by_channel.get(channel_id)
+
+    def get_by_owner(self, guild_id: int, owner_id: int) -> Ticket | None:
+        if (channel_id := self._by_owner.get((guild_id, owner_id))) is None:
+            return None
+        return self._by_channel.get(channel_id)
+
+    def count(self, category_id: int) -> int:
+        return self._category_counts.get(category_id, 0)
+
+    def add(self, ticket: Ticket) -> None:
+        self.remove(ticket.channel_id)
+
+        self._by_channel[ticket.channel_id] = ticket
+        self._by_owner[(ticket.guild_id, ticket.owner_id)] = ticket.channel_id
+        self._category_counts[ticket.category_id] = (
+            self._category_counts.get(ticket.category_id, 0) + 1
+        )
+
+    def remove(self, channel_id: int) -> Ticket | None:
+        if (ticket := self._by_channel.pop(channel_id, None)) is None:
+            return None
+
+        owner_key = (ticket.guild_id, ticket.owner_id)
+        if self._by_owner.get(owner_key) == channel_id:
+            del self._by_owner[owner_key]
+
+        if (count := self._category_counts[ticket.category_id] - 1) > 0:
+            self._category_counts[ticket.category_id] = count
+        else:
+            del self._category_counts[ticket.category_id]
+
+        return ticket
+
+    def clear(self) -> None:
+        self._by_channel.clear()
+        self._by_owner.clear()
+        self._category_counts.clear()
+
+    def replace_guild(
+        self,
+        guild_id: int,
+        tickets: Iterable[Ticket],
+        *,
+        since: datetime.datetime,
+    ) -> None:
+        # Swaps in a fresh listing of the guild's tickets, tickets opened
+        # while that listing was being fetched are kept.
+        for ticket in self:
+            if ticket.guild_id == guild_id and ticket.opened_at < since:
+                self.remove(ticket.channel_id)
+        for ticket in tickets:
+            self.add(ticket)
+
+    def snapshot(self) -> list[list[Any]]:
+        return [ticket.to_row() for ticket in self._by_channel.values()]
+
+    def restore(self, rows: list[list[Any]]) -> None:
+        self.clear()
+        for row in rows:
+            self.add(Ticket.from_row(row))
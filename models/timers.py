@@ -0,0 +1,268 @@
+import asyncio
+import datetime
+import heapq
+import itertools
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+import hikari
+
+from models.store import TicketStore
+
+logger = logging.getLogger("timers")
+
+TIMER_COLUMNS = ("kind", "key", "guild_id", "due", "payload")
+# Timers firing at once, e.g. everything that fell due during a restart.
+TIMER_CONCURRENCY = 16
+# Upper bound on one sleep, so a wall clock that jumps is noticed.
+MAX_TIMER_SLEEP = 60.0
+# Backoff of timers whose handler failed on a REST call, doubling per try.
+TIMER_RETRY_DELAY = 30.0
+MAX_TIMER_RETRY_DELAY = 3600.0
+
+
+class Timer:
+    __slots__ = (*TIMER_COLUMNS, "attempts")
+
+    def __init__(
+        self,
+        kind: str,
+        key: int,
+        guild_id: int,
+        due: float,
+        payload: dict[str, Any] | None = None,
+    ) -> None:
+        self.kind: str = kind
+        self.key: int = key
+        self.guild_id: int = guild_id
+        # Seconds since the epoch, so it survives a restart.
+        self.due: float = due
+        self.payload: dict[str, Any] = payload or {}
+        # Failed runs since it was scheduled, only kept in memory.
+        self.attempts: int = 0
+
+    @property
+    def due_at(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self.due, datetime.timezone.utc)
+
+    @classmethod
+    def from_row(cls, row: Any) -> "Timer":
+        kind, key, guild_id, due, payload = row
+        return cls(
+            kind, key, guild_id, due, json.loads(payload) if payload else None
+        )
+
+    def to_row(self) -> tuple[Any, ...]:
+        return (
+            self.kind,
+            self.key,
+            self.guild_id,
+            self.due,
+            json.dumps(self.payload) if self.payload else None,
+        )
+
+
+TimerHandler = Callable[[Timer], Awaitable[None]]
+
+
+class TimerService:
+    # Every pending timer sits in one min-heap ordered by due time and a
+    # single task sleeps until the earliest, rather than a sleeping task
+    # per timer. A timer is identified by its kind and key, scheduling it
+    # again replaces it. Replaced and cancelled timers leave stale heap
+    # entries behind that are skipped once they surface and dropped when
+    # the heap is rebuilt. Changes are queued on the store, so pending
+    # timers are read back after a restart.
+    def __init__(
+        self,
+        store: TicketStore,
+        owns_guild: Callable[[int], bool] | None = None,
+    ) -> None:
+        self.store: TicketStore = store
+        # Timers of guilds on another worker's shards are left to it.
+        self.owns_guild: Callable[[int], bool] = owns_guild or (lambda _: True)
+        self._handlers: dict[str, TimerHandler] = {}
+        self._timers: dict[tuple[str, int], Timer] = {}
+        self._heap: list[tuple[float, int, Timer]] = []
+        self._sequence: itertools.count[int] = itertools.count()
+        self._wake: asyncio.Event = asyncio.Event()
+        self._runner: asyncio.Task[None] | None = None
+        self._firing: set[asyncio.Task[None]] = set()
+        self._slots: asyncio.Semaphore = asyncio.Semaphore(TIMER_CONCURRENCY)
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def get(self, kind: str, key: int) -> Timer | None:
+        return self._timers.get((kind, key))
+
+    def register(self, kind: str, handler: TimerHandler) -> None:
+        self._handlers[kind] = handler
+
+    def unregister(self, kind: str) -> None:
+        self._handlers.pop(kind, None)
+
+    async def load(self) -> None:
+        rows = await self.store.fetch(
+            f"SELECT {', '.join(TIMER_COLUMNS)} FROM timers"
+        )
+        for timer in map(Timer.from_row, rows):
+            self._push(timer)
+        logger.info("Loaded %d pending timers.", len(self))
+
+    def start(self) -> None:
+        self._runner = asyncio.create_task(self._run(), name="timers")
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            self._runner = None
+        for task in tuple(self._firing):
+            task.cancel()
+        await asyncio.gather(*self._firing, return_exceptions=True)
+
+    def _push(self, timer: Timer) -> None:
+        # The runner only has to wake up early for a new earliest timer.
+        if not self._heap or timer.due < self._heap[0][0]:
+            self._wake.set()
+
+        self._timers[(timer.kind, timer.key)] = timer
+        heapq.heappush(self._heap, (timer.due, next(self._sequence), timer))
+        self._compact()
+
+    def _compact(self) -> None:
+        # Rebuilds the heap once most of its entries are stale.
+        if len(self._heap) > 2 * len(self._timers) + 64:
+            self._heap = [
+                (timer.due, next(self._sequence), timer)
+                for timer in self._timers.values()
+            ]
+            heapq.heapify(self._heap)
+
+    def schedule(
+        self,
+        kind: str,
+        key: int,
+        guild_id: int,
+        due: datetime.datetime,
+        payload: dict[str, Any] | None = None,
+    ) -> Timer:
+        timer = Timer(kind, key, guild_id, due.timestamp(), payload)
+        self._push(timer)
+        self._save(timer)
+        return timer
+
+    def _save(self, timer: Timer) -> None:
+        self.store.execute(
+            f"INSERT OR REPLACE INTO timers ({', '.join(TIMER_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(TIMER_COLUMNS))})",
+            timer.to_row(),
+        )
+
+    def ensure(
+        self,
+        kind: str,
+        key: int,
+        guild_id: int,
+        due: datetime.datetime,
+        payload: dict[str, Any] | None = None,
+    ) -> Timer:
+        # Schedules the timer unless one of the kind and key is pending.
+        if (timer := self.get(kind, key)) is not None:
+            return timer
+        return self.schedule(kind, key, guild_id, due, payload)
+
+    def cancel(self, kind: str, key: int) -> Timer | None:
+        if (timer := self._timers.pop((kind, key), None)) is not None:
+            self._delete(timer)
+            self._compact()
+        return timer
+
+    def _delete(self, timer: Timer) -> None:
+        self.store.execute(
+            "DELETE FROM timers WHERE kind = ? AND key = ?",
+            (timer.kind, timer.key),
+        )
+
+    def _pop_due(self, now: float) -> list[Timer]:
+        # Rows stay in the store until their handler succeeded, so a timer
+        # that was firing during a crash fires again after the restart.
+        due: list[Timer] = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, timer = heapq.heappop(self._heap)
+            if self._timers.get((timer.kind, timer.key)) is not timer:
+                continue
+
+            del self._timers[(timer.kind, timer.key)]
+            if self.owns_guild(timer.guild_id):
+                due.append(timer)
+        return due
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._wake.clear()
+            now = datetime.datetime.now(datetime.timezone.utc).timestamp()
+            for timer in self._pop_due(now):
+                task = loop.create_task(self._fire(timer))
+                self._firing.add(task)
+                task.add_done_callback(self._firing.discard)
+
+            delay = (
+                min(self._heap[0][0] - now, MAX_TIMER_SLEEP)
+                if self._heap
+                else MAX_TIMER_SLEEP
+            )
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _fire(self, timer: Timer) -> None:
+        if (handler := self._handlers.get(timer.kind)) is None:
+            logger.warning(
+                "Dropped a %s timer for %s without a handler.",
+                timer.kind,
+                timer.key,
+            )
+            return
+
+        async with self._slots:
+            try:
+                await handler(timer)
+            except hikari.HTTPError as error:
+                self._retry(timer, error)
+                return
+            except Exception:
+                logger.exception(
+                    "Failed to run the %s timer for %s.", timer.kind, timer.key
+                )
+
+        # The handler may have scheduled it again, which replaced the row.
+        if self.get(timer.kind, timer.key) is None:
+            self._delete(timer)
+
+    def _retry(self, timer: Timer, error: hikari.HTTPError) -> None:
+        if self.get(timer.kind, timer.key) is not None:
+            # Scheduled again before the failure, that one wins.
+            return
+
+        timer.attempts += 1
+        delay = min(
+            TIMER_RETRY_DELAY * 2 ** (timer.attempts - 1),
+            MAX_TIMER_RETRY_DELAY,
+        )
+        if isinstance(error, hikari.RateLimitTooLongError):
+            delay = max(delay, error.retry_after)
+        logger.warning(
+            "Failed to run the %s timer for %s, retrying in %.0fs: %s",
+            timer.kind,
+            timer.key,
+            delay,
+            error,
+        )
+        timer.due = time.time() + delay
+        self._push(timer)
+        self._save(timer)
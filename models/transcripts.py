@@ -0,0 +1,101 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+import hikari
+
+from models.inflight import InFlightRegistry
+
+logger = logging.getLogger("transcripts")
+
+
+def _serialize(message: hikari.Message) -> dict[str, Any]:
+    return {
+        "id": message.id,
+        "author_id": message.author.id,
+        "author": str(message.author),
+        "created_at": message.created_at.isoformat(),
+        "edited_at": message.edited_timestamp
+        and message.edited_timestamp.isoformat(),
+        "content": message.content,
+        "embeds": [embed.description for embed in message.embeds],
+        "attachments": [attachment.url for attachment in message.attachments],
+    }
+
+
+async def iter_history(
+    rest: hikari.api.RESTClient, channel_id: int, *, page_size: int = 100
+) -> AsyncIterator[tuple[hikari.Message, ...]]:
+    # Oldest first, one page in memory at a time.
+    async for page in rest.fetch_messages(
+        channel_id, after=hikari.Snowflake.min()
+    ).chunk(page_size):
+        yield page
+
+
+class TranscriptExporter:
+    def __init__(
+        self,
+        directory: str | Path,
+        *,
+        log_channel_id: int | None = None,
+        max_concurrency: int = 4,
+    ) -> None:
+        self.directory: Path = Path(directory)
+        self.log_channel_id: int | None = log_channel_id
+        self._semaphore: asyncio.Semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight: InFlightRegistry = InFlightRegistry()
+
+    async def export(
+        self, rest: hikari.api.RESTClient, channel_id: int
+    ) -> Path:
+        # Exports of a channel already being exported wait for that one,
+        # rather than writing to the same partial file.
+        path, _ = await self._in_flight.run(
+            channel_id, lambda: self._export(rest, channel_id)
+        )
+        return path
+
+    async def _export(
+        self, rest: hikari.api.RESTClient, channel_id: int
+    ) -> Path:
+        path = self.directory / f"{channel_id}.jsonl.gz"
+        partial = path.with_suffix(".partial")
+
+        async with self._semaphore:
+            await asyncio.to_thread(
+                self.directory.mkdir, parents=True, exist_ok=True
+            )
+            file = await asyncio.to_thread(
+                gzip.open, partial, "wt", encoding="utf-8"
+            )
+            count = 0
+            try:
+                async for page in iter_history(rest, channel_id):
+                    lines = "".join(
+                        json.dumps(_serialize(message), ensure_ascii=False)
+                        + "\n"
+                        for message in page
+                    )
+                    await asyncio.to_thread(file.write, lines)
+                    count += len(page)
+            finally:
+                await asyncio.to_thread(file.close)
+
+            await asyncio.to_thread(os.replace, partial, path)
+
+        logger.info(
+            "Exported %d messages of %s to %s.", count, channel_id, path
+        )
+        if self.log_channel_id is not None:
+            await rest.create_message(
+                self.log_channel_id,
+                f"**Transcript of Ticket `{channel_id}` ({count} messages).**",
+                attachment=hikari.File(path),
+            )
+
+        return path
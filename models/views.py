@@ -1,46 +1,42 @@
 import datetime
+import logging
 from typing import Any
 
 import hikari
 import miru
 
 from models import Colour
+from models.suggestion_index import suggestion_signature
+from models.tasks import TaskGraph
+from models.ticket_categories import TICKET_CATEGORIES
 
-SUGGESTIONS_CHANNEL_ID = 983726366283411497
+logger = logging.getLogger("views")
+
+SUGGESTION_PREFIX = "> **Suggestion**\n```\n"
+SUGGESTION_SUFFIX = "```"
+
+
+def suggestion_text(description: str | None) -> str | None:
+    # The suggestion back out of a posted embed, None for other messages.
+    if (
+        description is None
+        or not description.startswith(SUGGESTION_PREFIX)
+        or not description.endswith(SUGGESTION_SUFFIX)
+    ):
+        return None
+    return description[len(SUGGESTION_PREFIX) : -len(SUGGESTION_SUFFIX)]
 
 
 class TicketPanelSelect(miru.Select):
     def __init__(self) -> None:
         super().__init__(
-            options=(
-                miru.SelectOption(
-                    label="Custom Bot Request",
-                    value="custom_bot",
-                    emoji="⚙",
-                ),
-                miru.SelectOption(
-                    label="General Question",
-                    value="general_question",
-                    emoji="❓",
-                ),
+            options=tuple(
                 miru.SelectOption(
-                    label="Configuration Question",
-                    value="configuration_question",
-                    emoji="⚙",
-                ),
-                miru.SelectOption(
-                    label="Apply for Support",
-                    value="support_apply",
-                    emoji="📩",
-                ),
-                miru.SelectOption(
-                    label="Refund",
-                    value="refund",
-                    emoji="💵",
-                ),
-                miru.SelectOption(
-                    label="Bug Report", value="bug_report", emoji="⛔"
-                ),
+                    label=category.label,
+                    value=category.value,
+                    emoji=category.emoji,
+                )
+                for category in TICKET_CATEGORIES.values()
             ),
             placeholder="Select a Category ...",
             custom_id="ticket_panel",
@@ -114,11 +110,36 @@ class SuggestionModal(miru.Modal):
     )
 
     async def callback(self, ctx: miru.ModalContext) -> None:
+        await ctx.defer(
+            hikari.ResponseType.DEFERRED_MESSAGE_CREATE,
+            flags=hikari.MessageFlag.EPHEMERAL,
+        )
+        ctx.bot.ack_timings.observe("SuggestionModal", ctx.interaction)  # type: ignore
+
+        config = ctx.bot.guild_configs.get(ctx.guild_id)  # type: ignore
+        if config is None or config.suggestions_channel_id is None:
+            await ctx.edit_response(
+                "**Suggestions are not set up on this Server.**"
+            )
+            return
+        channel_id = config.suggestions_channel_id
+
         suggestion: str = [value for value in ctx.values.values()][0]
 
+        signature = suggestion_signature(suggestion)
+        if signature is not None and (
+            match := ctx.bot.suggestions.find(channel_id, signature)  # type: ignore
+        ):
+            await ctx.edit_response(
+                "**A very similar Suggestion was already submitted, "
+                "vote for it instead. "
+                f"(https://discord.com/channels/{ctx.guild_id}/{channel_id}/{match.message_id})**"
+            )
+            return
+
         embed = (
             hikari.Embed(
-                description=f"> **Suggestion**\n```\n{suggestion}```",
+                description=f"{SUGGESTION_PREFIX}{suggestion}{SUGGESTION_SUFFIX}",
                 colour=Colour.BLURPLE,
                 timestamp=datetime.datetime.now(datetime.timezone.utc),
             )
@@ -132,15 +153,47 @@ class SuggestionModal(miru.Modal):
             )
         )
 
-        message_proxy = await ctx.bot.rest.create_message(
-            SUGGESTIONS_CHANNEL_ID, embed=embed
-        )
-        await ctx.bot.rest.add_reaction(
-            SUGGESTIONS_CHANNEL_ID, message_proxy, "👍"
+        graph = TaskGraph()
+        graph.add(
+            "message",
+            lambda: ctx.bot.rest.create_message(channel_id, embed=embed),
         )
-        await ctx.bot.rest.add_reaction(
-            SUGGESTIONS_CHANNEL_ID, message_proxy, "👎"
+        for step, emoji in (("upvote", "👍"), ("downvote", "👎")):
+            graph.add(
+                step,
+                lambda message_proxy, emoji=emoji: ctx.bot.rest.add_reaction(
+                    channel_id, message_proxy, emoji
+                ),
+                after=("message",),
+            )
+        graph.add(
+            "confirmation",
+            lambda message_proxy: ctx.edit_response(
+                f"**Successfully submitted your Suggestion. ({message_proxy.make_link(ctx.guild_id)})**"
+            ),
+            after=("message",),
         )
+        result = await graph.run()
+
+        if (error := result.errors.get("message")) is not None:
+            await ctx.edit_response(
+                "**Failed to submit your Suggestion, please try again later.**"
+            )
+            raise error
+
+        message_id = result.results["message"].id
+        ctx.bot.suggestion_votes.track(ctx.guild_id, channel_id, message_id)  # type: ignore
+        if signature is not None:
+            await ctx.bot.suggestions.add(  # type: ignore
+                channel_id, message_id, signature
+            )
+
+        for step, error in result.errors.items():
+            logger.error(
+                "Failed to run %r while posting a Suggestion.",
+                step,
+                exc_info=error,
+            )
 
 
 class SuggestionPanelView(miru.View):
@@ -0,0 +1,147 @@
+import asyncio
+import contextvars
+import datetime
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+import hikari
+
+from models.scheduler import Lane, TicketScheduler
+from utils import utcnow
+
+logger = logging.getLogger("warm_pool")
+
+POOL_CHANNEL_NAME = "warm-ticket"
+
+ChannelFactory = Callable[[], Awaitable[hikari.GuildChannel]]
+ChannelDeleter = Callable[[int], Awaitable[Any]]
+
+
+class WarmPool:
+    # Keeps hidden, pre-created ticket channels around so opening a ticket
+    # is a single edit_channel call. The target size follows the number of
+    # tickets opened during the last ``window`` seconds, channels above it
+    # are deleted again so they do not hold on to category slots.
+    def __init__(
+        self,
+        scheduler: TicketScheduler,
+        *,
+        min_size: int,
+        max_size: int,
+        window: float = 600.0,
+    ) -> None:
+        self.scheduler: TicketScheduler = scheduler
+        self.min_size: int = min_size
+        self.max_size: int = max(min_size, max_size)
+        self.window: float = window
+        self._channels: deque[int] = deque()
+        self._opens: deque[float] = deque()
+        # Channels taken during the last ``window`` seconds, a listing
+        # fetched before the claim still names them like pool channels.
+        self._claimed: dict[int, datetime.datetime] = {}
+        self._wakeup: asyncio.Event = asyncio.Event()
+        self._refiller: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+    def __contains__(self, channel_id: int) -> bool:
+        return channel_id in self._channels
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    @property
+    def target(self) -> int:
+        cutoff = time.monotonic() - self.window
+        while self._opens and self._opens[0] < cutoff:
+            self._opens.popleft()
+        return min(self.max_size, max(self.min_size, len(self._opens)))
+
+    def add(self, channel_id: int) -> None:
+        if (
+            channel_id not in self._channels
+            and channel_id not in self._claimed
+        ):
+            self._channels.append(channel_id)
+
+    def claimed_at(self, channel_id: int) -> datetime.datetime | None:
+        return self._claimed.get(channel_id)
+
+    def discard(self, channel_id: int) -> None:
+        try:
+            self._channels.remove(channel_id)
+        except ValueError:
+            pass
+
+    def take(self) -> int | None:
+        if not self.enabled or not self._channels:
+            return None
+
+        now = utcnow()
+        cutoff = now - datetime.timedelta(seconds=self.window)
+        while self._claimed and next(iter(self._claimed.values())) < cutoff:
+            del self._claimed[next(iter(self._claimed))]
+
+        channel_id = self._channels.popleft()
+        self._claimed[channel_id] = now
+        return channel_id
+
+    def release(self, channel_id: int) -> None:
+        # Hands back a channel taken for a claim that failed.
+        self._claimed.pop(channel_id, None)
+        if channel_id not in self._channels:
+            self._channels.appendleft(channel_id)
+
+    def opened(self) -> None:
+        # Counts one opened ticket, whether or not it came from the pool.
+        if self.enabled:
+            self._opens.append(time.monotonic())
+            self._wakeup.set()
+
+    def start(self, factory: ChannelFactory, deleter: ChannelDeleter) -> None:
+        if self.enabled and self._refiller is None:
+            # A fresh context, it would keep the caller's log fields.
+            self._refiller = asyncio.create_task(
+                self._refill(factory, deleter), context=contextvars.Context()
+            )
+
+    async def close(self) -> None:
+        if self._refiller is not None:
+            self._refiller.cancel()
+            self._refiller = None
+
+    async def _refill(
+        self, factory: ChannelFactory, deleter: ChannelDeleter
+    ) -> None:
+        while True:
+            while len(self._channels) > self.target:
+                channel_id = self._channels.pop()
+                try:
+                    await deleter(channel_id)
+                except hikari.NotFoundError:
+                    pass
+                except Exception:
+                    logger.exception(
+                        "Failed to delete the surplus warm Ticket channel %s.",
+                        channel_id,
+                    )
+
+            while len(self._channels) < self.target:
+                pending, _ = self.scheduler.submit(factory, Lane.BACKGROUND)
+                try:
+                    channel = await pending
+                except Exception:
+                    logger.exception("Failed to create a warm Ticket channel.")
+                    await asyncio.sleep(self.scheduler.bucket.period)
+                    continue
+                self.add(channel.id)
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.window)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,214 @@
+import asyncio
+import cProfile
+import functools
+import logging
+import sys
+import tracemalloc
+from pathlib import Path
+
+import hikari
+import lightbulb
+from lightbulb import owner_only
+
+from models import Bot
+from utils import format_allocations, format_profile
+
+logger = logging.getLogger(Path(__file__).stem)
+
+plugin = lightbulb.Plugin(Path(__file__).stem, include_datastore=True)
+plugin.add_checks(owner_only)
+# Held while a profile or allocation capture runs, only one may at a time.
+plugin.d.capture_lock = asyncio.Lock()
+
+# Interaction tokens expire after 15 minutes, the report has to fit in.
+MAX_CAPTURE_SECONDS = 600
+REPORT_LINES = 40
+
+
+@plugin.command
+@lightbulb.app_command_permissions(
+    hikari.Permissions.ADMINISTRATOR, dm_enabled=False
+)
+@lightbulb.command(
+    name="debug",
+    description="Inspects the running Bot.",
+)
+@lightbulb.implements(lightbulb.SlashCommandGroup)
+async def debug_command(_: lightbulb.SlashContext) -> None:
+    pass
+
+
+@debug_command.child
+@lightbulb.command(
+    name="stalls",
+    description="Shows the latest times the event loop was blocked.",
+    ephemeral=True,
+)
+@lightbulb.implements(lightbulb.SlashSubCommand)
+async def debug_stalls(ctx: lightbulb.SlashContext) -> None:
+    bot: Bot = plugin.bot  # type: ignore
+    if bot.watchdog is None:
+        await ctx.respond(
+            "**The event loop watchdog is turned off "
+            "(`LOOP_STALL_THRESHOLD=0`).**"
+        )
+        return
+
+    stalls = tuple(bot.watchdog.stalls)
+    if not stalls:
+        await ctx.respond(
+            "**The event loop has not been blocked for over "
+            f"{bot.watchdog.threshold:.2f}s since the start.**"
+        )
+        return
+
+    summary = "\n".join(
+        f"`{stall.started_at:%H:%M:%S}` "
+        + (
+            f"{stall.duration:.3f}s"
+            if stall.duration is not None
+            else "still blocked"
+        )
+        + f" {stall.task or 'outside any task'}"
+        for stall in stalls[-10:]
+    )
+    report = "\n\n".join(stall.format() for stall in reversed(stalls))
+    await ctx.respond(
+        f"**The event loop was blocked {len(stalls)} times, "
+        f"latest last:**\n{summary}"[:2000],
+        attachment=hikari.Bytes(report.encode(), "stalls.txt"),
+    )
+
+
+async def capture_profile(seconds: int) -> str:
+    # Only the event loop's thread is profiled, which is where every
+    # handler runs.
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.disable()
+
+    loop = asyncio.get_running_loop()
+    cumulative, internal = await asyncio.gather(
+        loop.run_in_executor(
+            None,
+            functools.partial(format_profile, profiler, limit=REPORT_LINES),
+        ),
+        loop.run_in_executor(
+            None,
+            functools.partial(
+                format_profile, profiler, limit=REPORT_LINES, sort="tottime"
+            ),
+        ),
+    )
+    return (
+        f"Profiled the event loop for {seconds}s.\n\n"
+        f"By cumulative time:\n{cumulative}\n"
+        f"By internal time:\n{internal}"
+    )
+
+
+async def capture_allocations(seconds: int) -> str:
+    tracemalloc.start()
+    try:
+        await asyncio.sleep(seconds)
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    report = await asyncio.get_running_loop().run_in_executor(
+        None,
+        functools.partial(format_allocations, snapshot, limit=REPORT_LINES),
+    )
+    return (
+        f"Traced allocations for {seconds}s, {peak / 2**20:.1f} MiB at the "
+        f"peak and {current / 2**20:.1f} MiB still allocated at the end.\n"
+        "Only memory allocated during the capture that was still alive at "
+        f"its end is listed.\n\n{report}"
+    )
+
+
+async def respond_with_capture(
+    ctx: lightbulb.SlashContext, kind: str, report: str
+) -> None:
+    await ctx.respond(
+        f"**Captured the {kind}, the report is attached.**",
+        attachment=hikari.Bytes(report.encode(), f"{kind}.txt"),
+    )
+
+
+@debug_command.child
+@lightbulb.option(
+    name="seconds",
+    description="How long to profile for.",
+    type=int,
+    min_value=1,
+    max_value=MAX_CAPTURE_SECONDS,
+    default=30,
+)
+@lightbulb.command(
+    name="profile",
+    description="Profiles the Bot with cProfile and uploads the report.",
+    auto_defer=True,
+    ephemeral=True,
+    pass_options=True,
+)
+@lightbulb.implements(lightbulb.SlashSubCommand)
+async def debug_profile(ctx: lightbulb.SlashContext, seconds: int) -> None:
+    if plugin.d.capture_lock.locked():
+        await ctx.respond("**Another capture is already running.**")
+        return
+
+    if sys.getprofile() is not None:
+        # A second cProfile would silently take over the active one, e.g.
+        # the --profile-startup one.
+        await ctx.respond("**Another profiler is already active.**")
+        return
+
+    async with plugin.d.capture_lock:
+        report = await capture_profile(seconds)
+    await respond_with_capture(ctx, "profile", report)
+
+
+@debug_command.child
+@lightbulb.option(
+    name="seconds",
+    description="How long to trace allocations for.",
+    type=int,
+    min_value=1,
+    max_value=MAX_CAPTURE_SECONDS,
+    default=30,
+)
+@lightbulb.command(
+    name="allocations",
+    description="Traces memory allocations with tracemalloc and uploads "
+    "the report.",
+    auto_defer=True,
+    ephemeral=True,
+    pass_options=True,
+)
+@lightbulb.implements(lightbulb.SlashSubCommand)
+async def debug_allocations(ctx: lightbulb.SlashContext, seconds: int) -> None:
+    if plugin.d.capture_lock.locked():
+        await ctx.respond("**Another capture is already running.**")
+        return
+    if tracemalloc.is_tracing():
+        await ctx.respond(
+            "**tracemalloc is already tracing, e.g. via PYTHONTRACEMALLOC.**"
+        )
+        return
+
+    async with plugin.d.capture_lock:
+        report = await capture_allocations(seconds)
+    await respond_with_capture(ctx, "allocations", report)
+
+
+def load(bot: Bot) -> None:
+    bot.add_plugin(plugin)
+
+
+def unload(bot: Bot) -> None:
+    bot.remove_plugin(plugin)
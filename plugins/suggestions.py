@@ -0,0 +1,279 @@
+import asyncio
+import contextvars
+import logging
+import time
+from array import array
+from pathlib import Path
+
+import hikari
+import lightbulb
+import miru
+from lightbulb import owner_only
+
+from models import (
+    BULK_INSERT_SIZE,
+    DOWNVOTE,
+    UPVOTE,
+    Bot,
+    ComponentRouter,
+    suggestion_signature,
+)
+from models.ticket_categories import branded_embed
+from models.views import SuggestionModal, suggestion_text
+from utils import utcnow
+
+logger = logging.getLogger(Path(__file__).stem)
+
+plugin = lightbulb.Plugin(Path(__file__).stem, include_datastore=True)
+plugin.add_checks(owner_only)
+# Channel id to the task recounting its votes.
+plugin.d.reconciles = {}
+routes = ComponentRouter()
+
+NOT_CONFIGURED_MESSAGE = "**Suggestions are not set up on this Server.**"
+
+
+def vote_counts(message: hikari.Message) -> tuple[int, int]:
+    counts = {UPVOTE: 0, DOWNVOTE: 0}
+    for reaction in message.reactions:
+        if (name := reaction.emoji.name) in counts:
+            counts[name] = reaction.count - reaction.is_me
+    return counts[UPVOTE], counts[DOWNVOTE]
+
+
+async def sync_channel(guild_id: int, channel_id: int) -> tuple[int, int]:
+    # One walk over the channel, 100 messages per request, that replaces the
+    # vote counts of the Bot's suggestion posts and adds the ones the
+    # duplicate index does not know yet. Returns how many posts were seen
+    # and how many of them were indexed.
+    bot: Bot = plugin.bot  # type: ignore
+    if (me := bot.get_me()) is None:
+        return 0, 0
+
+    started = utcnow()
+    # The ids read back from disk are only complete once loading finished.
+    await bot.suggestions.wait_ready()
+    known = bot.suggestions.message_ids(channel_id)
+    seen: set[int] = set()
+    indexed = 0
+    batch: list[tuple[int, int, array]] = []
+    async for message in bot.rest.fetch_messages(channel_id):
+        if message.author.id != me.id or not message.embeds:
+            continue
+        if (text := suggestion_text(message.embeds[0].description)) is None:
+            continue
+
+        seen.add(message.id)
+        bot.suggestion_votes.track(
+            guild_id, channel_id, message.id, *vote_counts(message)
+        )
+        if message.id in known or (
+            (signature := suggestion_signature(text)) is None
+        ):
+            continue
+
+        batch.append((channel_id, message.id, signature))
+        if len(batch) >= BULK_INSERT_SIZE:
+            await bot.suggestions.extend(batch)
+            indexed += len(batch)
+            batch = []
+
+    await bot.suggestions.extend(batch)
+
+    # Suggestions deleted while the Bot was not listening.
+    bot.suggestion_votes.forget(
+        [
+            tally.message_id
+            for tally in bot.suggestion_votes.channel(channel_id)
+            if tally.message_id not in seen
+            and hikari.Snowflake(tally.message_id).created_at < started
+        ]
+    )
+    return len(seen), indexed + len(batch)
+
+
+async def reconcile_votes(guild_id: int, channel_id: int) -> None:
+    start = time.perf_counter()
+    try:
+        seen, _ = await sync_channel(guild_id, channel_id)
+    except hikari.HTTPError:
+        logger.exception(
+            "Failed to reconcile the Suggestion votes of channel %s.",
+            channel_id,
+        )
+    else:
+        logger.info(
+            "Reconciled the votes of %d Suggestions in channel %s in %.2fs.",
+            seen,
+            channel_id,
+            time.perf_counter() - start,
+        )
+    finally:
+        plugin.d.reconciles.pop(channel_id, None)
+
+
+def reconcile_lazily(guild_id: int, channel_id: int) -> None:
+    # Counts read from the store miss votes cast while the Bot was offline.
+    # They are served as they are, and a channel's history is only walked
+    # the first time its votes are needed, never for every channel on start.
+    if channel_id in plugin.d.reconciles:
+        return
+    plugin.d.reconciles[channel_id] = asyncio.create_task(
+        reconcile_votes(guild_id, channel_id), context=contextvars.Context()
+    )
+
+
+@plugin.listener(hikari.StoppingEvent)
+async def on_stopping(_: hikari.StoppingEvent) -> None:
+    for task in tuple(plugin.d.reconciles.values()):
+        task.cancel()
+
+
+def is_own_reaction(user_id: int) -> bool:
+    # The Bot seeds every suggestion with both reactions itself.
+    bot: Bot = plugin.bot  # type: ignore
+    return (me := bot.get_me()) is not None and user_id == me.id
+
+
+def reconcile_stale(message_id: int) -> None:
+    bot: Bot = plugin.bot  # type: ignore
+    tally = bot.suggestion_votes.get(message_id)
+    if tally is not None and not tally.reconciled:
+        reconcile_lazily(tally.guild_id, tally.channel_id)
+
+
+@plugin.listener(hikari.GuildReactionAddEvent)
+async def on_reaction_add(event: hikari.GuildReactionAddEvent) -> None:
+    bot: Bot = plugin.bot  # type: ignore
+    if not is_own_reaction(event.user_id):
+        bot.suggestion_votes.vote(event.message_id, event.emoji_name, 1)
+        reconcile_stale(event.message_id)
+
+
+@plugin.listener(hikari.GuildReactionDeleteEvent)
+async def on_reaction_delete(event: hikari.GuildReactionDeleteEvent) -> None:
+    bot: Bot = plugin.bot  # type: ignore
+    if not is_own_reaction(event.user_id):
+        bot.suggestion_votes.vote(event.message_id, event.emoji_name, -1)
+        reconcile_stale(event.message_id)
+
+
+@plugin.listener(hikari.GuildReactionDeleteEmojiEvent)
+async def on_reaction_delete_emoji(
+    event: hikari.GuildReactionDeleteEmojiEvent,
+) -> None:
+    bot: Bot = plugin.bot  # type: ignore
+    bot.suggestion_votes.clear(event.message_id, event.emoji_name)
+
+
+@plugin.listener(hikari.GuildReactionDeleteAllEvent)
+async def on_reaction_delete_all(
+    event: hikari.GuildReactionDeleteAllEvent,
+) -> None:
+    bot: Bot = plugin.bot  # type: ignore
+    bot.suggestion_votes.clear(event.message_id)
+
+
+@routes.route("SUGGESTION:CREATE", shed=True)
+async def suggestion_create(
+    event: miru.ComponentInteractionCreateEvent,
+) -> None:
+    # The modal is the initial response, so this route cannot be deferred.
+    await SuggestionModal(title="Suggestion").send(event.interaction)
+
+
+@plugin.command
+@lightbulb.app_command_permissions(
+    hikari.Permissions.ADMINISTRATOR, dm_enabled=False
+)
+@lightbulb.command(
+    name="suggestions",
+    description="Manages the Suggestions of this Server.",
+)
+@lightbulb.implements(lightbulb.SlashCommandGroup)
+async def suggestions_command(_: lightbulb.SlashContext) -> None:
+    pass
+
+
+@suggestions_command.child
+@lightbulb.option(
+    name="limit",
+    description="How many Suggestions to show.",
+    type=int,
+    min_value=1,
+    max_value=25,
+    default=10,
+)
+@lightbulb.command(
+    name="top",
+    description="Shows the highest voted Suggestions.",
+    pass_options=True,
+)
+@lightbulb.implements(lightbulb.SlashSubCommand)
+async def suggestions_top(ctx: lightbulb.SlashContext, limit: int) -> None:
+    bot: Bot = plugin.bot  # type: ignore
+    config = bot.guild_configs.get(ctx.guild_id)
+    if config is None or config.suggestions_channel_id is None:
+        await ctx.respond(
+            NOT_CONFIGURED_MESSAGE, flags=hikari.MessageFlag.EPHEMERAL
+        )
+        return
+
+    channel_id = config.suggestions_channel_id
+    tallies = bot.suggestion_votes.top(channel_id, limit)
+    if not tallies:
+        await ctx.respond(
+            "**No Suggestions have been submitted yet.**",
+            flags=hikari.MessageFlag.EPHEMERAL,
+        )
+        return
+
+    lines = [
+        f"**{rank}.** {UPVOTE} {tally.upvotes} {DOWNVOTE} {tally.downvotes} "
+        f"(https://discord.com/channels/{ctx.guild_id}/{channel_id}/{tally.message_id})"
+        for rank, tally in enumerate(tallies, start=1)
+    ]
+    if not all(
+        tally.reconciled for tally in bot.suggestion_votes.channel(channel_id)
+    ):
+        reconcile_lazily(ctx.guild_id, channel_id)  # type: ignore
+        lines.append("\n*Votes are still being counted since the restart.*")
+    await ctx.respond(
+        embed=branded_embed(
+            "\n".join(lines), bot.footer_text, bot.display_avatar_url
+        )
+    )
+
+
+@suggestions_command.child
+@lightbulb.command(
+    name="reindex",
+    description="Adds past Suggestions to the duplicate check and recounts their votes.",
+    auto_defer=True,
+    ephemeral=True,
+)
+@lightbulb.implements(lightbulb.SlashSubCommand)
+async def suggestions_reindex(ctx: lightbulb.SlashContext) -> None:
+    bot: Bot = plugin.bot  # type: ignore
+    config = bot.guild_configs.get(ctx.guild_id)
+    if config is None or config.suggestions_channel_id is None:
+        await ctx.respond(NOT_CONFIGURED_MESSAGE)
+        return
+
+    seen, indexed = await sync_channel(
+        config.guild_id, config.suggestions_channel_id
+    )
+    await ctx.respond(
+        f"**Recounted the votes of {seen} Suggestions and added {indexed} "
+        f"to the duplicate check, {len(bot.suggestions)} are indexed now.**"
+    )
+
+
+def load(bot: Bot) -> None:
+    bot.add_plugin(plugin)
+    bot.router.include(routes)
+
+
+def unload(bot: Bot) -> None:
+    bot.router.exclude(routes)
+    bot.remove_plugin(plugin)
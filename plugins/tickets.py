@@ -1,16 +1,42 @@
 import asyncio
+import contextlib
 import datetime
-import os
+import logging
+import time
 from pathlib import Path
-from typing import Literal
+from typing import Any
 
 import hikari
 import lightbulb
 import miru
 from lightbulb import owner_only
-from lightbulb.utils import search
 
-from models import Bot, Emojis
+from config import CONFIG
+from models import (
+    POOL_CHANNEL_NAME,
+    Bot,
+    CategoryPool,
+    CloseRequest,
+    ComponentRouter,
+    GuildConfig,
+    InFlightRegistry,
+    Lane,
+    SharedBucket,
+    StepSkippedError,
+    TaskGraph,
+    Ticket,
+    TicketClaimedError,
+    TicketScheduler,
+    Timer,
+    TokenBucket,
+    TranscriptExporter,
+    WarmPool,
+)
+from models.ticket_categories import (
+    TICKET_CATEGORIES,
+    branded_embed,
+    welcome_embed,
+)
 from models.colour import Colour
 from models.views import (
     TicketPanelView,
@@ -18,11 +44,19 @@ from models.views import (
     TicketCloseConfirmationView,
     CloseRequestConfirmationView,
 )
+from utils import utcnow
+
+logger = logging.getLogger(Path(__file__).stem)
 
 plugin = lightbulb.Plugin(Path(__file__).stem, include_datastore=True)
 plugin.add_checks(owner_only)
+routes = ComponentRouter()
+
+NOT_CONFIGURED_MESSAGE = (
+    "**Tickets are not set up on this Server yet, "
+    "an Administrator can do so with `/ticket-config set`.**"
+)
 
-plugin.d.TICKETS_CATEGORY_ID = int(os.environ["TICKET_CATEGORY_ID"])
 plugin.d.LOADING_EMBED = hikari.Embed(
     description="**Creating Ticket Panel ...**", colour=Colour.INVISIBLE
 )
@@ -30,169 +64,660 @@ plugin.d.SUCCESS_EMBED = hikari.Embed(
     description="**Successfully created the Ticket Panel in {channel}.**",
     colour=Colour.INVISIBLE,
 )
-plugin.d.SUPPORT_ROLE_ID = int(os.environ["SUPPORT_ROLE_ID"])
+plugin.d.in_flight = InFlightRegistry()
+plugin.d.scheduler = TicketScheduler(
+    TokenBucket(CONFIG.TICKET_CREATE_BURST, CONFIG.TICKET_CREATE_PERIOD)
+)
+plugin.d.transcripts = TranscriptExporter(
+    CONFIG.TRANSCRIPTS_PATH, log_channel_id=CONFIG.TRANSCRIPT_CHANNEL_ID
+)
+plugin.d.warm_pools = {}
+plugin.d.category_pools = {}
+plugin.d.reconciler = None
+# Guilds whose channels have been listed since the start.
+plugin.d.indexed = set()
+# Who closes the ticket channels being deleted by close_ticket.
+plugin.d.closing = {}
 
-TicketCategory = Literal[
-    "general_question",
-    "configuration_question",
-    "support_apply",
-    "refund",
-    "custom_bot",
-]
+AUTO_CLOSE_TIMER = "ticket:auto-close"
+CLOSE_REQUEST_TIMER = "ticket:close-request"
+INACTIVITY_TIMER = "ticket:inactivity"
+AUTO_CLOSE_DELAY = datetime.timedelta(seconds=3)
+INDEX_RETRY_DELAY = datetime.timedelta(seconds=30)
 
 
-@plugin.listener(miru.ComponentInteractionCreateEvent)
-async def component_interaction_event_handler(
-    event: miru.ComponentInteractionCreateEvent,
-) -> None:
-    if not event.custom_id.startswith("TICKET:CLOSE-REQUEST:CONFIRM:"):
-        return
+def warm_pool(guild_id: int) -> WarmPool:
+    if (pool := plugin.d.warm_pools.get(guild_id)) is None:
+        pool = plugin.d.warm_pools[guild_id] = WarmPool(
+            plugin.d.scheduler,
+            min_size=CONFIG.TICKET_WARM_POOL_MIN,
+            max_size=CONFIG.TICKET_WARM_POOL_MAX,
+        )
+    return pool
+
 
+def ticket_from_channel(channel: hikari.GuildChannel) -> Ticket | None:
+    # A claimed warm channel was created long before its ticket was opened,
+    # so a known ticket or the claim decides when it was opened.
     bot: Bot = plugin.bot  # type: ignore
-    channel = bot.cache.get_guild_channel(event.channel_id)
-    if not channel:
-        return
+    if (ticket := Ticket.from_channel(channel)) is None:
+        return None
 
-    ticket_owner_id = int(channel.name.split("-")[-1])
-    if event.user.id != ticket_owner_id:
-        await event.interaction.create_initial_response(
-            response_type=hikari.ResponseType.MESSAGE_CREATE,
-            content=f"**Only** the Owner of this Ticket can interact with the close-request. (<@{ticket_owner_id}>)",
-            flags=hikari.MessageFlag.EPHEMERAL,
+    if (known := bot.tickets.get(channel.id)) is not None:
+        ticket.opened_at = known.opened_at
+    elif (
+        claimed_at := warm_pool(channel.guild_id).claimed_at(channel.id)
+    ) is not None:
+        ticket.opened_at = claimed_at
+    return ticket
+
+
+def category_pool(config: GuildConfig) -> CategoryPool:
+    pool = plugin.d.category_pools.get(config.guild_id)
+    if pool is None or pool.primary_id != config.ticket_category_id:
+        pool = plugin.d.category_pools[config.guild_id] = CategoryPool(
+            config.ticket_category_id
         )
-        return
+    return pool
+
+
+def ticket_config_of(channel: hikari.GuildChannel) -> GuildConfig | None:
+    bot: Bot = plugin.bot  # type: ignore
+    config = bot.guild_configs.get(channel.guild_id)
+    if config is None or channel.parent_id not in category_pool(config):
+        return None
+    return config
+
+
+def hidden_overwrites(
+    config: GuildConfig,
+) -> tuple[hikari.PermissionOverwrite]:
+    return (
+        hikari.PermissionOverwrite(
+            id=config.guild_id,
+            type=hikari.PermissionOverwriteType.ROLE,
+            deny=hikari.Permissions.VIEW_CHANNEL,
+        ),
+    )
 
-    await event.app.rest.delete_channel(event.channel_id)
 
+async def open_overflow_category(config: GuildConfig) -> int:
+    bot: Bot = plugin.bot  # type: ignore
+    primary = bot.cache.get_guild_channel(config.ticket_category_id)
+    category = await bot.rest.create_guild_category(
+        config.guild_id,
+        f"{primary.name if primary else 'Tickets'} "
+        f"{len(category_pool(config)) + 1}",
+        permission_overwrites=(
+            *hidden_overwrites(config),
+            hikari.PermissionOverwrite(
+                id=config.support_role_id,
+                type=hikari.PermissionOverwriteType.ROLE,
+                allow=hikari.Permissions.VIEW_CHANNEL,
+            ),
+        ),
+    )
+    bot.store.execute(
+        "INSERT OR REPLACE INTO overflow_categories (category_id, guild_id) "
+        "VALUES (?, ?)",
+        (category.id, config.guild_id),
+    )
+    return category.id
 
-@plugin.listener(miru.ComponentInteractionCreateEvent)
-async def component_interaction_event_handler(
-    event: miru.ComponentInteractionCreateEvent,
+
+async def close_overflow_category(
+    config: GuildConfig, category_id: int
 ) -> None:
-    if not event.custom_id.startswith("TICKET:CLOSE-REQUEST:CANCEL:"):
+    bot: Bot = plugin.bot  # type: ignore
+    pool = category_pool(config)
+    if not pool.is_idle(category_id):
         return
 
+    pool.remove_category(category_id)
+    bot.store.execute(
+        "DELETE FROM overflow_categories WHERE category_id = ?",
+        (category_id,),
+    )
+    try:
+        await bot.rest.delete_channel(category_id)
+    except hikari.NotFoundError:
+        pass
+    logger.info(
+        "Removed the empty overflow category %s of guild %s.",
+        category_id,
+        config.guild_id,
+    )
+
+
+async def create_ticket_channel(
+    config: GuildConfig,
+    name: str,
+    permission_overwrites: tuple[hikari.PermissionOverwrite, ...],
+) -> hikari.GuildTextChannel:
     bot: Bot = plugin.bot  # type: ignore
-    channel = bot.cache.get_guild_channel(event.channel_id)
-    if not channel:
-        return
+    pool = category_pool(config)
+    async with pool.allocate(
+        lambda: open_overflow_category(config)
+    ) as category_id:
+        channel = await bot.rest.create_guild_text_channel(
+            config.guild_id,
+            name=name,
+            category=category_id,
+            permission_overwrites=permission_overwrites,
+        )
+        pool.add(category_id, channel.id)
+        return channel
 
-    ticket_owner_id = int(channel.name.split("-")[-1])
-    if event.user.id != ticket_owner_id:
-        await event.interaction.create_initial_response(
-            response_type=hikari.ResponseType.MESSAGE_CREATE,
-            content=f"**Only** the Owner of this Ticket can interact with the close-request. (<@{ticket_owner_id}>)",
-            flags=hikari.MessageFlag.EPHEMERAL,
+
+async def index_guild(config: GuildConfig) -> None:
+    bot: Bot = plugin.bot  # type: ignore
+    since = utcnow()
+    channels = await bot.rest.fetch_guild_channels(config.guild_id)
+
+    existing = {channel.id for channel in channels}
+    category_ids = [config.ticket_category_id]
+    for row in await bot.store.fetch(
+        "SELECT category_id FROM overflow_categories WHERE guild_id = ?",
+        (config.guild_id,),
+    ):
+        if row["category_id"] in existing:
+            category_ids.append(row["category_id"])
+        else:
+            bot.store.execute(
+                "DELETE FROM overflow_categories WHERE category_id = ?",
+                (row["category_id"],),
+            )
+
+    pool = warm_pool(config.guild_id)
+    placements: list[tuple[int, int]] = []
+    tickets: list[Ticket] = []
+    for channel in channels:
+        if channel.parent_id not in category_ids:
+            continue
+
+        placements.append((channel.parent_id, channel.id))
+        if channel.name == POOL_CHANNEL_NAME:
+            # Channels claimed since the listing are still named like this.
+            if channel.id not in bot.tickets:
+                pool.add(channel.id)
+        elif ticket := ticket_from_channel(channel):
+            tickets.append(ticket)
+
+    categories = category_pool(config)
+    categories.reset(category_ids, placements, since=since)
+    bot.tickets.replace_guild(config.guild_id, tickets, since=since)
+    plugin.d.indexed.add(config.guild_id)
+    bot.close_requests.retain(
+        lambda request: request.guild_id != config.guild_id
+        or request.channel_id in bot.tickets
+    )
+    for ticket in tickets:
+        if bot.timers.get(INACTIVITY_TIMER, ticket.channel_id) is None:
+            watch_inactivity(ticket, ticket.opened_at)
+
+    if bot.coordinator is not None:
+        await bot.coordinator.sync_guild(
+            config.guild_id,
+            [(ticket.owner_id, ticket.channel_id) for ticket in tickets],
+            since=since,
         )
-        return
 
-    embed = event.interaction.message.embeds[0]
-    embed.description = "**The close-request was declined.**"
-    embed.colour = Colour.NEON_RED
+    for category_id in categories.idle_overflow_ids():
+        await close_overflow_category(config, category_id)
 
-    await bot.rest.edit_message(
-        channel.id, event.interaction.message, embed=embed, components=[]
+    pool.start(
+        lambda: create_ticket_channel(
+            config, POOL_CHANNEL_NAME, hidden_overwrites(config)
+        ),
+        bot.rest.delete_channel,
     )
 
-    await event.interaction.create_initial_response(
-        response_type=hikari.ResponseType.MESSAGE_CREATE,
-        content=f"**Declined the close-request.**",
-        flags=hikari.MessageFlag.EPHEMERAL,
+
+async def index_guilds(configs: tuple[GuildConfig, ...]) -> None:
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *map(index_guild, configs), return_exceptions=True
     )
+    for config, result in zip(configs, results):
+        if isinstance(result, Exception):
+            logger.error(
+                "Failed to index the Tickets of guild %s.",
+                config.guild_id,
+                exc_info=result,
+            )
+    logger.info(
+        "Indexed the Tickets of %d guilds in %.2fs.",
+        len(configs),
+        time.perf_counter() - start,
+    )
+
+
+@plugin.listener(hikari.StartedEvent)
+async def on_started(_: hikari.StartedEvent) -> None:
+    bot: Bot = plugin.bot  # type: ignore
+    plugin.d.scheduler.start()
+
+    # Every worker of a cluster indexes the guilds on its own shards.
+    configs = tuple(
+        config
+        for config in bot.guild_configs
+        if bot.owns_guild(config.guild_id)
+    )
+    if bot.snapshots.restored:
+        # Interactions are served from the snapshot meanwhile.
+        plugin.d.reconciler = asyncio.create_task(index_guilds(configs))
+    else:
+        await index_guilds(configs)
+
 
+@plugin.listener(hikari.StoppingEvent)
+async def on_stopping(_: hikari.StoppingEvent) -> None:
+    if plugin.d.reconciler is not None:
+        plugin.d.reconciler.cancel()
+    for pool in plugin.d.warm_pools.values():
+        await pool.close()
+    await plugin.d.scheduler.close()
 
-@plugin.listener(miru.ComponentInteractionCreateEvent)
-async def component_interaction_event_handler(
-    event: miru.ComponentInteractionCreateEvent,
+
+@plugin.listener(hikari.GuildChannelCreateEvent)
+async def on_guild_channel_create(
+    event: hikari.GuildChannelCreateEvent,
 ) -> None:
-    if event.custom_id != "TICKET:CANCEL:CLOSE":
+    bot: Bot = plugin.bot  # type: ignore
+    if (config := ticket_config_of(event.channel)) is None:
         return
 
-    await event.app.rest.delete_message(event.channel_id, event.message)
+    category_pool(config).add(event.channel.parent_id, event.channel.id)
+    if ticket := ticket_from_channel(event.channel):
+        bot.tickets.add(ticket)
 
 
-@plugin.listener(miru.ComponentInteractionCreateEvent)
-async def component_interaction_event_handler(
-    event: miru.ComponentInteractionCreateEvent,
+@plugin.listener(hikari.GuildChannelUpdateEvent)
+async def on_guild_channel_update(
+    event: hikari.GuildChannelUpdateEvent,
 ) -> None:
-    if event.custom_id != "TICKET:CONFIRM:CLOSE":
-        return
+    bot: Bot = plugin.bot  # type: ignore
+    if (config := bot.guild_configs.get(event.guild_id)) is not None:
+        categories = category_pool(config)
+        previous = categories.discard(event.channel_id)
+        categories.add(event.channel.parent_id, event.channel_id)
+        if previous is not None and categories.is_idle(previous):
+            await close_overflow_category(config, previous)
 
-    await event.app.rest.delete_channel(event.channel_id)
+    if ticket_config_of(event.channel) and (
+        ticket := ticket_from_channel(event.channel)
+    ):
+        bot.tickets.add(ticket)
+    else:
+        await forget_ticket(event.channel_id)
 
 
-@plugin.listener(miru.ComponentInteractionCreateEvent)
-async def component_interaction_event_handler(
-    event: miru.ComponentInteractionCreateEvent,
+@plugin.listener(hikari.GuildChannelDeleteEvent)
+async def on_guild_channel_delete(
+    event: hikari.GuildChannelDeleteEvent,
 ) -> None:
-    if not event.custom_id.startswith("TICKET:CLOSE:"):
+    bot: Bot = plugin.bot  # type: ignore
+    warm_pool(event.guild_id).discard(event.channel_id)
+    bot.close_requests.remove(event.channel_id)
+    bot.timers.cancel(CLOSE_REQUEST_TIMER, event.channel_id)
+    if await forget_ticket(event.channel_id) is not None:
+        bot.store.record_close(
+            event.channel_id, plugin.d.closing.get(event.channel_id)
+        )
+
+    if (config := bot.guild_configs.get(event.guild_id)) is None:
         return
 
-    embed = (
-        hikari.Embed(
-            description=f"**Please confirm that you want to close this Ticket.**",
-            colour=Colour.BLURPLE,
-            timestamp=datetime.datetime.now(datetime.timezone.utc),
+    categories = category_pool(config)
+    if event.channel_id in categories:
+        # An overflow category deleted by hand.
+        categories.remove_category(event.channel_id)
+        bot.store.execute(
+            "DELETE FROM overflow_categories WHERE category_id = ?",
+            (event.channel_id,),
         )
-        .set_footer(
-            text=plugin.bot.footer_text, icon=plugin.bot.display_avatar_url  # type: ignore
+    elif (
+        category_id := categories.discard(event.channel_id)
+    ) is not None and categories.is_idle(category_id):
+        await close_overflow_category(config, category_id)
+
+
+async def forget_ticket(channel_id: int) -> Ticket | None:
+    bot: Bot = plugin.bot  # type: ignore
+    ticket = bot.tickets.remove(channel_id)
+    bot.timers.cancel(AUTO_CLOSE_TIMER, channel_id)
+    bot.timers.cancel(INACTIVITY_TIMER, channel_id)
+    if ticket is not None and bot.coordinator is not None:
+        await bot.coordinator.release_ticket(
+            ticket.guild_id, ticket.owner_id, ticket.channel_id
+        )
+    return ticket
+
+
+@routes.route(
+    "TICKET:CLOSE-REQUEST:CONFIRM:{user_id:int}",
+    defer=hikari.ResponseType.DEFERRED_MESSAGE_UPDATE,
+)
+async def close_request_confirm(
+    event: miru.ComponentInteractionCreateEvent, user_id: int
+) -> None:
+    if event.user.id != user_id:
+        await event.interaction.execute(
+            f"**Only** the Owner of this Ticket can interact with the close-request. (<@{user_id}>)",
+            flags=hikari.MessageFlag.EPHEMERAL,
         )
-        .set_author(
-            name="DayZ++",
-            icon=plugin.bot.display_avatar_url,  # type: ignore
-            url="https://discord.com/users/867376409965363200",
+        return
+
+    await close_ticket(event.channel_id, event.user.id)
+
+
+@routes.route(
+    "TICKET:CLOSE-REQUEST:CANCEL:{user_id:int}",
+    defer=hikari.ResponseType.DEFERRED_MESSAGE_UPDATE,
+)
+async def close_request_cancel(
+    event: miru.ComponentInteractionCreateEvent, user_id: int
+) -> None:
+    if event.user.id != user_id:
+        await event.interaction.execute(
+            f"**Only** the Owner of this Ticket can interact with the close-request. (<@{user_id}>)",
+            flags=hikari.MessageFlag.EPHEMERAL,
         )
+        return
+
+    bot: Bot = plugin.bot  # type: ignore
+    bot.close_requests.remove(event.channel_id)
+    bot.timers.cancel(CLOSE_REQUEST_TIMER, event.channel_id)
+    embed = event.interaction.message.embeds[0]
+    embed.description = "**The close-request was declined.**"
+    embed.colour = Colour.NEON_RED
+
+    await event.interaction.edit_initial_response(embed=embed, components=[])
+    await event.interaction.execute(
+        f"**Declined the close-request.**",
+        flags=hikari.MessageFlag.EPHEMERAL,
     )
 
-    await event.interaction.create_initial_response(
-        response_type=hikari.ResponseType.MESSAGE_CREATE,
-        embed=embed,
+
+@routes.route(
+    "TICKET:CANCEL:CLOSE", defer=hikari.ResponseType.DEFERRED_MESSAGE_UPDATE
+)
+async def close_cancel(event: miru.ComponentInteractionCreateEvent) -> None:
+    await event.app.rest.delete_message(event.channel_id, event.message)
+
+
+@routes.route(
+    "TICKET:CONFIRM:CLOSE", defer=hikari.ResponseType.DEFERRED_MESSAGE_UPDATE
+)
+async def close_confirm(event: miru.ComponentInteractionCreateEvent) -> None:
+    await close_ticket(event.channel_id, event.user.id)
+
+
+@routes.route(
+    "TICKET:CLOSE:{channel_id:int}",
+    defer=hikari.ResponseType.DEFERRED_MESSAGE_CREATE,
+)
+async def close(
+    event: miru.ComponentInteractionCreateEvent, channel_id: int
+) -> None:
+    await event.interaction.edit_initial_response(
+        embed=branded(
+            "**Please confirm that you want to close this Ticket.**"
+        ),
         components=TicketCloseConfirmationView().build(),
     )
 
 
-@plugin.listener(miru.ComponentInteractionCreateEvent)
-async def component_interaction_event_handler(
-    event: miru.ComponentInteractionCreateEvent,
-) -> None:
+@routes.route(
+    "ticket_panel",
+    defer=hikari.ResponseType.DEFERRED_MESSAGE_CREATE,
+    flags=hikari.MessageFlag.EPHEMERAL,
+    shed=True,
+)
+async def ticket_panel(event: miru.ComponentInteractionCreateEvent) -> None:
     bot: Bot = plugin.bot  # type: ignore
-    if event.custom_id != "ticket_panel":
+    if (config := bot.guild_configs.get(event.guild_id)) is None:
+        await event.interaction.edit_initial_response(
+            embed=branded(NOT_CONFIGURED_MESSAGE)
+        )
         return
 
-    await event.message.edit(embed=event.message.embeds[0])
-
     user = event.user
     if (
-        channel := search.get(
-            bot.cache.get_guild_channels_view_for_guild(
-                event.guild_id
-            ).values(),
-            name=f"ticket-{user.username}",
-        )
+        ticket := bot.tickets.get_by_owner(event.guild_id, user.id)
     ) is not None:
-        embed = (
-            hikari.Embed(
-                description=f"**You already have an open Ticket. ({channel.mention})**",
-                colour=Colour.BLURPLE,
-                timestamp=datetime.datetime.now(datetime.timezone.utc),
-            )
-            .set_footer(
-                text=plugin.bot.footer_text, icon=plugin.bot.display_avatar_url  # type: ignore
+        await reply_already_open(event, ticket.channel_id)
+        return
+
+    try:
+        ticket_channel, created = await plugin.d.in_flight.run(
+            (event.guild_id, user.id),
+            lambda: open_ticket_exclusively(event, config),
+        )
+    except TicketClaimedError as error:
+        if error.channel_id is not None:
+            await reply_already_open(event, error.channel_id)
+        else:
+            await event.interaction.edit_initial_response(
+                embed=branded("**Your Ticket is already being created ...**")
             )
-            .set_author(
-                name="DayZ++",
-                icon=plugin.bot.display_avatar_url,  # type: ignore
-                url="https://discord.com/users/867376409965363200",
+        return
+
+    if not created:
+        await reply_already_open(event, ticket_channel.id)
+
+
+async def close_ticket(channel_id: int, closed_by: int | None) -> None:
+    bot: Bot = plugin.bot  # type: ignore
+    try:
+        await plugin.d.transcripts.export(bot.rest, channel_id)
+    except Exception:
+        logger.exception("Failed to export the transcript of %s.", channel_id)
+
+    # Only recorded once the channel is gone, the delete event may record
+    # it first.
+    plugin.d.closing[channel_id] = closed_by
+    try:
+        await bot.rest.delete_channel(channel_id)
+    finally:
+        plugin.d.closing.pop(channel_id, None)
+    bot.store.record_close(channel_id, closed_by)
+
+
+def inactivity_timeout() -> datetime.timedelta | None:
+    if CONFIG.TICKET_INACTIVITY_HOURS <= 0:
+        return None
+    return datetime.timedelta(hours=CONFIG.TICKET_INACTIVITY_HOURS)
+
+
+def reminder_lead(timeout: datetime.timedelta) -> datetime.timedelta:
+    # How long before the close the owner is pinged, 0 for never.
+    return min(
+        datetime.timedelta(hours=max(CONFIG.TICKET_REMINDER_HOURS, 0)),
+        timeout,
+    )
+
+
+def watch_inactivity(
+    ticket: Ticket,
+    active_at: datetime.datetime,
+    *,
+    reminder_id: int | None = None,
+    quiet: bool = False,
+) -> None:
+    # The timer fires when the reminder or the close would be due, only
+    # then is the channel's last message fetched to tell whether it has
+    # been active meanwhile. A pending reminder remembers the activity it
+    # was sent for, since it is the channel's last message itself.
+    bot: Bot = plugin.bot  # type: ignore
+    if (timeout := inactivity_timeout()) is None:
+        return
+
+    due = active_at + timeout
+    if reminder_id is None:
+        due -= reminder_lead(timeout)
+    payload: dict[str, Any] = {"active_at": active_at.timestamp()}
+    if reminder_id is not None:
+        payload["reminder_id"] = reminder_id
+    if quiet:
+        payload["quiet"] = True
+    bot.timers.schedule(
+        INACTIVITY_TIMER, ticket.channel_id, ticket.guild_id, due, payload
+    )
+
+
+def ticket_of(timer: Timer) -> Ticket | None:
+    # Timers start before the guilds are indexed. A ticket missing from
+    # the snapshot keeps its timer until its guild has been listed.
+    bot: Bot = plugin.bot  # type: ignore
+    if (ticket := bot.tickets.get(timer.key)) is None and (
+        timer.guild_id not in plugin.d.indexed
+        and timer.guild_id in bot.guild_configs
+    ):
+        bot.timers.schedule(
+            timer.kind,
+            timer.key,
+            timer.guild_id,
+            utcnow() + INDEX_RETRY_DELAY,
+            timer.payload,
+        )
+    return ticket
+
+
+async def check_inactivity(timer: Timer) -> None:
+    bot: Bot = plugin.bot  # type: ignore
+    if (timeout := inactivity_timeout()) is None or (
+        ticket := ticket_of(timer)
+    ) is None:
+        return
+
+    try:
+        channel = await bot.rest.fetch_channel(ticket.channel_id)
+    except hikari.NotFoundError:
+        return
+
+    now = utcnow()
+    last_message_id = getattr(channel, "last_message_id", None)
+    reminder_id = timer.payload.get("reminder_id")
+    quiet = False
+    if reminder_id is not None and last_message_id == reminder_id:
+        active_at = datetime.datetime.fromtimestamp(
+            timer.payload["active_at"], datetime.timezone.utc
+        )
+        quiet = timer.payload.get("quiet", False)
+    elif (
+        last_message_id is not None
+        and last_message_id.created_at > ticket.opened_at
+    ):
+        reminder_id = None
+        active_at = last_message_id.created_at
+    else:
+        # Nothing was posted since the open, e.g. the welcome message is
+        # still on its way or failed. The quiet time only counts from the
+        # first check that saw this, never from the open time.
+        reminder_id, quiet = None, True
+        active_at = (
+            datetime.datetime.fromtimestamp(
+                timer.payload["active_at"], datetime.timezone.utc
             )
+            if timer.payload.get("quiet")
+            else now
         )
-        await event.interaction.create_initial_response(
-            response_type=hikari.ResponseType.MESSAGE_CREATE,
-            embed=embed,
-            flags=hikari.MessageFlag.EPHEMERAL,
+
+    close_at = active_at + timeout
+    if now >= close_at:
+        logger.info(
+            "Closing the Ticket %s after %s without activity.",
+            ticket.channel_id,
+            timeout,
         )
+        await close_ticket(ticket.channel_id, None)
         return
 
-    ticket_category: TicketCategory = event.interaction.values[0]  # type: ignore
+    if reminder_id is None and now >= close_at - reminder_lead(timeout):
+        reminder = await bot.rest.create_message(
+            ticket.channel_id,
+            f"<@{ticket.owner_id}>",
+            embed=branded(
+                f"**This Ticket will be closed <t:{int(close_at.timestamp())}:R> "
+                "unless there is new activity.**"
+            ),
+            user_mentions=True,
+        )
+        reminder_id = reminder.id
+    watch_inactivity(ticket, active_at, reminder_id=reminder_id, quiet=quiet)
+
+
+async def auto_close(timer: Timer) -> None:
+    if ticket_of(timer) is not None:
+        await close_ticket(timer.key, timer.payload.get("closed_by"))
+
+
+async def expire_close_request(timer: Timer) -> None:
+    bot: Bot = plugin.bot  # type: ignore
+    bot.close_requests.remove(timer.key)
+    embed = branded("**The close-request expired.**")
+    embed.colour = Colour.NEON_RED
+    with contextlib.suppress(hikari.NotFoundError):
+        await bot.rest.edit_message(
+            timer.key, timer.payload["message_id"], embed=embed, components=[]
+        )
+
+
+def branded(description: str) -> hikari.Embed:
+    bot: Bot = plugin.bot  # type: ignore
+    return branded_embed(description, bot.footer_text, bot.display_avatar_url)
+
+
+async def reply_already_open(
+    event: miru.ComponentInteractionCreateEvent, channel_id: int
+) -> None:
+    await asyncio.gather(
+        event.message.edit(embed=event.message.embeds[0]),
+        event.interaction.edit_initial_response(
+            embed=branded(
+                f"**You already have an open Ticket. (<#{channel_id}>)**"
+            )
+        ),
+    )
+
+
+async def open_ticket_exclusively(
+    event: miru.ComponentInteractionCreateEvent, config: GuildConfig
+) -> hikari.GuildTextChannel:
+    # Within a process ``in_flight`` coalesces clicks, across the cluster the
+    # coordinator's claim on (guild, user) keeps it to one ticket.
+    bot: Bot = plugin.bot  # type: ignore
+    if (coordinator := bot.coordinator) is None:
+        return await open_ticket(event, config)
+
+    guild_id, user_id = event.guild_id, event.user.id
+    claimed, channel_id = await coordinator.claim_ticket(
+        guild_id, user_id  # type: ignore
+    )
+    if not claimed:
+        raise TicketClaimedError(channel_id)
+
+    try:
+        ticket_channel = await open_ticket(event, config)
+    except BaseException:
+        await coordinator.release_ticket(guild_id, user_id)  # type: ignore
+        raise
+
+    await coordinator.bind_ticket(
+        guild_id, user_id, ticket_channel.id  # type: ignore
+    )
+    return ticket_channel
+
+
+async def open_ticket(
+    event: miru.ComponentInteractionCreateEvent, config: GuildConfig
+) -> hikari.GuildTextChannel:
+    bot: Bot = plugin.bot  # type: ignore
+    user = event.user
+    category = TICKET_CATEGORIES[event.interaction.values[0]]
+    role_ids = event.member.role_ids  # type: ignore
+
     permission_overwrites = (
         hikari.PermissionOverwrite(
             id=event.guild_id,
@@ -209,360 +734,103 @@ async def component_interaction_event_handler(
             | hikari.Permissions.VIEW_CHANNEL,
         ),
         hikari.PermissionOverwrite(
-            id=plugin.d.SUPPORT_ROLE_ID,
+            id=config.support_role_id,
             type=hikari.PermissionOverwriteType.ROLE,
             allow=hikari.Permissions.all_permissions(),
         ),
     )
 
-    user_is_verified_admin: bool = 904037799316058112 in event.member.role_ids
-    shop_feature_owner: bool = 945356446076395520 in event.member.role_ids
-    premium_feature_owner: bool = 1003908285465899059 in event.member.role_ids
+    lane = Lane.PRIORITY if config.is_priority(role_ids) else Lane.NORMAL
+    pool = warm_pool(config.guild_id)
 
-    if ticket_category == "general_question":
-        ticket_channel = await bot.rest.create_guild_text_channel(
-            event.guild_id,
-            name=f"ticket-{user.username}-{user.id}",
-            category=plugin.d.TICKETS_CATEGORY_ID,
-            permission_overwrites=permission_overwrites,
-        )
-        ticket_channel_embed = (
-            hikari.Embed(
-                description=f"""
-                            > **User Information**
-                            > • Verified Owner | Admin: {Emojis.CHECK if user_is_verified_admin else Emojis.CROSS}
-                            > • Premium Feature Owner: {Emojis.CHECK if premium_feature_owner else Emojis.CROSS}
-                            > • Shop Feature Owner: {Emojis.CHECK if shop_feature_owner else Emojis.CROSS}
-                            > **Ticket Information**
-                            > • Category: General Question
-                            """,
-                colour=Colour.BLURPLE,
-                timestamp=datetime.datetime.now(datetime.timezone.utc),
-            )
-            .set_footer(
-                text=plugin.bot.footer_text, icon=plugin.bot.display_avatar_url  # type: ignore
-            )
-            .set_author(
-                name="DayZ++",
-                icon=plugin.bot.display_avatar_url,  # type: ignore
-                url="https://discord.com/users/867376409965363200",
-            )
-        )
-        await bot.rest.create_message(
-            ticket_channel.id,
-            "<@609077285584240715>",
-            embed=ticket_channel_embed,
-            components=TicketCloseView(channel_id=ticket_channel.id).build(),
-        )
+    async def claim_warm_channel() -> hikari.GuildTextChannel | None:
+        while (channel_id := pool.take()) is not None:
+            try:
+                return await bot.rest.edit_channel(  # type: ignore
+                    channel_id,
+                    name=category.channel_name(user),
+                    permission_overwrites=permission_overwrites,
+                )
+            except hikari.NotFoundError:
+                continue
+            except BaseException:
+                pool.release(channel_id)
+                raise
+        return None
 
-        embed = (
-            hikari.Embed(
-                description=f"**Successfully created your Ticket in {ticket_channel.mention}.**",
-                colour=Colour.BLURPLE,
-                timestamp=datetime.datetime.now(datetime.timezone.utc),
-            )
-            .set_footer(
-                text=plugin.bot.footer_text, icon=plugin.bot.display_avatar_url  # type: ignore
+    async def create_channel() -> hikari.GuildTextChannel:
+        if (ticket_channel := await claim_warm_channel()) is None:
+            pending, position = plugin.d.scheduler.submit(
+                lambda: create_ticket_channel(
+                    config,
+                    category.channel_name(user),
+                    permission_overwrites,
+                ),
+                lane,
             )
-            .set_author(
-                name="DayZ++",
-                icon=plugin.bot.display_avatar_url,  # type: ignore
-                url="https://discord.com/users/867376409965363200",
-            )
-        )
-        await event.interaction.create_initial_response(
-            response_type=hikari.ResponseType.MESSAGE_CREATE,
-            embed=embed,
-            flags=hikari.MessageFlag.EPHEMERAL,
-        )
+            if position:
+                await event.interaction.edit_initial_response(
+                    embed=branded(
+                        f"**Many Tickets are being opened right now, you are #{position} in the queue ...**"
+                    )
+                )
 
-    elif ticket_category == "configuration_question":
-        ticket_channel = await bot.rest.create_guild_text_channel(
-            event.guild_id,
-            name=f"ticket-{user.username}-{user.id}",
-            category=plugin.d.TICKETS_CATEGORY_ID,
-            permission_overwrites=permission_overwrites,
-        )
-        ticket_channel_embed = (
-            hikari.Embed(
-                description=f"""
-                            > **User Information**
-                            > • Verified Owner | Admin: {Emojis.CHECK if user_is_verified_admin else Emojis.CROSS}
-                            > • Premium Feature Owner: {Emojis.CHECK if premium_feature_owner else Emojis.CROSS}
-                            > • Shop Feature Owner: {Emojis.CHECK if shop_feature_owner else Emojis.CROSS}
-                            > **Ticket Information**
-                            > • Category: Configuration Question
-                            """,
-                colour=Colour.BLURPLE,
-                timestamp=datetime.datetime.now(datetime.timezone.utc),
-            )
-            .set_footer(
-                text=plugin.bot.footer_text, icon=plugin.bot.display_avatar_url  # type: ignore
-            )
-            .set_author(
-                name="DayZ++",
-                icon=plugin.bot.display_avatar_url,  # type: ignore
-                url="https://discord.com/users/867376409965363200",
-            )
-        )
-        await bot.rest.create_message(
-            ticket_channel.id,
-            "<@609077285584240715>",
-            embed=ticket_channel_embed,
-            components=TicketCloseView(channel_id=ticket_channel.id).build(),
-        )
+            ticket_channel = await pending
 
-        embed = (
-            hikari.Embed(
-                description=f"**Successfully created your Ticket in {ticket_channel.mention}.**",
-                colour=Colour.BLURPLE,
-                timestamp=datetime.datetime.now(datetime.timezone.utc),
-            )
-            .set_footer(
-                text=plugin.bot.footer_text, icon=plugin.bot.display_avatar_url  # type: ignore
-            )
-            .set_author(
-                name="DayZ++",
-                icon=plugin.bot.display_avatar_url,  # type: ignore
-                url="https://discord.com/users/867376409965363200",
-            )
-        )
-        await event.interaction.create_initial_response(
-            response_type=hikari.ResponseType.MESSAGE_CREATE,
-            embed=embed,
-            flags=hikari.MessageFlag.EPHEMERAL,
-        )
+        pool.opened()
+        ticket = ticket_from_channel(ticket_channel)
+        bot.tickets.add(ticket)  # type: ignore
+        bot.store.record_open(ticket, category.value)  # type: ignore
+        watch_inactivity(ticket, utcnow())  # type: ignore
+        return ticket_channel
 
-    elif ticket_category == "support_apply":
-        ticket_channel = await bot.rest.create_guild_text_channel(
-            event.guild_id,
-            name=f"ticket-{user.username}-{user.id}",
-            category=plugin.d.TICKETS_CATEGORY_ID,
-            permission_overwrites=permission_overwrites,
-        )
-        ticket_channel_embed = (
-            hikari.Embed(
-                description=f"""
-                            > **User Information**
-                            > • Verified Owner | Admin: {Emojis.CHECK if user_is_verified_admin else Emojis.CROSS}
-                            > • Premium Feature Owner: {Emojis.CHECK if premium_feature_owner else Emojis.CROSS}
-                            > • Shop Feature Owner: {Emojis.CHECK if shop_feature_owner else Emojis.CROSS}
-                            > **Ticket Information**
-                            > • Category: Support Application
-                            """,
-                colour=Colour.BLURPLE,
-                timestamp=datetime.datetime.now(datetime.timezone.utc),
-            )
-            .set_footer(
-                text=plugin.bot.footer_text, icon=plugin.bot.display_avatar_url  # type: ignore
-            )
-            .set_author(
-                name="DayZ++",
-                icon=plugin.bot.display_avatar_url,  # type: ignore
-                url="https://discord.com/users/867376409965363200",
-            )
-        )
-        await bot.rest.create_message(
-            ticket_channel.id,
-            "<@609077285584240715>",
-            embed=ticket_channel_embed,
-            components=TicketCloseView(channel_id=ticket_channel.id).build(),
-        )
-
-        embed = (
-            hikari.Embed(
-                description=f"**Successfully created your Ticket in {ticket_channel.mention}.**",
-                colour=Colour.BLURPLE,
-                timestamp=datetime.datetime.now(datetime.timezone.utc),
-            )
-            .set_footer(
-                text=plugin.bot.footer_text, icon=plugin.bot.display_avatar_url  # type: ignore
-            )
-            .set_author(
-                name="DayZ++",
-                icon=plugin.bot.display_avatar_url,  # type: ignore
-                url="https://discord.com/users/867376409965363200",
-            )
-        )
-        await event.interaction.create_initial_response(
-            response_type=hikari.ResponseType.MESSAGE_CREATE,
-            embed=embed,
-            flags=hikari.MessageFlag.EPHEMERAL,
-        )
-
-    elif ticket_category == "bug_report":
-        ticket_channel = await bot.rest.create_guild_text_channel(
-            event.guild_id,
-            name=f"ticket-{user.username}-{user.id}",
-            category=plugin.d.TICKETS_CATEGORY_ID,
-            permission_overwrites=permission_overwrites,
-        )
-        ticket_channel_embed = (
-            hikari.Embed(
-                description=f"""
-                            > **User Information**
-                            > • Verified Owner | Admin: {Emojis.CHECK if user_is_verified_admin else Emojis.CROSS}
-                            > • Premium Feature Owner: {Emojis.CHECK if premium_feature_owner else Emojis.CROSS}
-                            > • Shop Feature Owner: {Emojis.CHECK if shop_feature_owner else Emojis.CROSS}
-                            > **Ticket Information**
-                            > • Category: Bug Report
-                            """,
-                colour=Colour.BLURPLE,
-                timestamp=datetime.datetime.now(datetime.timezone.utc),
-            )
-            .set_footer(
-                text=plugin.bot.footer_text, icon=plugin.bot.display_avatar_url  # type: ignore
-            )
-            .set_author(
-                name="DayZ++",
-                icon=plugin.bot.display_avatar_url,  # type: ignore
-                url="https://discord.com/users/867376409965363200",
-            )
-        )
-        await bot.rest.create_message(
-            ticket_channel.id,
-            "<@609077285584240715>",
-            embed=ticket_channel_embed,
-            components=TicketCloseView(channel_id=ticket_channel.id).build(),
-            user_mentions=True,
-        )
-
-        embed = (
-            hikari.Embed(
-                description=f"**Successfully created your Ticket in {ticket_channel.mention}.**",
-                colour=Colour.BLURPLE,
-                timestamp=datetime.datetime.now(datetime.timezone.utc),
-            )
-            .set_footer(
-                text=plugin.bot.footer_text, icon=plugin.bot.display_avatar_url  # type: ignore
-            )
-            .set_author(
-                name="DayZ++",
-                icon=plugin.bot.display_avatar_url,  # type: ignore
-                url="https://discord.com/users/867376409965363200",
-            )
-        )
-        await event.interaction.create_initial_response(
-            response_type=hikari.ResponseType.MESSAGE_CREATE,
-            embed=embed,
-            flags=hikari.MessageFlag.EPHEMERAL,
-        )
-
-    elif ticket_category == "custom_bot":
-        ticket_channel = await bot.rest.create_guild_text_channel(
-            event.guild_id,
-            name=f"ticket-{user.username}-{user.id}",
-            category=plugin.d.TICKETS_CATEGORY_ID,
-            permission_overwrites=permission_overwrites,
-        )
-        ticket_channel_embed = (
-            hikari.Embed(
-                description=f"""
-                                    > **User Information**
-                                    > • Verified Owner | Admin: {Emojis.CHECK if user_is_verified_admin else Emojis.CROSS}
-                                    > • Premium Feature Owner: {Emojis.CHECK if premium_feature_owner else Emojis.CROSS}
-                                    > • Shop Feature Owner: {Emojis.CHECK if shop_feature_owner else Emojis.CROSS}
-                                    > **Ticket Information**
-                                    > • Category: Custom Bot
-                                    """,
-                colour=Colour.BLURPLE,
-                timestamp=datetime.datetime.now(datetime.timezone.utc),
-            )
-            .set_footer(
-                text=plugin.bot.footer_text, icon=plugin.bot.display_avatar_url  # type: ignore
-            )
-            .set_author(
-                name="DayZ++",
-                icon=plugin.bot.display_avatar_url,  # type: ignore
-                url="https://discord.com/users/867376409965363200",
-            )
-        )
-        await bot.rest.create_message(
+    graph = TaskGraph()
+    graph.add(
+        "panel", lambda: event.message.edit(embed=event.message.embeds[0])
+    )
+    graph.add("channel", create_channel)
+    graph.add(
+        "welcome",
+        lambda ticket_channel: bot.rest.create_message(
             ticket_channel.id,
-            "<@609077285584240715>",
-            embed=ticket_channel_embed,
+            config.staff_ping or hikari.UNDEFINED,
+            embed=welcome_embed(
+                category,
+                verified_admin=config.verified_admin_role_id in role_ids,
+                premium=config.premium_role_id in role_ids,
+                shop=config.shop_role_id in role_ids,
+                footer_text=bot.footer_text,
+                icon=bot.display_avatar_url,
+            ),
             components=TicketCloseView(channel_id=ticket_channel.id).build(),
-            user_mentions=True,
-        )
-
-        embed = (
-            hikari.Embed(
-                description=f"**Successfully created your Ticket in {ticket_channel.mention}.**",
-                colour=Colour.BLURPLE,
-                timestamp=datetime.datetime.now(datetime.timezone.utc),
-            )
-            .set_footer(
-                text=plugin.bot.footer_text, icon=plugin.bot.display_avatar_url  # type: ignore
-            )
-            .set_author(
-                name="DayZ++",
-                icon=plugin.bot.display_avatar_url,  # type: ignore
-                url="https://discord.com/users/867376409965363200",
+            user_mentions=category.ping_staff,
+            role_mentions=category.ping_staff,
+        ),
+        after=("channel",),
+    )
+    graph.add(
+        "confirmation",
+        lambda ticket_channel: event.interaction.edit_initial_response(
+            embed=branded(
+                f"**Successfully created your Ticket in {ticket_channel.mention}.**"
             )
-        )
-        await event.interaction.create_initial_response(
-            response_type=hikari.ResponseType.MESSAGE_CREATE,
-            embed=embed,
-            flags=hikari.MessageFlag.EPHEMERAL,
-        )
+        ),
+        after=("channel",),
+    )
+    result = await graph.run()
 
-    elif ticket_category == "refund":
-        ticket_channel = await bot.rest.create_guild_text_channel(
-            event.guild_id,
-            name=f"ticket-{user.username}-{user.id}",
-            category=plugin.d.TICKETS_CATEGORY_ID,
-            permission_overwrites=permission_overwrites,
-        )
-        ticket_channel_embed = (
-            hikari.Embed(
-                description=f"""
-                            > **User Information**
-                            > • Verified Owner | Admin: {Emojis.CHECK if user_is_verified_admin else Emojis.CROSS}
-                            > • Premium Feature Owner: {Emojis.CHECK if premium_feature_owner else Emojis.CROSS}
-                            > • Shop Feature Owner: {Emojis.CHECK if shop_feature_owner else Emojis.CROSS}
-                            > **Ticket Information**
-                            > • Category: Refund
-                            """,
-                colour=Colour.BLURPLE,
-                timestamp=datetime.datetime.now(datetime.timezone.utc),
-            )
-            .set_footer(
-                text=plugin.bot.footer_text, icon=plugin.bot.display_avatar_url  # type: ignore
+    for step, error in result.errors.items():
+        if step != "channel" and not isinstance(error, StepSkippedError):
+            logger.error(
+                "Failed to run %r while opening a Ticket for %s.",
+                step,
+                user.id,
+                exc_info=error,
             )
-            .set_author(
-                name="DayZ++",
-                icon=plugin.bot.display_avatar_url,  # type: ignore
-                url="https://discord.com/users/867376409965363200",
-            )
-        )
-        await bot.rest.create_message(
-            ticket_channel.id,
-            "<@609077285584240715>",
-            embed=ticket_channel_embed,
-            components=TicketCloseView(channel_id=ticket_channel.id).build(),
-            user_mentions=True,
-        )
 
-        embed = (
-            hikari.Embed(
-                description=f"**Successfully created your Ticket in {ticket_channel.mention}.**",
-                colour=Colour.BLURPLE,
-                timestamp=datetime.datetime.now(datetime.timezone.utc),
-            )
-            .set_footer(
-                text=plugin.bot.footer_text, icon=plugin.bot.display_avatar_url  # type: ignore
-            )
-            .set_author(
-                name="DayZ++",
-                icon=plugin.bot.display_avatar_url,  # type: ignore
-                url="https://discord.com/users/867376409965363200",
-            )
-        )
-        await event.interaction.create_initial_response(
-            response_type=hikari.ResponseType.MESSAGE_CREATE,
-            embed=embed,
-            flags=hikari.MessageFlag.EPHEMERAL,
-        )
+    if (error := result.errors.get("channel")) is not None:
+        raise error
+    return result.results["channel"]
 
 
 @plugin.command
@@ -586,31 +854,25 @@ async def ticket_panel_command(
     ctx: lightbulb.SlashContext, channel: hikari.InteractionChannel
 ) -> None:
     bot: Bot = plugin.bot  # type: ignore
+    if ctx.guild_id not in bot.guild_configs:
+        await ctx.respond(NOT_CONFIGURED_MESSAGE)
+        return
+
     await ctx.respond(embed=plugin.d.LOADING_EMBED)
 
-    panel_embed = (
-        hikari.Embed(
-            description="**Click on the button corresponding to the type of ticket you wish to open.**",
-            colour=Colour.BLURPLE,
-            timestamp=datetime.datetime.now(datetime.timezone.utc),
-        )
-        .set_footer(
-            text=plugin.bot.footer_text, icon=plugin.bot.display_avatar_url  # type: ignore
-        )
-        .set_author(
-            name="DayZ++",
-            icon=plugin.bot.display_avatar_url,  # type: ignore
-            url="https://discord.com/users/867376409965363200",
-        )
+    panel_embed = branded(
+        "**Click on the button corresponding to the type of ticket you wish to open.**"
     )
     view = TicketPanelView()
     await bot.rest.create_message(
         channel.id, embed=panel_embed, components=view.build()
     )
 
-    embed = plugin.d.SUCCESS_EMBED
-    embed.description = embed.description.format(channel=f"<#{channel.id}>")
-    await ctx.edit_last_response(embed=embed)
+    success_embed = plugin.d.SUCCESS_EMBED
+    success_embed.description = success_embed.description.format(
+        channel=f"<#{channel.id}>"
+    )
+    await ctx.edit_last_response(embed=success_embed)
 
 
 @plugin.command
@@ -625,55 +887,203 @@ async def ticket_panel_command(
 @lightbulb.implements(lightbulb.SlashCommand)
 async def close_request_command(ctx: lightbulb.SlashContext) -> None:
     bot: Bot = plugin.bot  # type: ignore
-    channel = bot.cache.get_guild_channel(ctx.channel_id)
+    ticket = bot.tickets.get(ctx.channel_id)
 
-    if channel.parent_id != plugin.d.TICKETS_CATEGORY_ID:
+    if ticket is None:
         await ctx.respond(
             "**This is not a Ticket Channel.**",
             flags=hikari.MessageFlag.EPHEMERAL,
         )
         return
 
-    ticket_owner_id = int(channel.name.split("-")[-1])
-    if ticket_owner_id not in bot.cache.get_members_view_for_guild(
-        int(os.environ["GUILD_ID"])
-    ):
+    ticket_owner_id = ticket.owner_id
+    if not await bot.is_member(ticket.guild_id, ticket_owner_id):
         await ctx.respond(
             "The Person that created this Ticket is not in the Server anymore. Closing it automatically in 3 seconds ...",
             flags=hikari.MessageFlag.EPHEMERAL,
         )
-        await asyncio.sleep(3)
-        await bot.rest.delete_channel(channel)
-
-    embed = (
-        hikari.Embed(
-            description=f"**{ctx.user.mention} requests to close this Ticket.**",
-            colour=Colour.BLURPLE,
-            timestamp=datetime.datetime.now(datetime.timezone.utc),
-        )
-        .set_footer(
-            text=plugin.bot.footer_text, icon=plugin.bot.display_avatar_url  # type: ignore
-        )
-        .set_author(
-            name="DayZ++",
-            icon=plugin.bot.display_avatar_url,  # type: ignore
-            url="https://discord.com/users/867376409965363200",
+        bot.timers.schedule(
+            AUTO_CLOSE_TIMER,
+            ctx.channel_id,
+            ticket.guild_id,
+            utcnow() + AUTO_CLOSE_DELAY,
+            {"closed_by": ctx.user.id},
         )
+        return
+
+    request_embed = branded(
+        f"**{ctx.user.mention} requests to close this Ticket.**"
     )
 
-    await ctx.respond(
+    response = await ctx.respond(
         f"<@{ticket_owner_id}>",
-        embed=embed,
+        embed=request_embed,
         components=CloseRequestConfirmationView(
             user_id=ticket_owner_id
         ).build(),
         user_mentions=True,
     )
+    message = await response.message()
+    bot.close_requests.add(
+        CloseRequest(
+            ctx.channel_id,
+            ticket.guild_id,
+            message.id,
+            ticket_owner_id,
+            ctx.user.id,
+            message.created_at,
+        )
+    )
+    bot.timers.schedule(
+        CLOSE_REQUEST_TIMER,
+        ctx.channel_id,
+        ticket.guild_id,
+        message.created_at
+        + datetime.timedelta(hours=CONFIG.CLOSE_REQUEST_EXPIRY_HOURS),
+        {"message_id": message.id},
+    )
+
+
+@plugin.command
+@lightbulb.app_command_permissions(
+    hikari.Permissions.ADMINISTRATOR, dm_enabled=False
+)
+@lightbulb.command(
+    name="ticket-config",
+    description="Configures the Support System on this Server.",
+)
+@lightbulb.implements(lightbulb.SlashCommandGroup)
+async def ticket_config_command(_: lightbulb.SlashContext) -> None:
+    pass
+
+
+@ticket_config_command.child
+@lightbulb.option(
+    name="category",
+    description="The Category new Tickets are created in.",
+    type=hikari.GuildChannel,
+    channel_types=(hikari.ChannelType.GUILD_CATEGORY,),
+)
+@lightbulb.option(
+    name="support_role",
+    description="The Role that can see and manage all Tickets.",
+    type=hikari.Role,
+)
+@lightbulb.option(
+    name="staff_role",
+    description="The Role pinged for urgent Ticket categories.",
+    type=hikari.Role,
+    required=False,
+)
+@lightbulb.option(
+    name="verified_admin_role",
+    description="Members with this Role get priority.",
+    type=hikari.Role,
+    required=False,
+)
+@lightbulb.option(
+    name="premium_role",
+    description="Members with this Role get priority.",
+    type=hikari.Role,
+    required=False,
+)
+@lightbulb.option(
+    name="shop_role",
+    description="Shown on the Ticket welcome message.",
+    type=hikari.Role,
+    required=False,
+)
+@lightbulb.option(
+    name="suggestions_channel",
+    description="The Channel Suggestions are posted in.",
+    type=hikari.TextableGuildChannel,
+    channel_types=(hikari.ChannelType.GUILD_TEXT,),
+    required=False,
+)
+@lightbulb.command(
+    name="set",
+    description="Sets the Ticket configuration of this Server.",
+    auto_defer=True,
+    ephemeral=True,
+)
+@lightbulb.implements(lightbulb.SlashSubCommand)
+async def ticket_config_set(ctx: lightbulb.SlashContext) -> None:
+    bot: Bot = plugin.bot  # type: ignore
+    options = ctx.options
+
+    def optional_id(value: hikari.PartialObject | None) -> int | None:
+        return None if value is None else value.id
+
+    config = GuildConfig(
+        ctx.guild_id,  # type: ignore
+        options.category.id,
+        options.support_role.id,
+        staff_ping=options.staff_role and options.staff_role.mention,
+        verified_admin_role_id=optional_id(options.verified_admin_role),
+        premium_role_id=optional_id(options.premium_role),
+        shop_role_id=optional_id(options.shop_role),
+        suggestions_channel_id=optional_id(options.suggestions_channel),
+    )
+    bot.guild_configs.set(config)
+    await index_guild(config)
+
+    await ctx.respond(
+        embed=branded(
+            f"**Tickets will be created in <#{config.ticket_category_id}>.**"
+        )
+    )
+
+
+@ticket_config_command.child
+@lightbulb.command(
+    name="reload",
+    description="Re-reads the Ticket configuration of this Server.",
+    auto_defer=True,
+    ephemeral=True,
+)
+@lightbulb.implements(lightbulb.SlashSubCommand)
+async def ticket_config_reload(ctx: lightbulb.SlashContext) -> None:
+    bot: Bot = plugin.bot  # type: ignore
+    if await bot.guild_configs.reload(ctx.guild_id) is None:  # type: ignore
+        await ctx.respond(NOT_CONFIGURED_MESSAGE)
+        return
+
+    await ctx.respond(embed=branded("**Reloaded the Ticket configuration.**"))
+
+
+def dump_category_pools() -> list[list[Any]]:
+    return [
+        [guild_id, pool.snapshot()]
+        for guild_id, pool in plugin.d.category_pools.items()
+    ]
+
+
+def restore_category_pools(rows: list[list[Any]]) -> None:
+    plugin.d.category_pools = {
+        guild_id: CategoryPool.from_snapshot(pool) for guild_id, pool in rows
+    }
 
 
 def load(bot: Bot) -> None:
+    bot.snapshots.register(
+        "categories", dump_category_pools, restore_category_pools
+    )
+    if bot.coordinator is not None:
+        plugin.d.scheduler.shared = SharedBucket(
+            bot.coordinator,
+            "ticket:create-channel",
+            CONFIG.TICKET_CREATE_BURST,
+            CONFIG.TICKET_CREATE_PERIOD,
+        )
+    bot.timers.register(AUTO_CLOSE_TIMER, auto_close)
+    bot.timers.register(CLOSE_REQUEST_TIMER, expire_close_request)
+    bot.timers.register(INACTIVITY_TIMER, check_inactivity)
     bot.add_plugin(plugin)
+    bot.router.include(routes)
 
 
 def unload(bot: Bot) -> None:
+    bot.router.exclude(routes)
+    for kind in (AUTO_CLOSE_TIMER, CLOSE_REQUEST_TIMER, INACTIVITY_TIMER):
+        bot.timers.unregister(kind)
     bot.remove_plugin(plugin)
@@ -1 +1,4 @@
 from .date_and_time_utils import *
+from .resource_utils import *
+from .profile_utils import *
+from .logging_utils import *
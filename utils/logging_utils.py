@@ -0,0 +1,191 @@
+import contextlib
+import contextvars
+import copy
+import datetime
+import itertools
+import json
+import logging
+import logging.handlers
+import queue
+from typing import Any, Iterator
+
+TEXT_LOG_FORMAT = (
+    "[%(asctime)s]: [ %(levelname)8s ] [ %(name)20s ] -> %(message)s"
+)
+# Records waiting for the logging thread, more are dropped and counted.
+LOG_QUEUE_SIZE = 10_000
+CONTEXT_FIELDS = ("interaction_id", "guild_id", "handler")
+
+_log_context: contextvars.ContextVar[dict[str, Any]] = contextvars.ContextVar(
+    "log_context", default={}
+)
+
+
+@contextlib.contextmanager
+def log_context(**fields: Any) -> Iterator[None]:
+    # Attaches the fields to every record logged by the current task until
+    # the block exits, tasks it creates inherit them.
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    # Runs in the thread that logs, the only one that sees its context.
+    def filter(self, record: logging.LogRecord) -> bool:
+        for field, value in _log_context.get().items():
+            setattr(record, field, value)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    # Keeps one in ``rate`` records below WARNING of the configured loggers
+    # and their children, e.g. {"hikari.gateway": 10}.
+    def __init__(self, rates: dict[str, int]) -> None:
+        super().__init__()
+        self.rates: dict[str, int] = rates
+        self._resolved: dict[str, int] = {}
+        self._counters: dict[str, Iterator[int]] = {}
+
+    def rate(self, name: str) -> int:
+        if (rate := self._resolved.get(name)) is None:
+            prefix = max(
+                (
+                    prefix
+                    for prefix in self.rates
+                    if name == prefix or name.startswith(f"{prefix}.")
+                ),
+                key=len,
+                default=None,
+            )
+            rate = self._resolved[name] = (
+                self.rates[prefix] if prefix is not None else 1
+            )
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        if (rate := self.rate(record.name)) <= 1:
+            return True
+
+        record.sample_rate = rate
+        counter = self._counters.setdefault(record.name, itertools.count())
+        return next(counter) % rate == 0
+
+
+class JsonFormatter(logging.Formatter):
+    # One JSON object per line. Snowflakes are written as strings, since
+    # most JSON consumers read numbers as doubles.
+    def __init__(self, fields: dict[str, Any] | None = None) -> None:
+        super().__init__()
+        self.fields: dict[str, Any] = fields or {}
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: dict[str, Any] = {
+            "time": datetime.datetime.fromtimestamp(
+                record.created, datetime.timezone.utc
+            ).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **self.fields,
+        }
+        for field in CONTEXT_FIELDS:
+            if (value := getattr(record, field, None)) is not None:
+                payload[field] = str(value)
+        if (rate := getattr(record, "sample_rate", 1)) > 1:
+            payload["sample_rate"] = rate
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exception"] = record.exc_text
+        if record.stack_info:
+            payload["stack"] = record.stack_info
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    # Hands records to the logging thread without ever waiting on it, once
+    # the queue is full they are dropped and the count is logged later.
+    def __init__(self, queue_: "queue.Queue[Any]") -> None:
+        super().__init__(queue_)
+        self.dropped: int = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Arguments and tracebacks may change or go away once the caller
+        # continues, so only they are rendered before queueing.
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info
+            )
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            if self.dropped:
+                self.queue.put_nowait(self._dropped_record())
+                self.dropped = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _dropped_record(self) -> logging.LogRecord:
+        return logging.makeLogRecord(
+            {
+                "name": "logging",
+                "levelno": logging.WARNING,
+                "levelname": logging.getLevelName(logging.WARNING),
+                "msg": f"Dropped {self.dropped} log records "
+                "while the logging queue was full.",
+            }
+        )
+
+
+class DrainingQueueListener(logging.handlers.QueueListener):
+    # Waits for room for its stop sentinel rather than failing on a full
+    # queue, so stopping always flushes what was queued.
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)  # type: ignore
+
+
+def setup_logging(
+    level: int | str = logging.INFO,
+    *,
+    json_output: bool = True,
+    sample_rates: dict[str, int] | None = None,
+    fields: dict[str, Any] | None = None,
+) -> DrainingQueueListener:
+    # Replaces the root handlers with a queue drained by a background
+    # thread, which does the formatting and the writing. Stop the returned
+    # listener on shutdown to flush it.
+    stream = logging.StreamHandler()
+    stream.setFormatter(
+        JsonFormatter(fields)
+        if json_output
+        else logging.Formatter(TEXT_LOG_FORMAT)
+    )
+
+    records: queue.Queue[Any] = queue.Queue(LOG_QUEUE_SIZE)
+    handler = NonBlockingQueueHandler(records)
+    handler.addFilter(SamplingFilter(sample_rates or {}))
+    handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+        existing.close()
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    listener = DrainingQueueListener(
+        records, stream, respect_handler_level=True
+    )
+    listener.start()
+    return listener
@@ -0,0 +1,43 @@
+import cProfile
+import io
+import pstats
+import tracemalloc
+
+# Frames of the capture machinery itself, left out of allocation reports.
+_TRACEMALLOC_NOISE = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def format_profile(
+    profiler: cProfile.Profile, *, limit: int = 30, sort: str = "cumulative"
+) -> str:
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
+
+
+def format_allocations(
+    snapshot: tracemalloc.Snapshot, *, limit: int = 30
+) -> str:
+    statistics = snapshot.filter_traces(_TRACEMALLOC_NOISE).statistics(
+        "lineno"
+    )
+    lines = [
+        f"{sum(stat.size for stat in statistics) / 1024:.1f} KiB in "
+        f"{sum(stat.count for stat in statistics)} blocks from "
+        f"{len(statistics)} sites, top {min(limit, len(statistics))}:",
+        "",
+        f"{'KiB':>10} {'blocks':>8}  site",
+    ]
+    for stat in statistics[:limit]:
+        frame = stat.traceback[0]
+        lines.append(
+            f"{stat.size / 1024:>10.1f} {stat.count:>8}  "
+            f"{frame.filename}:{frame.lineno}"
+        )
+    return "\n".join(lines)
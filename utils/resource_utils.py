@@ -0,0 +1,14 @@
+import sys
+
+try:
+    import resource
+except ImportError:
+    resource = None  # type: ignore
+
+
+def max_rss_mib() -> float | None:
+    if resource is None:
+        return None
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / (1024 * 1024 if sys.platform == "darwin" else 1024)